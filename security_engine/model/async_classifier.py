@@ -0,0 +1,223 @@
+"""
+asyncio interface to PIIClassifier
+
+classify_prompt runs preprocessing, vectorization and scoring on the
+calling thread, so awaiting code that calls it stalls the event loop (and
+every other connection) for as long as the prompt takes. AsyncClassifier
+keeps all of that off the loop:
+
+    - concurrent calls are merged into shared batches by one
+      batching.MicroBatcher, and each batch is scored with one
+      classify_batch call per distinct threshold setting in it
+    - batches run on a bounded thread pool: at most `workers` at a time;
+      beyond max_pending queued prompts, calls fail with
+      batching.QueueFullError instead of queueing without bound
+    - cancelling a call removes its prompts from the queue if they have not
+      been dispatched yet; a batch that is already running finishes on its
+      thread and the cancelled call's results are dropped
+    - `timeout` (seconds, per call) bounds the wait. When it passes, every
+      prompt of the call gets the fallback decision (details
+      'decision_tier' is "fallback", the analysis fields such as
+      'processed_text' are None) or, with no fallback configured,
+      asyncio.TimeoutError is raised
+
+Usage:
+    async_classifier = AsyncClassifier(classifier, workers=2, timeout=0.25, fallback="WARN")
+    decision, confidence, details = await async_classifier.classify(prompt)
+    results = await async_classifier.classify_batch(prompts, timeout=1.0)
+    await async_classifier.close()
+
+    # Or through the classifier, with one AsyncClassifier created on first use
+    classifier.configure_async(workers=2, timeout=0.25, fallback="WARN")
+    decision, confidence, details = await classifier.aclassify(prompt)
+    results = await classifier.aclassify_batch(prompts)
+    await classifier.aclose()
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher
+
+
+FALLBACK_DECISIONS = ("ALLOW", "WARN", "BLOCK")
+
+
+class AsyncClassifier:
+    """
+    Awaitable classify/classify_batch for a PIIClassifier.
+
+    Bound to the event loop it is first used on.
+    """
+
+    def __init__(
+        self,
+        classifier,
+        workers: int = 1,
+        window: float = 0.005,
+        max_batch: int = 256,
+        max_pending: int = 4096,
+        timeout: float = None,
+        fallback: str = None
+    ):
+        """
+        Args:
+            classifier: The PIIClassifier to call
+            workers: Threads classifying batches (and batches in flight)
+            window, max_batch, max_pending: See batching.MicroBatcher
+            timeout: Default seconds a call may take (None: no limit)
+            fallback: Default decision ("ALLOW", "WARN" or "BLOCK") returned
+                when a call times out (None: raise asyncio.TimeoutError)
+        """
+        _check_fallback(fallback)
+        self.classifier = classifier
+        self.workers = workers
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.fallback = fallback
+        self.loop = None
+        self.timeouts = 0
+        self.closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pii-async")
+        self._batcher = None
+
+    def _get_batcher(self) -> MicroBatcher:
+        """The batcher, created on first use on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self.closed:
+            raise RuntimeError("AsyncClassifier is closed")
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("AsyncClassifier is bound to another event loop")
+
+        if self._batcher is None:
+            self._batcher = MicroBatcher(
+                self._classify_items,
+                window=self.window,
+                max_batch=self.max_batch,
+                max_pending=self.max_pending,
+                executor=self._executor,
+                concurrency=self.workers
+            )
+        return self._batcher
+
+    def _classify_items(self, items: list) -> list:
+        """
+        Results of (prompt, settings) items, settings being (block_threshold,
+        warn_threshold, require_pii_pattern): one classify_batch call per
+        distinct settings in the batch.
+        """
+        groups = {}
+        for i, (_, settings) in enumerate(items):
+            groups.setdefault(settings, []).append(i)
+        results = [None] * len(items)
+        for (block_threshold, warn_threshold, require_pii_pattern), indexes in groups.items():
+            scored = self.classifier.classify_batch(
+                [items[i][0] for i in indexes], block_threshold, warn_threshold, require_pii_pattern
+            )
+            for i, result in zip(indexes, scored):
+                results[i] = result
+        return results
+
+    async def classify(self, prompt: str, **kwargs) -> tuple:
+        """classify_prompt off the event loop; arguments as for classify_batch"""
+        [result] = await self.classify_batch([prompt], **kwargs)
+        return result
+
+    async def classify_batch(
+        self,
+        prompts: list,
+        block_threshold: float = None,
+        warn_threshold: float = None,
+        require_pii_pattern: bool = True,
+        timeout: float = None,
+        fallback: str = None
+    ) -> list:
+        """
+        classify_batch off the event loop, batched with concurrent calls.
+
+        Args:
+            block_threshold, warn_threshold, require_pii_pattern:
+                Same as PIIClassifier.classify_prompt
+            timeout: Seconds to wait (default: the instance's timeout)
+            fallback: Decision on timeout (default: the instance's fallback)
+
+        Returns:
+            List of (decision, confidence, details), as from classify_batch
+
+        Raises:
+            asyncio.TimeoutError: On timeout without a fallback decision
+            batching.QueueFullError: If too many prompts are already pending
+        """
+        prompts = list(prompts)
+        _check_fallback(fallback)
+        batcher = self._get_batcher()
+        settings = (block_threshold, warn_threshold, require_pii_pattern)
+        items = [(prompt, settings) for prompt in prompts]
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await batcher.submit(items)
+
+        try:
+            return await asyncio.wait_for(batcher.submit(items), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            fallback = self.fallback if fallback is None else fallback
+            if fallback is None:
+                raise
+            return [self._fallback_result(fallback, timeout) for _ in prompts]
+
+    def _fallback_result(self, decision: str, timeout: float) -> tuple:
+        """
+        (decision, 0.0, details) for a prompt that missed its deadline.
+
+        details has the keys of a classify_prompt result, with None for
+        everything the prompt was not analysed for (processed_text
+        included), plus fallback_reason.
+        """
+        return decision, 0.0, {
+            'ml_confidence': None,
+            'has_pii_pattern': None,
+            'has_example_marker': None,
+            'is_likely_real_pii': None,
+            'decision_tier': "fallback",
+            'model_version': self.classifier.model_version,
+            'processed_text': None,
+            'fallback_reason': f"timed out after {timeout:g}s",
+        }
+
+    async def close(self):
+        """Finish every queued call, then stop the worker threads"""
+        self.closed = True
+        if self._batcher is not None:
+            await self._batcher.close()
+        # Waits for model calls still running, so not on the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+
+    def shutdown(self):
+        """
+        Close without waiting: for an instance whose event loop is gone.
+
+        Stops the worker threads once their running batches finish; calls
+        still queued are never answered.
+        """
+        self.closed = True
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """Batching counters (see batching.MicroBatcher.stats), plus timeouts"""
+        if self._batcher is not None:
+            stats = self._batcher.stats()
+        else:
+            stats = {'pending': 0, 'batches': 0, 'batched_prompts': 0,
+                     'mean_batch_size': 0.0, 'rejected': 0}
+        stats['timeouts'] = self.timeouts
+        return stats
+
+
+def _check_fallback(fallback):
+    if fallback is not None and fallback not in FALLBACK_DECISIONS:
+        raise ValueError(f"fallback must be one of {FALLBACK_DECISIONS}, not {fallback!r}")
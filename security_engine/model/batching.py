@@ -0,0 +1,203 @@
+"""
+Adaptive micro-batching of concurrent classification requests
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the batcher has too many pending prompts"""
+
+
+class BatcherClosedError(Exception):
+    """Raised when submitting to a batcher that is shutting down"""
+
+
+class MicroBatcher:
+    """
+    Groups prompts submitted concurrently into single vectorized calls.
+
+    The first request to arrive opens a batching window. Requests that
+    arrive within the window (or until max_batch prompts are waiting) are
+    classified together with one classify_batch call, run on a worker
+    thread so the event loop stays responsive. Up to concurrency batches
+    are classified at the same time; while all are busy, new requests keep
+    joining the next batch.
+    """
+
+    def __init__(
+        self,
+        classify_batch,
+        window: float = 0.005,
+        max_batch: int = 256,
+        max_pending: int = 4096,
+        executor=None,
+        concurrency: int = 1
+    ):
+        """
+        Args:
+            classify_batch: Callable taking a list of prompts and returning
+                one result per prompt (e.g. PIIClassifier.classify_batch)
+            window: Seconds to wait for more requests after the first one
+            max_batch: Prompts that close the window early
+            max_pending: Queued prompts beyond which submit() rejects
+            executor: Executor for model calls (default: concurrency
+                worker threads)
+            concurrency: Batches classified at the same time
+        """
+        self.classify_batch = classify_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.concurrency = concurrency
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="pii-batcher"
+        )
+        self._owns_executor = executor is None
+        self._slots = None
+        self._running = set()
+
+        self._queue = deque()
+        self._pending = 0
+        self._wakeup = None
+        self._full = None
+        self._task = None
+        self._closing = False
+
+        self.batches = 0
+        self.batched_prompts = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of prompts waiting to be classified"""
+        return self._pending
+
+    def start(self):
+        """Start the batching loop on the running event loop"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, prompts: list) -> list:
+        """
+        Queue prompts for the next batch and wait for their results.
+
+        Raises:
+            QueueFullError: If accepting the prompts would exceed max_pending
+            BatcherClosedError: If the batcher is shutting down
+        """
+        if self._closing:
+            raise BatcherClosedError("batcher is shutting down")
+        if self._pending + len(prompts) > self.max_pending:
+            self.rejected += 1
+            raise QueueFullError(f"{self._pending} prompts already pending")
+        if not prompts:
+            return []
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((prompts, future))
+        self._pending += len(prompts)
+        self._wakeup.set()
+        if self._pending >= self.max_batch:
+            self._full.set()
+
+        return await future
+
+    async def close(self):
+        """Stop accepting requests, finish everything queued, then stop"""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            self._full.set()
+            await self._task
+            self._task = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Return batching counters"""
+        return {
+            'pending': self._pending,
+            'batches': self.batches,
+            'batched_prompts': self.batched_prompts,
+            'mean_batch_size': self.batched_prompts / self.batches if self.batches else 0.0,
+            'rejected': self.rejected,
+        }
+
+    def _take_batch(self) -> list:
+        """Pop whole requests from the queue until max_batch prompts are taken"""
+        batch = []
+        size = 0
+        while self._queue and (not batch or size + len(self._queue[0][0]) <= self.max_batch):
+            prompts, future = self._queue.popleft()
+            self._pending -= len(prompts)
+            # Requests cancelled while queued are dropped without scoring
+            if not future.done():
+                batch.append((prompts, future))
+                size += len(prompts)
+        if self._pending < self.max_batch:
+            self._full.clear()
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            if not self._queue:
+                if self._closing:
+                    break
+                self._wakeup.clear()
+                continue
+
+            # Give concurrent requests a chance to join this batch
+            if not self._closing and self._pending < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+
+            # Requests keep joining the queue while every slot is busy
+            await self._slots.acquire()
+            batch = self._take_batch()
+            if not self._queue and not self._closing:
+                self._wakeup.clear()
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = loop.create_task(self._classify(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+        if self._running:
+            await asyncio.gather(*list(self._running))
+
+    async def _classify(self, batch: list):
+        """Classify one batch on the executor and resolve its requests"""
+        loop = asyncio.get_running_loop()
+        try:
+            prompts = [p for request, _ in batch for p in request]
+            try:
+                results = await loop.run_in_executor(self._executor, self.classify_batch, prompts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.batched_prompts += len(prompts)
+
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(request)])
+                offset += len(request)
+        finally:
+            self._slots.release()
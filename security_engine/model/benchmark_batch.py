@@ -0,0 +1,73 @@
+"""
+Benchmark vectorized classify_batch against the per-prompt loop
+"""
+
+import argparse
+import itertools
+import time
+
+from classifier import PIIClassifier
+from train_model import load_data
+
+
+DEFAULT_SIZES = [1, 64, 1024, 16384]
+
+
+def make_batch(texts: list, size: int) -> list:
+    """Build a batch of the requested size by cycling through texts"""
+    return list(itertools.islice(itertools.cycle(texts), size))
+
+
+def time_call(fn, repeat: int) -> float:
+    """Return the best wall-clock time of fn() over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, data_path="train.txt", repeat=3):
+    """Time the loop and the vectorized path for each batch size"""
+    classifier = PIIClassifier()
+    texts, _ = load_data(data_path)
+
+    print("=" * 80)
+    print("BATCH CLASSIFICATION BENCHMARK")
+    print("=" * 80)
+    print(f"\n{'Batch':>8} {'Loop (s)':>12} {'Batch (s)':>12} "
+          f"{'Loop/s':>12} {'Batch/s':>12} {'Speedup':>10}")
+    print("-" * 70)
+
+    results = []
+    for size in sizes:
+        batch = make_batch(texts, size)
+
+        # The per-prompt loop is slow; a single run is enough for big batches
+        loop_repeat = repeat if size <= 1024 else 1
+        loop_time = time_call(
+            lambda: [classifier.classify_prompt(p) for p in batch], loop_repeat
+        )
+        batch_time = time_call(lambda: classifier.classify_batch(batch), repeat)
+
+        speedup = loop_time / batch_time if batch_time > 0 else float("inf")
+        print(f"{size:>8} {loop_time:>12.4f} {batch_time:>12.4f} "
+              f"{size / loop_time:>12.0f} {size / batch_time:>12.0f} "
+              f"{speedup:>9.1f}x")
+        results.append((size, loop_time, batch_time, speedup))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Batch sizes to benchmark")
+    parser.add_argument("--data", default="train.txt",
+                        help="Prompt source in train.txt format")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.data, args.repeat)
@@ -0,0 +1,114 @@
+"""
+Measure how PIIClassifier throughput scales with threads and processes
+
+For 1..N workers (powers of two up to --max-workers, default the number
+of CPUs) and the current model:
+
+    threads    classify_many(executor="thread"): chunks of one call
+               scored by a thread pool sharing the model
+    processes  classify_many(executor="process"): chunks scored by worker
+               processes, each with its own copy of the model
+    callers    N threads each calling classify_prompt on the shared
+               classifier, one prompt at a time (a threaded server)
+
+Throughput is prompts per second, best of --rounds; speedup is relative
+to one worker of the same kind. Threads stop scaling where the GIL is
+held (TF-IDF n-gram extraction, regex rules); processes scale with cores
+minus pickling costs. Finally the executor classify_many(executor="auto")
+would pick from these numbers is printed.
+
+Usage:
+    python benchmark_concurrency.py
+    python benchmark_concurrency.py --max-workers 8 -n 8192 --model pii_intent_lr.npz
+"""
+
+import argparse
+import itertools
+import threading
+import time
+
+from classifier import PIIClassifier
+from parallel import choose_executor, default_workers, measure_scaling
+from train_model import load_data
+
+
+def worker_counts(max_workers: int) -> list:
+    """1, 2, 4, ... up to max_workers (always included)"""
+    counts = list(itertools.takewhile(lambda n: n < max_workers, (2 ** i for i in itertools.count())))
+    return counts + [max_workers]
+
+
+def callers_rate(classifier: PIIClassifier, prompts: list, callers: int, rounds: int) -> float:
+    """Prompts per second with callers threads each running classify_prompt"""
+    shares = [prompts[i::callers] for i in range(callers)]
+
+    def run(share):
+        for prompt in share:
+            classifier.classify_prompt(prompt)
+
+    best = float("inf")
+    for _ in range(rounds):
+        threads = [threading.Thread(target=run, args=(share,)) for share in shares]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        best = min(best, time.perf_counter() - start)
+    return len(prompts) / best
+
+
+def run_benchmark(model_path="pii_intent_lr.joblib", data_path="train.txt", n=4096,
+                  single=1024, max_workers=None, rounds=3) -> dict:
+    """Print and return {(kind, workers): prompts per second}"""
+    classifier = PIIClassifier(model_path)
+    texts, _ = load_data(data_path)
+    prompts = list(itertools.islice(itertools.cycle(texts), n))
+    counts = worker_counts(max_workers or default_workers())
+
+    print("=" * 80)
+    print("CONCURRENCY BENCHMARK")
+    print("=" * 80)
+    print(f"\nModel {model_path} ({classifier.model_version}), {default_workers()} CPUs, "
+          f"{n} prompts per batch run, {single} per single-prompt run")
+
+    try:
+        scaling = measure_scaling(classifier, prompts, counts, rounds=rounds)
+    finally:
+        classifier.shutdown_pools()
+    for workers in counts:
+        scaling[("callers", workers)] = callers_rate(classifier, prompts[:single], workers, rounds)
+
+    print(f"\nSerial classify_batch: {scaling[('serial', 1)]:.0f} prompts/s")
+    print(f"\n{'Workers':>8} {'Threads/s':>11} {'Speedup':>8} {'Processes/s':>12} {'Speedup':>8} "
+          f"{'Callers/s':>10} {'Speedup':>8}")
+    print("-" * 72)
+    for workers in counts:
+        row = f"{workers:>8}"
+        for kind, width in (("thread", 11), ("process", 12), ("callers", 10)):
+            rate = scaling[(kind, workers)]
+            row += f" {rate:>{width}.0f} {rate / scaling[(kind, 1)]:>7.2f}x"
+        print(row)
+
+    kind, workers = choose_executor({k: v for k, v in scaling.items() if k[0] != "callers"})
+    print(f"\nclassify_many(executor='auto') would use: {kind}"
+          + (f" with {workers} workers" if kind != "serial" else ""))
+    return scaling
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure thread and process scaling of the PII classifier",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Model to load")
+    parser.add_argument("--data", default="train.txt", help="Prompt source in train.txt format")
+    parser.add_argument("-n", type=int, default=4096, help="Prompts per batch run")
+    parser.add_argument("--single", type=int, default=1024,
+                        help="Prompts per run of single-prompt callers")
+    parser.add_argument("--max-workers", type=int, help="Largest worker count (default: CPUs)")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run_benchmark(args.model, args.data, args.n, args.single, args.max_workers, args.rounds)
@@ -0,0 +1,115 @@
+"""
+Benchmark fused feature extraction against the standard FeatureUnion
+
+    standard   preprocess_for_ml, then the char and word TfidfVectorizers
+               (each lowercases, strips accents and builds its n-gram list)
+    fused      fused_features.FusedFeatures on the raw prompt (one
+               normalization, n-grams counted without building lists)
+
+For each prompt, the features are computed alone (one call per prompt, as
+classify_prompt does) and reported as peak traced memory (tracemalloc)
+above the pre-call level and as wall-clock time (measured separately,
+without tracing). Both paths are checked to produce the same matrix.
+
+Usage:
+    python benchmark_features.py
+    python benchmark_features.py --prompts 2000
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+
+from fused_features import fused_pipeline
+from preprocess import preprocess_for_ml
+from train_model import load_data
+
+
+def peak_bytes(fn, items: list) -> list:
+    """Peak traced allocation (bytes above the starting level) of fn(item) per item"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for item in items:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn(item)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def seconds_per_item(fn, items: list, repeat: int) -> float:
+    """Best over repeat runs of the mean time of fn(item)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, (time.perf_counter() - start) / len(items))
+    return best
+
+
+def run_benchmark(model_path: str = "pii_intent_lr.joblib", data_path: str = "train.txt",
+                  n_prompts: int = 1000, repeat: int = 3):
+    pipeline = joblib.load(model_path)
+    union = pipeline.named_steps['features']
+    fused = fused_pipeline(pipeline).named_steps['features']
+
+    texts, _ = load_data(data_path)
+    rng = random.Random(0)
+    prompts = rng.sample(texts, min(n_prompts, len(texts)))
+    pastes = ["\n".join(rng.sample(texts, 1500)) for _ in range(4)]
+
+    def standard(text):
+        return union.transform([preprocess_for_ml(text)])
+
+    def fused_features(text):
+        return fused.transform([text])
+
+    print("=" * 80)
+    print("FEATURE EXTRACTION BENCHMARK (one call per prompt)")
+    print("=" * 80)
+    print(f"\n{'Workload':<24} {'Method':<10} {'Peak KB (mean)':>15} {'Peak KB (max)':>14} "
+          f"{'µs/prompt':>11}")
+    print("-" * 80)
+
+    for name, workload in (("train.txt prompts", prompts),
+                           (f"{len(pastes)} x {len(pastes[0]) // 1000} KB pastes", pastes)):
+        for text in workload:
+            if abs(standard(text) - fused_features(text)).max() > 0:
+                raise AssertionError(f"feature mismatch on {text[:60]!r}")
+
+        results = {}
+        for method, fn in (("standard", standard), ("fused", fused_features)):
+            peaks = np.asarray(peak_bytes(fn, workload)) / 1024
+            seconds = seconds_per_item(fn, workload, repeat)
+            results[method] = (peaks.mean(), seconds)
+            print(f"{name:<24} {method:<10} {peaks.mean():>15.1f} {peaks.max():>14.1f} "
+                  f"{seconds * 1e6:>11.1f}")
+
+        (standard_peak, standard_time), (fused_peak, fused_time) = results.values()
+        print(f"{'':<24} {'reduction':<10} {1 - fused_peak / standard_peak:>14.0%} {'':>14} "
+              f"{standard_time / fused_time:>10.2f}x")
+
+    print("\n✓ Both methods produced identical feature matrices")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("--data", default="train.txt", help="Prompts to extract features from")
+    parser.add_argument("--prompts", type=int, default=1000, help="Prompts sampled from --data")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs (best is kept)")
+    args = parser.parse_args()
+
+    run_benchmark(args.model, args.data, args.prompts, args.repeat)
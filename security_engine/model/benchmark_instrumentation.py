@@ -0,0 +1,146 @@
+"""
+Measure the overhead of per-stage instrumentation in PIIClassifier
+
+Compares, on the same prompts:
+
+    core    the classification code with no instrumentation hooks at all
+            (PIIClassifier._classify / _classify_batch called directly)
+    off     classify_prompt / classify_batch with instrumentation disabled
+    on      classify_prompt / classify_batch with instrumentation enabled
+
+The variants run back to back on the same chunk of prompts and are
+compared by the median of their paired time ratios. Exits with status 1
+if "off" is more than --max-overhead percent slower than "core".
+
+Usage:
+    python benchmark_instrumentation.py
+    python benchmark_instrumentation.py -n 1024 --rounds 9 --max-overhead 2
+"""
+
+import argparse
+import sys
+import time
+
+from classifier import PIIClassifier
+from train_model import load_data
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(classifier: PIIClassifier, texts: list, rounds: int, batch_size: int) -> dict:
+    """
+    Per-prompt times and paired overhead ratios of each variant.
+
+    Texts are processed in chunks of batch_size. For every chunk and round
+    the three variants run back to back (in rotating order) and the "off"
+    and "on" times are divided by the "core" time of the same chunk and
+    round. The median of these paired ratios cancels the slow drift and
+    scheduler noise that would otherwise dwarf a 2% difference.
+
+    Returns:
+        {mode: {'core_us', 'off_us', 'on_us', 'off_ratio', 'on_ratio'}}
+    """
+    def core(chunk, mode):
+        model = classifier._model
+        # The thresholds classify_prompt/classify_batch use by default
+        settings = (*model.thresholds(None, None), True)
+        if mode == 'batch':
+            classifier._classify_batch(chunk, *settings, model)
+        else:
+            for text in chunk:
+                classifier._classify(text, *settings, model)
+
+    def api(chunk, mode):
+        if mode == 'batch':
+            classifier.classify_batch(chunk)
+        else:
+            for text in chunk:
+                classifier.classify_prompt(text)
+
+    instrumentation = classifier.enable_instrumentation()
+    variants = [('core', core), ('off', api), ('on', api)]
+
+    results = {}
+    for mode in ('single', 'batch'):
+        times = {name: [] for name, _ in variants}
+        ratios = {'off': [], 'on': []}
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            for round_ in range(rounds):
+                # Rotate the order so no variant always runs first
+                shift = round_ % len(variants)
+                elapsed = {}
+                for name, fn in variants[shift:] + variants[:shift]:
+                    classifier.instrumentation = instrumentation if name == 'on' else None
+                    elapsed[name] = _time(lambda: fn(chunk, mode))
+                    times[name].append(elapsed[name] / len(chunk))
+                for name in ratios:
+                    ratios[name].append(elapsed[name] / elapsed['core'])
+
+        results[mode] = {f"{name}_us": _median(values) * 1e6 for name, values in times.items()}
+        results[mode].update({f"{name}_ratio": _median(values) for name, values in ratios.items()})
+
+    classifier.disable_instrumentation()
+    return results
+
+
+def _median(values: list) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def run_benchmark(model_path: str, n: int, rounds: int, batch_size: int,
+                  max_overhead: float) -> bool:
+    texts, _ = load_data()
+    texts = texts[:n]
+    classifier = PIIClassifier(model_path)
+
+    # Warm up (lazy imports, allocator) before measuring
+    classifier.classify_batch(texts)
+
+    results = measure(classifier, texts, rounds, batch_size)
+
+    print("=" * 80)
+    print(f"INSTRUMENTATION OVERHEAD ({len(texts)} prompts, {rounds} rounds, median of pairs)")
+    print("=" * 80)
+    print(f"\n{'Path':<28} {'core µs':>10} {'off µs':>10} {'on µs':>10} "
+          f"{'off vs core':>12} {'on vs core':>11}")
+    print("-" * 80)
+
+    ok = True
+    for mode, label in (('single', 'classify_prompt'), ('batch', f'classify_batch({batch_size})')):
+        r = results[mode]
+        off_overhead = (r['off_ratio'] - 1) * 100
+        on_overhead = (r['on_ratio'] - 1) * 100
+        ok = ok and off_overhead <= max_overhead
+        print(f"{label:<28} {r['core_us']:>10.2f} {r['off_us']:>10.2f} {r['on_us']:>10.2f} "
+              f"{off_overhead:>+11.2f}% {on_overhead:>+10.2f}%")
+
+    print(f"\n{'✓' if ok else '✗'} Overhead with instrumentation off "
+          f"{'within' if ok else 'exceeds'} {max_overhead}%")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure instrumentation overhead",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("-n", type=int, default=512, help="Prompts to classify")
+    parser.add_argument("--rounds", type=int, default=7, help="Timings per chunk and variant")
+    parser.add_argument("--batch-size", type=int, default=64, help="Prompts per classify_batch call")
+    parser.add_argument("--max-overhead", type=float, default=2.0,
+                        help="Allowed overhead (percent) with instrumentation off")
+    args = parser.parse_args()
+
+    if not run_benchmark(args.model, args.n, args.rounds, args.batch_size, args.max_overhead):
+        sys.exit(1)
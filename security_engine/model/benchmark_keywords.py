@@ -0,0 +1,125 @@
+"""
+Benchmark the context-marker matcher behind preprocess_for_ml
+
+    substring   one `word in text` scan per keyword per set (the original
+                get_context_flags checks)
+    automaton   keyword_matcher.KeywordMatcher: all sets in one pass
+
+Runs on the shipped marker sets and on the same sets padded with
+synthetic keywords (as when adding marker lists for other languages), and
+checks that both methods find the same sets on every text.
+
+Usage:
+    python benchmark_keywords.py
+    python benchmark_keywords.py --extra 500 --repeat 5
+"""
+
+import argparse
+import random
+import string
+import time
+
+from keyword_matcher import KeywordMatcher, _is_whole_word
+from preprocess import CONTEXT_MATCHER, CODE_MARKERS, CONTACT_VERBS, DISCLOSURE_WORDS, \
+    EXAMPLE_WORDS, PII_REFERENCE_WORDS
+from train_model import load_data
+
+
+MARKER_SETS = {
+    'example': (EXAMPLE_WORDS, False),
+    'disclosure': (DISCLOSURE_WORDS, False),
+    'contact': (CONTACT_VERBS, False),
+    'code': (CODE_MARKERS, False),
+    'pii_reference': (PII_REFERENCE_WORDS, True),
+}
+
+
+def find_sets_substring(keyword_sets: dict, text: str) -> set:
+    """Baseline: scan the text once per keyword"""
+    found = set()
+    for name, (keywords, whole_words) in keyword_sets.items():
+        for keyword in keywords:
+            if not whole_words:
+                if keyword in text:
+                    found.add(name)
+                    break
+                continue
+            start = text.find(keyword)
+            while start >= 0 and not _is_whole_word(text, start, start + len(keyword)):
+                start = text.find(keyword, start + 1)
+            if start >= 0:
+                found.add(name)
+                break
+    return found
+
+
+def padded_sets(extra: int, seed: int = 0) -> dict:
+    """The marker sets with `extra` random 4-9 letter keywords added to each"""
+    rng = random.Random(seed)
+    padded = {}
+    for name, (keywords, whole_words) in MARKER_SETS.items():
+        synthetic = {
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+            for _ in range(extra)
+        }
+        padded[name] = (set(keywords) | synthetic, whole_words)
+    return padded
+
+
+def time_call(fn, repeat: int) -> float:
+    """Return the best wall-clock time of fn() over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(data_path: str = "train.txt", extra: int = 100, repeat: int = 3):
+    texts, _ = load_data(data_path)
+    rng = random.Random(0)
+    prompts = [t.lower() for t in texts]
+    pastes = ["\n".join(rng.sample(prompts, 3000)) for _ in range(4)]
+
+    configurations = [
+        (f"shipped ({sum(len(k) for k, _ in MARKER_SETS.values())} keywords)",
+         MARKER_SETS, CONTEXT_MATCHER),
+    ]
+    if extra:
+        padded = padded_sets(extra)
+        configurations.append((f"+{extra} per set ({sum(len(k) for k, _ in padded.values())})",
+                               padded, KeywordMatcher(padded)))
+
+    print("=" * 80)
+    print("CONTEXT MARKER MATCHING BENCHMARK")
+    print("=" * 80)
+    print(f"\n{'Keyword sets':<22} {'Workload':<18} {'Method':<10} {'Time (s)':>10} "
+          f"{'µs/text':>10} {'Speedup':>8}")
+    print("-" * 80)
+
+    for label, keyword_sets, matcher in configurations:
+        for name, workload in (("train.txt prompts", prompts), (f"{len(pastes)} pastes", pastes)):
+            for text in workload:
+                if find_sets_substring(keyword_sets, text) != matcher.find_sets(text):
+                    raise AssertionError(f"methods disagree on {text[:60]!r}")
+
+            baseline = time_call(lambda: [find_sets_substring(keyword_sets, t) for t in workload], repeat)
+            automaton = time_call(lambda: [matcher.find_sets(t) for t in workload], repeat)
+            for method, seconds in (("substring", baseline), ("automaton", automaton)):
+                print(f"{label:<22} {name:<18} {method:<10} {seconds:>10.3f} "
+                      f"{seconds / len(workload) * 1e6:>10.1f} {baseline / seconds:>7.2f}x")
+
+    print("\n✓ Both methods found the same marker sets on every text")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="train.txt", help="Prompts to scan")
+    parser.add_argument("--extra", type=int, default=100,
+                        help="Synthetic keywords added to each set (0 to skip)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (best is kept)")
+    args = parser.parse_args()
+
+    run_benchmark(args.data, args.extra, args.repeat)
@@ -0,0 +1,118 @@
+"""
+Measure per-worker memory of the joblib pipeline against the mmap artifact
+
+Starts several worker processes per model format, each loading the model
+and classifying a few prompts (like a gunicorn-style worker). While all
+workers are alive it reports, per worker:
+
+    RSS      resident memory (shared pages counted in every worker)
+    PSS      proportional share (shared pages split across processes)
+    Private  pages owned by this worker alone
+    Model    private memory added by loading the model
+
+Run mmap_model.py first to create pii_intent_lr.mmap. Linux only
+(/proc/self/smaps_rollup).
+
+Usage:
+    python benchmark_mmap.py
+    python benchmark_mmap.py --workers 8 pii_intent_lr.joblib pii_intent_lr.mmap
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+# Runs in each worker; reports memory and then waits until the parent is
+# done measuring so all workers of a format are alive at the same time
+_WORKER = r"""
+import json, sys
+
+def memory():
+    stats = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                stats[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        'rss_kb': stats.get('Rss', 0),
+        'pss_kb': stats.get('Pss', 0),
+        'private_kb': stats.get('Private_Clean', 0) + stats.get('Private_Dirty', 0),
+    }
+
+import classifier
+before = memory()
+model = classifier.PIIClassifier(sys.argv[1])
+model.classify_batch([
+    "my email is john.doe@gmail.com",
+    "call me at 555-123-4567",
+    "what is the capital of France?",
+])
+after = memory()
+after['model_private_kb'] = after['private_kb'] - before['private_kb']
+print(json.dumps(after), flush=True)
+sys.stdin.read()
+"""
+
+
+def measure_workers(model_path: str, workers: int) -> list:
+    """Start workers for one model, collect their memory reports, then stop them"""
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-W", "ignore", "-c", _WORKER, model_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    try:
+        reports = []
+        for proc in procs:
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Worker for {model_path} exited with {proc.wait()}")
+            reports.append(json.loads(line))
+        return reports
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+def run_benchmark(models: list, workers: int = 4):
+    print("=" * 80)
+    print(f"PER-WORKER MEMORY ({workers} workers per model)")
+    print("=" * 80)
+    print(f"\n{'Model':<24} {'RSS MB':>9} {'PSS MB':>9} {'Private MB':>11} "
+          f"{'Model MB':>9} {'Total PSS MB':>13}")
+    print("-" * 80)
+
+    for model_path in models:
+        reports = measure_workers(model_path, workers)
+
+        def mean(key):
+            return sum(report[key] for report in reports) / len(reports) / 1024
+
+        total_pss = sum(report['pss_kb'] for report in reports) / 1024
+        print(f"{model_path:<24} {mean('rss_kb'):>9.1f} {mean('pss_kb'):>9.1f} "
+              f"{mean('private_kb'):>11.1f} {mean('model_private_kb'):>9.1f} "
+              f"{total_pss:>13.1f}")
+
+    print("\nPSS and Private are what each extra worker really costs; RSS counts")
+    print("shared pages (interpreter, libraries, mmap'd model) in every worker.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-worker memory of model formats",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("models", nargs="*",
+                        default=["pii_intent_lr.joblib", "pii_intent_lr.npz", "pii_intent_lr.mmap"],
+                        help="Model artifacts to compare")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per model")
+    args = parser.parse_args()
+
+    run_benchmark(args.models, args.workers)
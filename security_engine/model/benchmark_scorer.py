@@ -0,0 +1,103 @@
+"""
+Benchmark startup time, memory and throughput of the joblib pipeline
+against the NumPy-only scorer (run export_model.py first)
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from train_model import load_data
+
+
+# Runs in a fresh interpreter so import and load costs are measured cold
+_STARTUP_PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+from classifier import PIIClassifier
+imported = time.perf_counter()
+classifier = PIIClassifier(sys.argv[1])
+loaded = time.perf_counter()
+classifier.classify_prompt("my email is john.doe@gmail.com")
+first = time.perf_counter()
+
+rss_kb = 0
+try:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({
+    'import_s': imported - start,
+    'load_s': loaded - imported,
+    'first_call_s': first - loaded,
+    'total_s': first - start,
+    'rss_mb': rss_kb / 1024,
+    'sklearn_imported': 'sklearn' in sys.modules,
+}))
+"""
+
+
+def measure_startup(model_path: str, runs: int = 3) -> dict:
+    """Median startup measurements over several fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _STARTUP_PROBE, model_path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {}
+    for key in samples[0]:
+        values = sorted(sample[key] for sample in samples)
+        result[key] = values[len(values) // 2]
+    return result
+
+
+def measure_throughput(model_path: str, texts: list) -> float:
+    """Prompts per second of classify_batch"""
+    from classifier import PIIClassifier
+
+    classifier = PIIClassifier(model_path)
+    start = time.perf_counter()
+    classifier.classify_batch(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def run_benchmark(models: list, data_path: str = "train.txt", n: int = 5000, runs: int = 3):
+    texts, _ = load_data(data_path)
+    texts = texts[:n]
+
+    print("=" * 80)
+    print("SCORER BENCHMARK")
+    print("=" * 80)
+    print(f"\n{'Model':<24} {'Import':>8} {'Load':>8} {'Total':>8} "
+          f"{'RSS MB':>8} {'sklearn':>8} {'Prompts/s':>10}")
+    print("-" * 80)
+
+    for model_path in models:
+        startup = measure_startup(model_path, runs)
+        throughput = measure_throughput(model_path, texts)
+        print(f"{model_path:<24} {startup['import_s']:>7.3f}s {startup['load_s']:>7.3f}s "
+              f"{startup['total_s']:>7.3f}s {startup['rss_mb']:>8.1f} "
+              f"{str(startup['sklearn_imported']):>8} {throughput:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("models", nargs="*",
+                        default=["pii_intent_lr.joblib", "pii_intent_lr.npz"],
+                        help="Model artifacts to compare")
+    parser.add_argument("--data", default="train.txt", help="Prompts for the throughput test")
+    parser.add_argument("-n", type=int, default=5000, help="Prompts for the throughput test")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per model")
+    args = parser.parse_args()
+
+    run_benchmark(args.models, args.data, args.n, args.runs)
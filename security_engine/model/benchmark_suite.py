@@ -0,0 +1,292 @@
+"""
+Reproducible benchmark suite for the inference and training hot paths
+
+Runs offline against train.txt and the shipped pii_intent_lr.joblib and
+times, on short, medium and very long (100 KB paste) prompts:
+
+    preprocess_for_ml
+    every public regex_rules function
+    PIIClassifier.classify_prompt and classify_batch
+    train_model.build_pipeline().fit on a fixed training sample
+
+Workloads are built from train.txt with a fixed seed, so every run sees
+the same prompts. Each case reports ops/sec and p50/p95/p99 latency; the
+results (plus environment and input checksums) are written to JSON.
+
+With --compare, the run is checked against a stored baseline and the
+script exits with status 1 if any case's median latency regressed by
+more than --threshold percent.
+
+Usage:
+    python benchmark_suite.py                                # writes benchmark_results.json
+    python benchmark_suite.py -o baseline.json               # store a baseline
+    python benchmark_suite.py --compare baseline.json --threshold 15
+    python benchmark_suite.py --filter regex --quick
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import regex_rules
+from classifier import PIIClassifier, _file_digest
+from preprocess import preprocess_for_ml
+from train_model import build_pipeline, load_data
+
+
+SEED = 1234
+LONG_PROMPT_CHARS = 100_000
+
+REGEX_FUNCTIONS = [
+    'has_pii_pattern',
+    'weak_regex_hit',
+    'has_example_marker',
+    'get_pii_types',
+    'extract_pii_values',
+    'is_real_pii',
+    'get_regex_signals',
+    'analyze_text',
+]
+
+# Prompts per classify_batch call for each workload size
+BATCH_SIZES = {'short': 256, 'medium': 64, 'long': 4}
+
+
+def build_workloads(texts: list, seed: int = SEED) -> dict:
+    """
+    Deterministic prompt sets built from the training texts.
+
+    - short: single training prompts of at most 80 characters
+    - medium: 5-30 training prompts joined into a 200-2000 char message
+    - long: training prompts joined into ~100 KB pastes
+    """
+    rng = random.Random(seed)
+
+    short_pool = [t for t in texts if len(t) <= 80]
+    short = rng.sample(short_pool, min(512, len(short_pool)))
+
+    medium = []
+    while len(medium) < 256:
+        message = " ".join(rng.sample(texts, rng.randint(5, 30)))
+        if 200 <= len(message) <= 2000:
+            medium.append(message)
+
+    long = []
+    for _ in range(4):
+        parts, size = [], 0
+        while size < LONG_PROMPT_CHARS:
+            part = rng.choice(texts)
+            parts.append(part)
+            size += len(part) + 1
+        long.append("\n".join(parts))
+
+    return {'short': short, 'medium': medium, 'long': long}
+
+
+def time_case(fn, items: list, min_time: float, min_ops: int) -> list:
+    """
+    Call fn(item) cycling through items until min_time and min_ops are
+    both reached; return the per-call latencies in seconds.
+    """
+    # Warm up once per distinct item (lazy imports, regex compilation)
+    for item in items[:8]:
+        fn(item)
+
+    latencies = []
+    clock = time.perf_counter
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = clock()
+        i = 0
+        while len(latencies) < min_ops or clock() - started < min_time:
+            item = items[i % len(items)]
+            i += 1
+            start = clock()
+            fn(item)
+            latencies.append(clock() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return latencies
+
+
+def summarize(latencies: list, items_per_op: int = 1) -> dict:
+    """ops/sec and latency percentiles (milliseconds) of one case"""
+    values = np.asarray(latencies)
+    total = float(values.sum())
+    return {
+        'ops': len(values),
+        'ops_per_sec': len(values) / total if total else 0.0,
+        'items_per_sec': len(values) * items_per_op / total if total else 0.0,
+        'mean_ms': float(values.mean()) * 1e3,
+        'min_ms': float(values.min()) * 1e3,
+        'p50_ms': float(np.percentile(values, 50)) * 1e3,
+        'p95_ms': float(np.percentile(values, 95)) * 1e3,
+        'p99_ms': float(np.percentile(values, 99)) * 1e3,
+    }
+
+
+def define_cases(classifier: PIIClassifier, workloads: dict, train_size: int,
+                 data_path: str = "train.txt", name_filter: str = None) -> list:
+    """
+    Return (name, fn, items, items_per_op, min_ops) for every case.
+
+    The training case samples data_path; it is only built (its sample
+    loaded and preprocessed) if its name matches name_filter.
+    """
+    cases = []
+
+    for size, prompts in workloads.items():
+        min_ops = 3 if size == 'long' else 20
+        cases.append((f"preprocess_for_ml[{size}]", preprocess_for_ml, prompts, 1, min_ops))
+
+        for name in REGEX_FUNCTIONS:
+            cases.append((f"regex.{name}[{size}]", getattr(regex_rules, name), prompts,
+                          1, min_ops))
+
+        cases.append((f"classify_prompt[{size}]", classifier.classify_prompt, prompts,
+                      1, min_ops))
+
+        batch_size = BATCH_SIZES[size]
+        batches = [prompts[i:i + batch_size] for i in range(0, len(prompts), batch_size)]
+        cases.append((f"classify_batch[{size}]", classifier.classify_batch, batches,
+                      batch_size, 3))
+
+    texts, labels = load_data(data_path)
+    name = f"train.fit[{min(train_size, len(texts))}]"
+    if name_filter and name_filter not in name:
+        return cases
+    rng = random.Random(SEED)
+    sample = rng.sample(range(len(texts)), min(train_size, len(texts)))
+    train_texts = [preprocess_for_ml(texts[i]) for i in sample]
+    train_labels = [labels[i] for i in sample]
+    cases.append((
+        name,
+        lambda data: build_pipeline().fit(*data),
+        [(train_texts, train_labels)],
+        len(sample), 1
+    ))
+    return cases
+
+
+def run_suite(model_path: str = "pii_intent_lr.joblib", data_path: str = "train.txt",
+              name_filter: str = None, quick: bool = False, train_size: int = 5000) -> dict:
+    """Run every (matching) case and return the JSON-serializable report"""
+    texts, _ = load_data(data_path)
+    workloads = build_workloads(texts)
+    classifier = PIIClassifier(model_path)
+    min_time = 0.1 if quick else 0.5
+
+    print("=" * 80)
+    print("BENCHMARK SUITE")
+    print("=" * 80)
+    print(f"\n{'Case':<40} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 80)
+
+    results = {}
+    for name, fn, items, items_per_op, min_ops in define_cases(
+        classifier, workloads, train_size, data_path, name_filter
+    ):
+        if name_filter and name_filter not in name:
+            continue
+        if name.startswith("train.") and quick:
+            min_ops = 1
+        latencies = time_case(fn, items, min_time, min_ops)
+        results[name] = summarize(latencies, items_per_op)
+        r = results[name]
+        print(f"{name:<40} {r['ops_per_sec']:>10.1f} {r['p50_ms']:>9.3f} "
+              f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+
+    import sklearn
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'model': model_path,
+            'model_sha256': _file_digest(model_path),
+            'data_sha256': _file_digest(data_path),
+            'seed': SEED,
+            'quick': quick,
+            'workloads': {size: len(prompts) for size, prompts in workloads.items()},
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Print current vs baseline median latency per case.
+
+    Returns:
+        False if any case's p50 grew by more than threshold percent
+    """
+    print("\n" + "=" * 80)
+    print(f"COMPARISON WITH BASELINE ({baseline['meta'].get('timestamp', '?')}, "
+          f"threshold {threshold:.0f}%)")
+    print("=" * 80)
+    for key in ('model_sha256', 'data_sha256', 'python', 'sklearn'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"⚠ {key} differs: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+
+    print(f"\n{'Case':<40} {'base p50':>10} {'now p50':>10} {'change':>9}")
+    print("-" * 80)
+
+    ok = True
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>10} {result['p50_ms']:>10.3f} {'new':>9}")
+            continue
+        change = (result['p50_ms'] / base['p50_ms'] - 1) * 100 if base['p50_ms'] else 0.0
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(f"{name:<40} {base['p50_ms']:>10.3f} {result['p50_ms']:>10.3f} "
+              f"{change:>+8.1f}%{'  ✗ REGRESSION' if regressed else ''}")
+
+    print(f"\n{'✓ No regressions' if ok else '✗ Regressions found'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the inference and training hot paths",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="Where to write the results")
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("--data", default="train.txt", help="Prompts used to build workloads")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs (less stable)")
+    parser.add_argument("--train-size", type=int, default=5000, help="Samples for train.fit")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed p50 regression in percent for --compare")
+    args = parser.parse_args()
+
+    report = run_suite(args.model, args.data, args.filter, args.quick, args.train_size)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
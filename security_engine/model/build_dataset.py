@@ -1,6 +1,47 @@
+"""
+Build train.txt from the PII-NER dataset
+
+Rows are read lazily, either from the HuggingFace hub or, on machines
+without network access, from a local copy:
+
+    --source dump.jsonl       JSONL dump with "user" and "assistant" fields
+                              (.jsonl.gz also works)
+    --source DIR              directory of *.jsonl files (read in name
+                              order), a dataset saved with save_to_disk, or
+                              any local directory load_dataset can stream
+
+Chunks of rows are processed in a pool of worker processes, with only a
+few chunks in flight at a time, and their results are collected in input
+order. Every assistant row is parsed once. Examples are written as they
+arrive to one temporary file per label and concatenated at the end. The
+output therefore matches the previous in-memory build (DISCLOSURE lines
+first, in row order) byte for byte, memory stays fixed whatever the
+dataset size, and the result does not depend on --workers or
+--chunk-size (the build involves no randomness).
+
+--shards N splits the rows over N files (row index modulo N), named
+train-00000-of-0000N.txt and so on.
+
+--dedup then removes exact and near-duplicate examples from each output
+file with dedup_dataset.py (which holds one file's examples in memory).
+
+Usage:
+    python build_dataset.py                                 # download from the hub
+    python build_dataset.py --source pii_ner.jsonl --workers 8
+    python build_dataset.py --source pii_ner/ --shards 4
+    python build_dataset.py --source pii_ner.jsonl --dedup
+"""
+
+import argparse
+import gzip
 import json
+import os
 import re
-from datasets import load_dataset
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 DATASET_NAME = "Josephgflowers/PII-NER"
 OUTPUT_FILE = "train.txt"
@@ -20,6 +61,23 @@ def extract_pii_entities(assistant_json: str) -> dict:
         return {}
 
 
+def parse_pii(assistant_json: str) -> tuple:
+    """
+    Parse an assistant row once.
+    
+    Returns:
+        (extract_pii_entities(assistant_json), has_pii(assistant_json))
+    """
+    try:
+        data = json.loads(assistant_json)
+    except Exception:
+        return {}, False
+    try:
+        return data, any(isinstance(v, list) and len(v) > 0 for v in data.values())
+    except Exception:
+        return data, False
+
+
 def is_example_context(text: str) -> bool:
     text_lower = text.lower()
     markers = [
@@ -99,49 +157,179 @@ def create_non_disclosure_examples(text: str, pii_data: dict) -> list:
     return examples
 
 
-def build_balanced_dataset():
+def process_row(idx: int, text: str, assistant: str) -> tuple:
+    """
+    Training examples generated from one dataset row.
     
-    print("Loading dataset...")
-    ds = load_dataset(DATASET_NAME)
+    Returns:
+        (disclosure texts, non-disclosure texts)
+    """
+    pii_data, has_any_pii = parse_pii(assistant)
+    if not has_any_pii or is_example_context(text):
+        return [], [text]
     
-    disclosure_examples = []
     non_disclosure_examples = []
+    if idx % 3 == 0:
+        non_disclosure_examples.append(text)
     
-    for idx, row in enumerate(ds["train"]):
-        text = row["user"]
-        assistant = row["assistant"]
-        pii_data = extract_pii_entities(assistant)
-        has_any_pii = has_pii(assistant)
-        if not has_any_pii:
-            non_disclosure_examples.append(text)
-        
-        elif is_example_context(text):
-            non_disclosure_examples.append(text)
+    disclosure_examples = [disclosure_text for disclosure_text, _ in create_synthetic_disclosure(text, pii_data)]
+    non_disclosure_examples.extend(create_non_disclosure_examples(text, pii_data))
+    return disclosure_examples, non_disclosure_examples
+
+
+def process_chunk(start: int, rows: list) -> list:
+    """process_row for rows numbered from start"""
+    return [process_row(start + i, text, assistant) for i, (text, assistant) in enumerate(rows)]
+
+
+def _read_jsonl(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_rows(source: str = None):
+    """
+    Yield (user, assistant) pairs of the training split, lazily.
+    
+    source is a JSONL file, a directory (see the module docstring) or
+    None for the HuggingFace hub.
+    """
+    if source is not None and os.path.isfile(source):
+        records = _read_jsonl(source)
+    elif source is not None and any(name.endswith((".jsonl", ".jsonl.gz")) for name in os.listdir(source)):
+        names = sorted(name for name in os.listdir(source) if name.endswith((".jsonl", ".jsonl.gz")))
+        records = (record for name in names for record in _read_jsonl(os.path.join(source, name)))
+    else:
+        import datasets
         
+        if source is None:
+            records = datasets.load_dataset(DATASET_NAME, split="train", streaming=True)
+        elif os.path.exists(os.path.join(source, "dataset_dict.json")):
+            records = datasets.load_from_disk(source)["train"]
+        elif os.path.exists(os.path.join(source, "state.json")):
+            records = datasets.load_from_disk(source)
         else:
-            if idx % 3 == 0:  
-                non_disclosure_examples.append(text)
+            records = datasets.load_dataset(source, split="train", streaming=True)
     
-            disclosures = create_synthetic_disclosure(text, pii_data)
-            for disclosure_text, _ in disclosures:
-                disclosure_examples.append(disclosure_text)
-            
-            non_disc = create_non_disclosure_examples(text, pii_data)
-            non_disclosure_examples.extend(non_disc)
+    for record in records:
+        yield record["user"], record["assistant"]
+
+
+def _chunks(rows, chunk_size: int):
+    """(start index, list of rows) of consecutive chunks"""
+    start = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def _ordered_results(chunks, workers: int):
+    """
+    process_chunk results in input order, with at most 2 * workers chunks
+    submitted but not yet consumed.
+    """
+    if workers <= 1:
+        for start, rows in chunks:
+            yield start, process_chunk(start, rows)
+        return
     
-    print(f"\nWriting dataset...")
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for start, rows in chunks:
+            pending.append((start, pool.submit(process_chunk, start, rows)))
+            if len(pending) >= 2 * workers:
+                first, future = pending.popleft()
+                yield first, future.result()
+        while pending:
+            first, future = pending.popleft()
+            yield first, future.result()
+
+
+def shard_paths(output: str, shards: int) -> list:
+    """Output file of each shard (just output when shards == 1)"""
+    if shards == 1:
+        return [output]
+    root, ext = os.path.splitext(output)
+    return [f"{root}-{i:05d}-of-{shards:05d}{ext}" for i in range(shards)]
+
+
+def build_balanced_dataset(source: str = None, output: str = OUTPUT_FILE, workers: int = None,
+                           chunk_size: int = 1000, shards: int = 1, dedup: bool = False) -> dict:
+    """
+    Build train.txt (or its shards) from the dataset rows.
+    
+    Returns:
+        Dict with the number of DISCLOSURE and NON_DISCLOSURE lines written
+    """
+    workers = workers or os.cpu_count() or 1
+    paths = shard_paths(output, shards)
+    workdir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output)))
+    counts = {'disclosure': 0, 'non_disclosure': 0}
     
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as fout:
-        for text in disclosure_examples:
-            fout.write(f"__label__DISCLOSURE {text}\n")
+    print(f"Reading {source or DATASET_NAME} with {workers} workers...")
+    try:
+        parts = [
+            (open(os.path.join(workdir, f"{i}.disclosure"), "w", encoding="utf-8"),
+             open(os.path.join(workdir, f"{i}.non_disclosure"), "w", encoding="utf-8"))
+            for i in range(shards)
+        ]
+        try:
+            for start, results in _ordered_results(_chunks(iter_rows(source), chunk_size), workers):
+                for i, (disclosures, non_disclosures) in enumerate(results):
+                    disclosure_file, non_disclosure_file = parts[(start + i) % shards]
+                    for text in disclosures:
+                        disclosure_file.write(f"__label__DISCLOSURE {text}\n")
+                    for text in non_disclosures:
+                        non_disclosure_file.write(f"__label__NON_DISCLOSURE {text}\n")
+                    counts['disclosure'] += len(disclosures)
+                    counts['non_disclosure'] += len(non_disclosures)
+        finally:
+            for part in parts:
+                for f in part:
+                    f.close()
         
-        for text in non_disclosure_examples:
-            fout.write(f"__label__NON_DISCLOSURE {text}\n")
+        print(f"\nWriting dataset...")
+        for i, path in enumerate(paths):
+            with open(path + ".tmp", "wb") as fout:
+                for label in ("disclosure", "non_disclosure"):
+                    with open(os.path.join(workdir, f"{i}.{label}"), "rb") as fin:
+                        shutil.copyfileobj(fin, fout)
+            os.replace(path + ".tmp", path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    total = counts['disclosure'] + counts['non_disclosure']
+    print(f"\nDataset written to {', '.join(paths)}")
+    print(f"Total examples: {total}")
+    if total:
+        print(f"Balance: {counts['disclosure']/total*100:.1f}% DISCLOSURE")
     
-    print(f"\nDataset written to {OUTPUT_FILE}")
-    print(f"Total examples: {len(disclosure_examples) + len(non_disclosure_examples)}")
-    print(f"Balance: {len(disclosure_examples)/(len(disclosure_examples)+len(non_disclosure_examples))*100:.1f}% DISCLOSURE")
+    if dedup:
+        from dedup_dataset import dedup_file, print_counts
+        
+        for path in paths:
+            print(f"\nDeduplicating {path}...")
+            print_counts(dedup_file(path, path)[0])
+    return counts
 
 
 if __name__ == "__main__":
-    build_balanced_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Local JSONL dump or dataset directory (default: the hub)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="File to write")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per worker task")
+    parser.add_argument("--shards", type=int, default=1, help="Split the output over this many files")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Remove exact and near-duplicate examples (dedup_dataset.py)")
+    args = parser.parse_args()
+    
+    build_balanced_dataset(args.source, args.output, args.workers, args.chunk_size, args.shards,
+                           args.dedup)
\ No newline at end of file
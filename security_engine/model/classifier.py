@@ -2,9 +2,72 @@
 Improved PII disclosure classifier with smarter decision logic
 """
 
-import joblib
-from regex_rules import has_pii_pattern, has_example_marker, is_real_pii
-from preprocess import preprocess_for_ml
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from instrumentation import Instrumentation, staged_predict_proba
+from result_cache import ResultCache
+from regex_rules import get_regex_signals, get_regex_signals_batch, redact_text
+from preprocess import get_context_flags, model_inputs, takes_raw_prompts
+from thresholds import DEFAULT_BLOCK_THRESHOLD, DEFAULT_WARN_THRESHOLD, load_thresholds, sidecar_path
+
+
+# Cascade mode: a prompt without any of these characters cannot match a
+# PII pattern, and one without these flags shows no disclosure intent
+_PII_CHARS = re.compile(r'[\d@]')
+ESCALATE_FLAGS = {"CTX_DISCLOSURE", "CTX_CONTACT"}
+
+# Scored by every newly loaded model before it is switched in
+WARMUP_PROMPTS = [
+    "my email is john.doe@gmail.com",
+    "call me at 9876543210",
+    "what is the capital of France?",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLoadError(Exception):
+    """A model artifact could not be loaded or failed its warm-up check"""
+
+
+class LoadedModel:
+    """
+    An immutable (pipeline, path, version, thresholds) snapshot.
+    
+    PIIClassifier swaps whole snapshots, so a call that has taken one
+    keeps a consistent model, version and thresholds until it finishes.
+    raw_prompts is True for fused-feature pipelines, which are given the
+    prompts themselves instead of the preprocessed text. block_threshold
+    and warn_threshold come from the model's sidecar file (see
+    thresholds.py) and are used when a call does not pass its own.
+    """
+    
+    __slots__ = ('pipeline', 'path', 'version', 'raw_prompts', 'block_threshold', 'warn_threshold')
+    
+    def __init__(self, pipeline, path, version,
+                 block_threshold=DEFAULT_BLOCK_THRESHOLD, warn_threshold=DEFAULT_WARN_THRESHOLD):
+        self.pipeline = pipeline
+        self.path = path
+        self.version = version
+        self.raw_prompts = takes_raw_prompts(pipeline)
+        self.block_threshold = block_threshold
+        self.warn_threshold = warn_threshold
+    
+    def thresholds(self, block_threshold, warn_threshold):
+        """The given thresholds, with None replaced by the model's own"""
+        return (
+            self.block_threshold if block_threshold is None else block_threshold,
+            self.warn_threshold if warn_threshold is None else warn_threshold,
+        )
 
 
 class PIIClassifier:
@@ -17,21 +80,192 @@ class PIIClassifier:
     3. Context analysis (example vs real)
     """
     
-    def __init__(self, model_path="pii_intent_lr.joblib"):
-        """Load the trained model"""
+    def __init__(
+        self,
+        model_path="pii_intent_lr.joblib",
+        cascade=False,
+        cache_size=0,
+        cache_ttl=None,
+        instrument=False
+    ):
+        """
+        Load the trained model.
+        
+        Args:
+            model_path: Path to the trained pipeline
+            cascade: If True, settle clear ALLOW cases from cheap signals
+                and only run the ML model on ambiguous prompts
+            cache_size: Number of results to keep in an LRU cache for
+                repeated prompts (0 disables caching)
+            cache_ttl: Optional lifetime of cached results in seconds
+            instrument: If True, time every stage (see enable_instrumentation)
+        """
+        self.cascade = cascade
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size else None
+        self.instrumentation = Instrumentation() if instrument else None
+        self._reload_lock = threading.Lock()
+        self._reload_executor = None
+        self._watcher = None
+        self._parallel = None
+        self._parallel_lock = threading.Lock()
+        self._async = None
+        self._async_options = {}
         try:
-            self.pipeline = joblib.load(model_path)
+            self._model = load_verified_model(model_path)
         except FileNotFoundError:
             raise FileNotFoundError(
                 f"Model not found at {model_path}. "
                 "Please run train_model.py first to train the model."
             )
     
+    @property
+    def pipeline(self):
+        return self._model.pipeline
+    
+    @property
+    def model_path(self):
+        return self._model.path
+    
+    @property
+    def model_version(self):
+        return self._model.version
+    
+    @property
+    def thresholds(self):
+        """(block_threshold, warn_threshold) used when a call passes none"""
+        return self._model.block_threshold, self._model.warn_threshold
+    
+    def snapshot(self) -> LoadedModel:
+        """
+        The current model, to pass as classify_batch(model=...) so that
+        several calls score with the same model even if it is reloaded
+        in between.
+        """
+        return self._model
+    
+    def reload_model(self, model_path=None, background=False):
+        """
+        Load a new model and switch to it without interrupting traffic.
+        
+        The new artifact is loaded and warmed up first; only if that
+        succeeds is it swapped in, in one assignment. Calls already running
+        finish on the model they started with. A missing, corrupt or
+        half-written artifact raises ModelLoadError and the current model
+        stays in service.
+        
+        Args:
+            model_path: Path to the trained pipeline or an exported .npz/.mmap
+                artifact (default: current path)
+            background: If True, load on a background thread and return a
+                concurrent.futures.Future of the new model version
+        
+        Returns:
+            The model version in service after the reload
+        """
+        if background:
+            if self._reload_executor is None:
+                self._reload_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="model-reload"
+                )
+            return self._reload_executor.submit(self.reload_model, model_path)
+        
+        # Serialize reloads so a slow load cannot overwrite a newer one
+        with self._reload_lock:
+            model_path = model_path or self.model_path
+            try:
+                model = load_verified_model(model_path)
+            except ModelLoadError:
+                raise
+            except Exception as e:
+                raise ModelLoadError(f"Cannot load {model_path}: {type(e).__name__}: {e}") from e
+            
+            current = self._model
+            if (model.version, model_path) == (current.version, current.path) and (
+                (model.block_threshold, model.warn_threshold)
+                == (current.block_threshold, current.warn_threshold)
+            ):
+                return model.version
+            
+            self._model = model
+            if self.cache is not None:
+                self.cache.clear()
+            logger.info("Switched to model %s (%s)", model.version, model_path)
+            return model.version
+    
+    def watch_model(self, interval=5.0):
+        """
+        Reload the model automatically when its file changes.
+        
+        The file is polled every interval seconds and reloaded once it has
+        stopped changing for one interval, so a file still being written is
+        not picked up. Failed reloads are logged and the current model
+        stays in service.
+        
+        Returns:
+            The ModelWatcher (call stop_watching() to stop it)
+        """
+        self.stop_watching()
+        self._watcher = ModelWatcher(self, interval)
+        self._watcher.start()
+        return self._watcher
+    
+    def stop_watching(self):
+        """Stop the file watcher started by watch_model(), if any"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def enable_instrumentation(self, hooks=None, window=4096) -> Instrumentation:
+        """
+        Start timing each classification stage.
+        
+        Stages: cache, preprocess, regex, cascade, char_tfidf, word_tfidf,
+        lr, decision and total. Stage timings go into per-stage histograms
+        and are passed to each hook(stage, seconds, mode), where mode is
+        "single" or "batch".
+        
+        Returns:
+            The Instrumentation collecting the histograms
+        """
+        self.instrumentation = Instrumentation(window, hooks)
+        return self.instrumentation
+    
+    def disable_instrumentation(self):
+        """Stop timing stages (the untimed path costs one attribute check)"""
+        self.instrumentation = None
+    
+    def latency_stats(self) -> dict:
+        """Per-stage latency histograms, or None if instrumentation is off"""
+        return self.instrumentation.stats() if self.instrumentation is not None else None
+    
+    def prometheus_metrics(self, prefix="pii_classifier") -> str:
+        """Per-stage latencies in the Prometheus text format ("" if off)"""
+        if self.instrumentation is None:
+            return ""
+        return self.instrumentation.prometheus_text(prefix)
+    
+    def cache_stats(self) -> dict:
+        """Return result cache statistics, or None if caching is disabled"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def _cache_key(self, prompt, block_threshold, warn_threshold, require_pii_pattern, model):
+        """
+        Build the cache key for a prompt and its decision settings.
+        
+        The prompt is keyed by its (per-process, keyed SipHash) hash and
+        length rather than its text, so cached entries stay small.
+        """
+        return (
+            hash(prompt), len(prompt),
+            block_threshold, warn_threshold, require_pii_pattern,
+            self.cascade, model.version
+        )
+    
     def classify_prompt(
         self,
         prompt: str,
-        block_threshold: float = 0.85,
-        warn_threshold: float = 0.50,
+        block_threshold: float = None,
+        warn_threshold: float = None,
         require_pii_pattern: bool = True
     ) -> tuple:
         """
@@ -39,43 +273,117 @@ class PIIClassifier:
         
         Args:
             prompt: User input text
-            block_threshold: Probability threshold for BLOCK decision (default 0.85)
-            warn_threshold: Probability threshold for WARN decision (default 0.50)
+            block_threshold: Probability threshold for BLOCK decision
+                (default: the model's, see thresholds.py; 0.85 without a sidecar)
+            warn_threshold: Probability threshold for WARN decision
+                (default: the model's; 0.50 without a sidecar)
             require_pii_pattern: If True, only BLOCK if both ML model AND regex detect PII
         
         Returns:
             Tuple of (decision, confidence, details)
             - decision: "BLOCK", "WARN", or "ALLOW"
-            - confidence: probability score from model (0-1)
+            - confidence: probability score from model (0-1), or 0.0 when
+              the cascade settled the prompt without the model
             - details: dict with additional information
         """
-        # Preprocess
-        processed = preprocess_for_ml(prompt)
+        if self.instrumentation is not None:
+            [result] = self._classify_instrumented(
+                [prompt], "single", block_threshold, warn_threshold, require_pii_pattern
+            )
+            return result
         
-        # Get ML model prediction
-        proba = self.pipeline.predict_proba([processed])[0][1]
+        # Use one model snapshot for the whole call, even if a reload happens
+        model = self._model
+        block_threshold, warn_threshold = model.thresholds(block_threshold, warn_threshold)
+        if self.cache is None:
+            return self._classify(
+                prompt, block_threshold, warn_threshold, require_pii_pattern, model
+            )
+        
+        key = self._cache_key(prompt, block_threshold, warn_threshold, require_pii_pattern, model)
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._classify(
+                prompt, block_threshold, warn_threshold, require_pii_pattern, model
+            )
+            self.cache.put(key, cached)
+        
+        # Hand out a copy so callers cannot modify the cached details
+        decision, confidence, details = cached
+        return decision, confidence, dict(details)
+    
+    def _classify(self, prompt, block_threshold, warn_threshold, require_pii_pattern, model):
+        """Classify one prompt without consulting the cache"""
+        # Preprocess
+        flags = get_context_flags(prompt)
+        processed = " ".join(flags + [prompt])
         
         # Check for PII patterns
-        has_pii = has_pii_pattern(prompt)
-        has_example = has_example_marker(prompt)
-        is_real = is_real_pii(prompt)
+        signals = get_regex_signals(prompt)
         
-        # Decision logic
-        decision = self._make_decision(
-            proba, has_pii, has_example, is_real,
+        tier = self._cascade_tier(prompt, flags, signals) if self.cascade else None
+        if tier is not None:
+            return self._build_result(
+                processed, None, signals, tier, model.version,
+                block_threshold, warn_threshold, require_pii_pattern
+            )
+        
+        # Get ML model prediction
+        proba = model.pipeline.predict_proba([prompt if model.raw_prompts else processed])[0][1]
+        
+        return self._build_result(
+            processed, proba, signals, "model", model.version,
             block_threshold, warn_threshold, require_pii_pattern
         )
+    
+    def _cascade_tier(self, prompt, flags, signals):
+        """
+        Return the cheap tier that settles the prompt as ALLOW, or None.
+        
+        Tiers:
+        - "example": example/dummy markers are always allowed (Rule 1)
+        - "cheap": no digit or '@' (so no PII pattern) and no
+          disclosure or contact-request flags
+        
+        Anything else is ambiguous and goes to the ML model.
+        """
+        _, has_example, _ = signals
+        if has_example:
+            return "example"
+        if not _PII_CHARS.search(prompt) and not ESCALATE_FLAGS.intersection(flags):
+            return "cheap"
+        return None
+    
+    def _build_result(
+        self, processed, proba, signals, tier, version,
+        block_threshold, warn_threshold, require_pii_pattern
+    ):
+        """Turn model and regex signals into (decision, confidence, details)"""
+        has_pii, has_example, is_real = signals
+        
+        # Decision logic
+        if proba is None:
+            # Settled by a cascade tier without running the model
+            decision, confidence = "ALLOW", 0.0
+        else:
+            decision = self._make_decision(
+                proba, has_pii, has_example, is_real,
+                block_threshold, warn_threshold, require_pii_pattern
+            )
+            confidence = proba
         
         # Prepare details
         details = {
-            'ml_confidence': float(proba),
+            'ml_confidence': None if proba is None else float(proba),
             'has_pii_pattern': has_pii,
             'has_example_marker': has_example,
             'is_likely_real_pii': is_real,
+            'decision_tier': tier,
+            'model_version': version,
             'processed_text': processed[:100] + '...' if len(processed) > 100 else processed
         }
         
-        return decision, proba, details
+        return decision, confidence, details
     
     def _make_decision(
         self, proba, has_pii, has_example, is_real,
@@ -118,9 +426,311 @@ class PIIClassifier:
         # Rule 5: Low confidence → ALLOW
         return "ALLOW"
     
-    def classify_batch(self, prompts: list, **kwargs) -> list:
-        """Classify multiple prompts"""
-        return [self.classify_prompt(p, **kwargs) for p in prompts]
+    def classify_batch(
+        self,
+        prompts: list,
+        block_threshold: float = None,
+        warn_threshold: float = None,
+        require_pii_pattern: bool = True,
+        signals: list = None,
+        model: LoadedModel = None,
+        use_cache: bool = True
+    ) -> list:
+        """
+        Classify multiple prompts in one vectorized pass.
+        
+        All prompts are preprocessed up front, vectorized into a single
+        sparse matrix and scored with one predict_proba call, so the
+        per-call overhead of the pipeline is paid once per batch.
+        
+        Args:
+            prompts: List of user input texts
+            block_threshold, warn_threshold, require_pii_pattern:
+                Same as classify_prompt (thresholds default to model's)
+            signals: Optional regex signals per prompt
+                (regex_rules.scan_text(prompt).signals), for callers that
+                have already scanned the prompts
+            model: Model to score with, from snapshot() (default: the
+                current one)
+            use_cache: If False, skip the result cache (if any)
+        
+        Returns:
+            List of (decision, confidence, details) tuples, identical to
+            calling classify_prompt on each prompt
+        """
+        prompts = list(prompts)
+        if signals is not None:
+            signals = list(signals)
+            if len(signals) != len(prompts):
+                raise ValueError(f"got {len(signals)} signals for {len(prompts)} prompts")
+        if model is None:
+            model = self._model
+        if self.instrumentation is not None:
+            return self._classify_instrumented(
+                prompts, "batch", block_threshold, warn_threshold, require_pii_pattern,
+                model, signals, use_cache
+            )
+        
+        block_threshold, warn_threshold = model.thresholds(block_threshold, warn_threshold)
+        if self.cache is None or not use_cache:
+            return self._classify_batch(
+                prompts, block_threshold, warn_threshold, require_pii_pattern, model,
+                signals=signals
+            )
+        
+        keys = [
+            self._cache_key(p, block_threshold, warn_threshold, require_pii_pattern, model)
+            for p in prompts
+        ]
+        results = [self.cache.get(key) for key in keys]
+        
+        # Only cache misses go through the vectorized path
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            fresh = self._classify_batch(
+                [prompts[i] for i in missing],
+                block_threshold, warn_threshold, require_pii_pattern, model,
+                signals=None if signals is None else [signals[i] for i in missing]
+            )
+            for i, result in zip(missing, fresh):
+                self.cache.put(keys[i], result)
+                results[i] = result
+        
+        return [(decision, confidence, dict(details)) for decision, confidence, details in results]
+    
+    def _classify_instrumented(
+        self, prompts, mode, block_threshold, warn_threshold, require_pii_pattern,
+        model=None, signals=None, use_cache=True
+    ):
+        """classify_prompt/classify_batch with every stage timed"""
+        instrumentation = self.instrumentation
+        clock = time.perf_counter
+        
+        def observe(stage, seconds):
+            instrumentation.observe(stage, seconds, mode)
+        
+        start = clock()
+        if model is None:
+            model = self._model
+        block_threshold, warn_threshold = model.thresholds(block_threshold, warn_threshold)
+        if self.cache is None or not use_cache:
+            results = self._classify_batch(
+                prompts, block_threshold, warn_threshold, require_pii_pattern, model, observe,
+                signals
+            )
+        else:
+            keys = [
+                self._cache_key(p, block_threshold, warn_threshold, require_pii_pattern, model)
+                for p in prompts
+            ]
+            results = [self.cache.get(key) for key in keys]
+            observe("cache", clock() - start)
+            
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                fresh = self._classify_batch(
+                    [prompts[i] for i in missing],
+                    block_threshold, warn_threshold, require_pii_pattern, model, observe,
+                    None if signals is None else [signals[i] for i in missing]
+                )
+                for i, result in zip(missing, fresh):
+                    self.cache.put(keys[i], result)
+                    results[i] = result
+            results = [(d, c, dict(details)) for d, c, details in results]
+        
+        observe("total", clock() - start)
+        return results
+    
+    def _classify_batch(
+        self, prompts, block_threshold, warn_threshold, require_pii_pattern, model,
+        observe=None, signals=None
+    ):
+        """
+        Classify a batch of prompts without consulting the cache.
+        
+        With an observe(stage, seconds) callback each stage is timed.
+        Regex signals already computed by the caller can be passed in.
+        """
+        if not prompts:
+            return []
+        clock = time.perf_counter
+        if observe is None:
+            observe = _ignore_stage
+        
+        mark = clock()
+        flags = [get_context_flags(p) for p in prompts]
+        processed = [" ".join(f + [p]) for f, p in zip(flags, prompts)]
+        observe("preprocess", clock() - mark)
+        
+        if signals is None:
+            mark = clock()
+            signals = get_regex_signals_batch(prompts)
+            observe("regex", clock() - mark)
+        
+        if self.cascade:
+            mark = clock()
+            tiers = [
+                self._cascade_tier(p, f, s)
+                for p, f, s in zip(prompts, flags, signals)
+            ]
+            observe("cascade", clock() - mark)
+        else:
+            tiers = [None] * len(prompts)
+        
+        # Only prompts not settled by the cascade reach the model
+        probas = [None] * len(prompts)
+        pending = [i for i, tier in enumerate(tiers) if tier is None]
+        if pending:
+            inputs = prompts if model.raw_prompts else processed
+            texts = [inputs[i] for i in pending]
+            if observe is _ignore_stage:
+                scores = model.pipeline.predict_proba(texts)[:, 1]
+            else:
+                scores = staged_predict_proba(model.pipeline, texts, observe, clock)
+            for i, score in zip(pending, scores):
+                probas[i] = score
+                tiers[i] = "model"
+        
+        mark = clock()
+        results = [
+            self._build_result(
+                text, proba, sig, tier, model.version,
+                block_threshold, warn_threshold, require_pii_pattern
+            )
+            for text, proba, sig, tier in zip(processed, probas, signals, tiers)
+        ]
+        observe("decision", clock() - mark)
+        return results
+    
+    def redact_prompt(
+        self,
+        prompt: str,
+        placeholder: str = "[{type}]",
+        block_threshold: float = None,
+        warn_threshold: float = None,
+        require_pii_pattern: bool = True
+    ) -> tuple:
+        """
+        Classify a prompt and mask its PII instead of blocking it.
+        
+        Returns:
+            (decision, confidence, details) as from classify_prompt, except
+            that a BLOCK whose PII values were all masked becomes "REDACT".
+            details also holds:
+            - redacted_prompt: prompt with typed placeholders ([EMAIL], ...)
+            - span_map: spans to restore it (see regex_rules.Redaction)
+        """
+        [result] = self.redact_batch(
+            [prompt], placeholder, block_threshold, warn_threshold, require_pii_pattern
+        )
+        return result
+    
+    def redact_batch(
+        self,
+        prompts: list,
+        placeholder: str = "[{type}]",
+        block_threshold: float = None,
+        warn_threshold: float = None,
+        require_pii_pattern: bool = True
+    ) -> list:
+        """redact_prompt for many prompts, with one vectorized model call"""
+        prompts = list(prompts)
+        results = self.classify_batch(
+            prompts, block_threshold, warn_threshold, require_pii_pattern
+        )
+        
+        redacted = []
+        for prompt, (decision, confidence, details) in zip(prompts, results):
+            redaction = redact_text(prompt, placeholder)
+            if decision == "BLOCK" and redaction.redacted:
+                decision = "REDACT"
+            details['redacted_prompt'] = redaction.text
+            details['span_map'] = redaction.spans
+            redacted.append((decision, confidence, details))
+        return redacted
+    
+    def classify_many(self, prompts: list, workers=None, executor="auto", **kwargs) -> list:
+        """
+        classify_batch spread over a pool of threads or processes.
+        
+        executor is "thread", "process", "serial" or "auto" (whichever
+        scaled best when measured on this machine). See parallel.classify_many
+        for the other arguments; the results equal classify_batch(prompts).
+        """
+        from parallel import classify_many
+        return classify_many(self, prompts, workers, executor, **kwargs)
+    
+    def parallel_executors(self):
+        """The parallel.ParallelExecutors behind classify_many, created on first use"""
+        if self._parallel is None:
+            from parallel import ParallelExecutors
+            with self._parallel_lock:
+                if self._parallel is None:
+                    self._parallel = ParallelExecutors(self)
+        return self._parallel
+    
+    def shutdown_pools(self, wait=True):
+        """Stop the worker pools started by classify_many(), if any"""
+        if self._parallel is not None:
+            self._parallel.shutdown(wait)
+    
+    def configure_async(self, **options):
+        """
+        Set the options (workers, window, max_batch, max_pending, timeout,
+        fallback) of the AsyncClassifier behind aclassify/aclassify_batch.
+        
+        Takes effect when it is next created: on the first call, or the
+        first after aclose().
+        """
+        from async_classifier import FALLBACK_DECISIONS
+        if options.get('fallback') not in (None,) + FALLBACK_DECISIONS:
+            raise ValueError(f"fallback must be one of {FALLBACK_DECISIONS}")
+        self._async_options = options
+    
+    def _async_classifier(self):
+        """The AsyncClassifier for the running event loop, created on first use"""
+        from async_classifier import AsyncClassifier
+        current = self._async
+        if current is None or current.closed or current.loop not in (None, asyncio.get_running_loop()):
+            if current is not None and not current.closed:
+                # Left behind by an event loop that is no longer used
+                current.shutdown()
+            self._async = current = AsyncClassifier(self, **self._async_options)
+        return current
+    
+    async def aclassify(self, prompt: str, **kwargs) -> tuple:
+        """
+        classify_prompt without blocking the event loop.
+        
+        Concurrent calls share batches; timeout and fallback keyword
+        arguments bound the wait. See async_classifier.py.
+        """
+        return await self._async_classifier().classify(prompt, **kwargs)
+    
+    async def aclassify_batch(self, prompts: list, **kwargs) -> list:
+        """classify_batch without blocking the event loop (see aclassify)"""
+        return await self._async_classifier().classify_batch(prompts, **kwargs)
+    
+    async def aclose(self):
+        """Finish pending aclassify calls and stop their worker threads"""
+        if self._async is not None:
+            current, self._async = self._async, None
+            await current.close()
+    
+    def classify_stream(self, source, window=8192, overlap=512, stop_on_block=True, **kwargs):
+        """
+        Classify a very large text read from a string, file or iterator
+        in overlapping windows, with per-span findings.
+        
+        See streaming.classify_stream for arguments and the result format.
+        """
+        from streaming import classify_stream
+        return classify_stream(self, source, window, overlap, stop_on_block, **kwargs)
+    
+    def scan_stream(self, source, window=8192, overlap=512, **kwargs):
+        """Yield per-window findings; see streaming.scan_stream"""
+        from streaming import scan_stream
+        return scan_stream(self, source, window, overlap, **kwargs)
     
     def explain_decision(self, prompt: str) -> str:
         """
@@ -136,6 +746,7 @@ class PIIClassifier:
             f"  - Contains PII pattern: {details['has_pii_pattern']}",
             f"  - Has example marker: {details['has_example_marker']}",
             f"  - Likely real PII: {details['is_likely_real_pii']}",
+            f"  - Decision tier: {details['decision_tier']}",
             f"",
             "Reasoning:"
         ]
@@ -155,17 +766,166 @@ class PIIClassifier:
         return "\n".join(explanation)
 
 
+def _ignore_stage(stage, seconds):
+    """Stage observer used when instrumentation is off"""
+
+
+def load_model_file(model_path):
+    """
+    Load a model artifact by file type.
+    
+    - .npz: NumPy-only scorer from export_model.py (no scikit-learn import)
+    - .mmap: memory-mapped scorer from mmap_model.py, shared across processes
+    - anything else: joblib-pickled sklearn Pipeline from train_model.py
+    
+    All expose predict_proba(list_of_texts).
+    """
+    if str(model_path).endswith(".npz"):
+        from numpy_scorer import NumpyScorer
+        return NumpyScorer.load(model_path)
+    if str(model_path).endswith(".mmap"):
+        from mmap_model import MmapScorer
+        return MmapScorer.load(model_path)
+    
+    import joblib
+    return joblib.load(model_path)
+
+
+def load_verified_model(model_path) -> LoadedModel:
+    """
+    Load and warm up a model artifact, rejecting broken ones.
+    
+    The file is hashed before and after loading; if it changed in between
+    (still being written) the load is rejected. The model must then score
+    WARMUP_PROMPTS with finite probabilities. Its BLOCK/WARN thresholds are
+    read from the sidecar file next to it, if any (thresholds.py).
+    
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ModelLoadError: If the artifact is changing, unreadable or broken
+    """
+    version = _file_digest(model_path)
+    try:
+        pipeline = load_model_file(model_path)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise ModelLoadError(f"Cannot load {model_path}: {type(e).__name__}: {e}") from e
+    
+    if _file_digest(model_path) != version:
+        raise ModelLoadError(f"{model_path} changed while loading (still being written?)")
+    
+    try:
+        proba = np.asarray(pipeline.predict_proba(model_inputs(pipeline, WARMUP_PROMPTS)))
+    except Exception as e:
+        raise ModelLoadError(f"{model_path} failed warm-up: {type(e).__name__}: {e}") from e
+    if proba.shape != (len(WARMUP_PROMPTS), 2) or not np.all(np.isfinite(proba)):
+        raise ModelLoadError(f"{model_path} failed warm-up: invalid probabilities")
+    
+    try:
+        block_threshold, warn_threshold = load_thresholds(model_path)
+    except ValueError as e:
+        raise ModelLoadError(str(e)) from e
+    return LoadedModel(pipeline, model_path, version, block_threshold, warn_threshold)
+
+
+class ModelWatcher:
+    """
+    Background thread that reloads a PIIClassifier when its model file changes.
+    
+    A change is acted on only after the file's (inode, size, mtime), and
+    that of its thresholds sidecar, has stayed the same for one polling
+    interval. A failed reload is not retried
+    until the file changes again.
+    """
+    
+    def __init__(self, classifier: PIIClassifier, interval: float = 5.0):
+        self.classifier = classifier
+        self.interval = interval
+        self.reloads = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+    
+    def _signature(self):
+        model_path = self.classifier.model_path
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            return None
+        try:
+            sidecar = os.stat(sidecar_path(model_path))
+            sidecar = sidecar.st_ino, sidecar.st_size, sidecar.st_mtime_ns
+        except OSError:
+            sidecar = None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns, sidecar
+    
+    def _run(self):
+        current = self._signature()
+        candidate = None
+        while not self._stop.wait(self.interval):
+            signature = self._signature()
+            if signature is None or signature == current:
+                candidate = None
+                continue
+            if signature != candidate:
+                # Changed since the last poll; wait until it settles
+                candidate = signature
+                continue
+            
+            current, candidate = signature, None
+            try:
+                self.classifier.reload_model()
+                self.reloads += 1
+                self.last_error = None
+            except ModelLoadError as e:
+                self.last_error = str(e)
+                logger.warning("Model reload rejected, keeping %s: %s",
+                               self.classifier.model_version, e)
+
+
+def _file_digest(path) -> str:
+    """Return a short SHA-256 digest of a file, used as the model version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
 # Backward compatible functions
 _classifier = None
+_classifier_lock = threading.Lock()
 
 def _get_classifier():
-    """Lazy load classifier"""
+    """Lazy load classifier (once, however many threads ask at the same time)"""
     global _classifier
     if _classifier is None:
-        _classifier = PIIClassifier()
+        with _classifier_lock:
+            # Another thread may have loaded it while this one waited
+            if _classifier is None:
+                _classifier = PIIClassifier()
     return _classifier
 
 
+def reload_model(model_path=None) -> str:
+    """
+    Reload the model used by the module-level classify_prompt().
+    
+    Returns:
+        The model version in service
+    """
+    return _get_classifier().reload_model(model_path)
+
+
 def classify_prompt(prompt: str) -> tuple:
     """
     Legacy function for backward compatibility.
@@ -0,0 +1,274 @@
+"""
+Compress the trained pipeline by pruning near-zero weights
+
+Features whose LogisticRegression weight is negligible still cost an
+n-gram lookup and a multiply on every prompt. This drops them:
+
+    --min-weight W   keep features with |coef| >= W
+    --l1 C           keep features an L1-regularized LogisticRegression
+                     (inverse strength C) gives a non-zero weight
+
+and rebuilds both TfidfVectorizers with only the surviving n-grams (their
+IDF values unchanged). Pruning changes every prompt's L2 norm, so the
+classifier is refitted on the pruned features with the original settings
+(train_model.py split; --no-refit keeps the original weights instead).
+
+--quantize float16|int8 rounds the weights to that precision. The joblib
+pipeline keeps them as float64 (its decisions are those of the quantized
+model); --export also writes a NumPy artifact storing them at the reduced
+precision.
+
+The compressed model is accepted only if, compared with the original,
+PIIClassifier changes at most --max-flips (share of prompts) of its
+ALLOW/WARN/BLOCK decisions on train.txt and on the test_classifier.py
+suites. Both models are judged at the original model's BLOCK/WARN
+thresholds (its sidecar, see thresholds.py), and the output and --export
+artifacts get a sidecar with those same thresholds. Artifact size and
+per-prompt latency are reported before and after.
+
+Usage:
+    python compress_model.py --min-weight 0.01
+    python compress_model.py --l1 10 --quantize int8 --export pii_intent_lr.small.npz
+    python compress_model.py --min-weight 0.05 --max-flips 0.001 --output pii_intent_lr.joblib
+"""
+
+import argparse
+import copy
+import os
+import statistics
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from classifier import PIIClassifier
+from export_model import _terms_by_index, export_pipeline
+from numpy_scorer import NumpyScorer, quantize_coef
+from preprocess import model_inputs
+from thresholds import load_thresholds, sidecar_path, write_thresholds
+
+
+def _vectorizers(pipeline) -> list:
+    """(name, TfidfVectorizer) blocks of a train_model.build_pipeline() pipeline"""
+    features = pipeline.named_steps['features']
+    if not hasattr(features, 'transformer_list') or not all(
+        hasattr(vectorizer, 'vocabulary_') for _, vectorizer in features.transformer_list
+    ):
+        raise ValueError("only FeatureUnions of fitted TfidfVectorizers can be pruned")
+    return features.transformer_list
+
+
+def weight_mask(pipeline, min_weight: float) -> np.ndarray:
+    """Features whose weight magnitude is at least min_weight"""
+    return np.abs(pipeline.named_steps['classifier'].coef_[0]) >= min_weight
+
+
+def l1_mask(pipeline, inputs: list, labels: list, C: float) -> np.ndarray:
+    """Features with a non-zero weight in an L1-regularized refit"""
+    classifier = pipeline.named_steps['classifier']
+    l1 = LogisticRegression(penalty='l1', solver='liblinear', C=C,
+                            class_weight=classifier.class_weight, random_state=42)
+    l1.fit(pipeline.named_steps['features'].transform(inputs), labels)
+    return l1.coef_[0] != 0
+
+
+def prune_vectorizer(vectorizer, keep: np.ndarray):
+    """Copy of a fitted TfidfVectorizer that only knows the features in keep"""
+    terms = _terms_by_index(vectorizer.vocabulary_)[keep].tolist()
+    pruned = clone(vectorizer).set_params(vocabulary={term: i for i, term in enumerate(terms)})
+    # Fitting with a fixed vocabulary only sets up the transformer; the
+    # IDF learnt from the real training data is copied over
+    pruned.fit([" ".join(terms)])
+    if vectorizer.use_idf:
+        pruned.idf_ = vectorizer.idf_[keep]
+    return pruned
+
+
+def prune_pipeline(pipeline, keep: np.ndarray, inputs: list = None, labels: list = None):
+    """
+    Pipeline restricted to the features in keep.
+
+    With inputs and labels the classifier is refitted on the pruned
+    features; otherwise the surviving original weights are kept.
+    """
+    blocks = []
+    offset = 0
+    for name, vectorizer in _vectorizers(pipeline):
+        block_keep = keep[offset:offset + len(vectorizer.vocabulary_)]
+        offset += len(block_keep)
+        # A block with no surviving features is dropped altogether
+        if block_keep.any():
+            blocks.append((name, prune_vectorizer(vectorizer, block_keep)))
+    if not blocks:
+        raise ValueError("pruning removed every feature")
+    features = FeatureUnion(blocks)
+
+    original = pipeline.named_steps['classifier']
+    if inputs is not None:
+        classifier = clone(original).fit(features.transform(inputs), labels)
+    else:
+        classifier = copy.deepcopy(original)
+        classifier.coef_ = original.coef_[:, keep]
+        classifier.n_features_in_ = int(keep.sum())
+    return Pipeline([('features', features), ('classifier', classifier)])
+
+
+def quantize_pipeline(pipeline, dtype: str):
+    """Copy of pipeline whose classifier weights are rounded to dtype"""
+    pipeline = copy.deepcopy(pipeline)
+    classifier = pipeline.named_steps['classifier']
+    classifier.coef_ = quantize_coef(classifier.coef_, dtype)[2]
+    return pipeline
+
+
+def decisions(model_path: str, prompts: list, thresholds: tuple) -> list:
+    """PIIClassifier decisions (ALLOW/WARN/BLOCK) of a model file at (block, warn) thresholds"""
+    block_threshold, warn_threshold = thresholds
+    results = PIIClassifier(model_path).classify_batch(
+        prompts, block_threshold=block_threshold, warn_threshold=warn_threshold
+    )
+    return [decision for decision, _, _ in results]
+
+
+def single_prompt_ms(predict_proba, inputs: list, rounds: int = 3) -> float:
+    """Median per-prompt milliseconds of predict_proba([text]) (best of rounds)"""
+    best = []
+    for text in inputs:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            predict_proba([text])
+            timings.append(time.perf_counter() - start)
+        best.append(min(timings))
+    return statistics.median(best) * 1e3
+
+
+def _size(path: str) -> str:
+    return f"{os.path.getsize(path) / 1e3:.0f} KB"
+
+
+def _same_sidecar(path: str, model_path: str) -> bool:
+    """Whether path shares model_path's sidecar (which already holds the thresholds)"""
+    return os.path.abspath(sidecar_path(path)) == os.path.abspath(sidecar_path(model_path))
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        description="Prune and quantize the trained PII model",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained joblib pipeline")
+    parser.add_argument("--output", default="pii_intent_lr.compressed.joblib",
+                        help="Compressed pipeline to write (only if it passes the checks)")
+    parser.add_argument("--data", default="train.txt", help="Labelled data for refitting and checks")
+    prune = parser.add_mutually_exclusive_group(required=True)
+    prune.add_argument("--min-weight", type=float, help="Drop features with |coef| below this")
+    prune.add_argument("--l1", type=float, metavar="C", help="Keep features selected by L1 with this C")
+    parser.add_argument("--no-refit", action="store_true",
+                        help="Keep the original weights of surviving features")
+    parser.add_argument("--quantize", choices=("float16", "int8"), help="Round the weights")
+    parser.add_argument("--export", metavar="NPZ",
+                        help="Also write a NumPy artifact (with quantized weights if --quantize)")
+    parser.add_argument("--max-flips", type=float, default=0.001,
+                        help="Largest share of changed decisions accepted on each check")
+    parser.add_argument("--force", action="store_true", help="Write the output even if checks fail")
+    args = parser.parse_args(argv)
+
+    from test_classifier import TEST_CATEGORIES
+    from train_model import load_data
+
+    print("=" * 80)
+    print("MODEL COMPRESSION")
+    print("=" * 80)
+
+    pipeline = joblib.load(args.model)
+    # The compressed model must decide like the original at its thresholds
+    thresholds = load_thresholds(args.model)
+    texts, labels = load_data(args.data)
+    X_train, X_test, y_train, _ = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    train_inputs = model_inputs(pipeline, X_train)
+
+    if args.l1 is not None:
+        keep = l1_mask(pipeline, train_inputs, y_train, args.l1)
+        rule = f"L1 (C={args.l1:g})"
+    else:
+        keep = weight_mask(pipeline, args.min_weight)
+        rule = f"|coef| >= {args.min_weight:g}"
+    print(f"\n{rule}: keeping {int(keep.sum())} of {len(keep)} features")
+    offset = 0
+    for name, vectorizer in _vectorizers(pipeline):
+        size = len(vectorizer.vocabulary_)
+        print(f"   {name}: {int(keep[offset:offset + size].sum())} of {size}")
+        offset += size
+
+    if args.no_refit:
+        compressed = prune_pipeline(pipeline, keep)
+    else:
+        compressed = prune_pipeline(pipeline, keep, train_inputs, y_train)
+    if args.quantize:
+        compressed = quantize_pipeline(compressed, args.quantize)
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    with tempfile.TemporaryDirectory(dir=output_dir) as workdir:
+        candidate = os.path.join(workdir, "compressed.joblib")
+        joblib.dump(compressed, candidate)
+        write_thresholds(candidate, *thresholds)
+
+        print(f"\n{'Check':<28} {'Prompts':>8} {'Changed':>8} {'Share':>8}")
+        print("-" * 56)
+        suite_prompts = [prompt for prompts in TEST_CATEGORIES.values() for prompt in prompts]
+        passed = True
+        for label, prompts in (("train.txt", texts), ("test_classifier.py suites", suite_prompts)):
+            before = decisions(args.model, prompts, thresholds)
+            after = decisions(candidate, prompts, thresholds)
+            changed = sum(a != b for a, b in zip(before, after))
+            share = changed / len(prompts)
+            passed &= share <= args.max_flips
+            print(f"{label:<28} {len(prompts):>8} {changed:>8} {share:>8.3%}"
+                  f"{'' if share <= args.max_flips else '  ✗'}")
+
+        sample_inputs = model_inputs(pipeline, X_test[:200])
+        print(f"\n{'Artifact':<28} {'Before':>10} {'After':>10}")
+        print("-" * 50)
+        print(f"{'joblib':<28} {_size(args.model):>10} {_size(candidate):>10}")
+        before_npz = os.path.join(workdir, "before.npz")
+        after_npz = args.export or os.path.join(workdir, "after.npz")
+        export_pipeline(pipeline, before_npz)
+        export_pipeline(compressed, after_npz, quantize=args.quantize)
+        print(f"{'npz' + (f' ({args.quantize} weights)' if args.quantize else ''):<28} "
+              f"{_size(before_npz):>10} {_size(after_npz):>10}")
+        print(f"{'sklearn ms/prompt':<28} "
+              f"{single_prompt_ms(pipeline.predict_proba, sample_inputs):>10.3f} "
+              f"{single_prompt_ms(compressed.predict_proba, sample_inputs):>10.3f}")
+        print(f"{'NumPy scorer ms/prompt':<28} "
+              f"{single_prompt_ms(NumpyScorer.load(before_npz).predict_proba, sample_inputs):>10.3f} "
+              f"{single_prompt_ms(NumpyScorer.load(after_npz).predict_proba, sample_inputs):>10.3f}")
+
+        if not passed and not args.force:
+            if args.export:
+                os.remove(args.export)
+            raise SystemExit(f"\n✗ More than {args.max_flips:.3%} of decisions changed; "
+                             f"{args.output} not written (use --force to write it anyway)")
+        if args.export and not _same_sidecar(args.export, args.model):
+            write_thresholds(args.export, *thresholds)
+        # Model first, then its sidecar (see train_model.py)
+        os.replace(candidate, args.output)
+        if not _same_sidecar(args.output, args.model):
+            os.replace(sidecar_path(candidate), sidecar_path(args.output))
+    print(f"\n✓ Compressed model saved to {args.output}")
+    if args.export:
+        print(f"✓ NumPy artifact saved to {args.export}")
+    print(f"✓ Thresholds (BLOCK {thresholds[0]:.4f}, WARN {thresholds[1]:.4f}) "
+          f"saved to {sidecar_path(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
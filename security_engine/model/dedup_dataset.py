@@ -0,0 +1,263 @@
+"""
+Remove exact and near-duplicate examples from train.txt
+
+build_dataset.py emits the same templated lines ("explain email format",
+"what is an email address", ...) once per source row, and the source
+rows themselves repeat. Duplicates slow training down and inflate CV
+scores, because copies of a test example sit in the training folds.
+
+Two rules, applied within each label and keeping the first occurrence:
+
+    exact   identical text (SHA-1 of the whitespace-normalized,
+            lowercased text)
+    near    estimated Jaccard similarity of character 5-gram shingles
+            >= --threshold, found with MinHash signatures and
+            locality-sensitive hashing (--bands bands of --rows rows).
+            Each LSH bucket is compared against its first member only,
+            so the work stays linear in the number of lines.
+
+Examples are read the way train_model.load_data reads them (blank and
+malformed lines are skipped), so training on the output is the same as
+training on the deduplicated records.
+
+--evaluate trains the train_model.py pipeline with and without the
+duplicates and reports fit time and F1. Both models are tested on the
+same held-out part of the deduplicated data (80/20, stratified, seed 42);
+the "with duplicates" model trains on every copy of the training-part
+examples, so no copy of a test example is in either training set.
+
+Usage:
+    python dedup_dataset.py                              # train.txt -> train.dedup.txt
+    python dedup_dataset.py --threshold 0.9 --evaluate
+    python build_dataset.py --source pii_ner.jsonl --dedup
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from train_model import parse_labelled_line
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WHITE_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITE_SPACES.sub(" ", text).strip().lower()
+
+
+def shingles(text: str, k: int = 5) -> np.ndarray:
+    """CRC32 hashes of the character k-grams of a normalized text"""
+    grams = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """MinHash signatures with num_perm universal hash functions (seeded)"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, texts: list, chunk: int = 1024) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signatures"""
+        result = np.empty((len(texts), len(self.a)), dtype=np.uint32)
+        for begin in range(0, len(texts), chunk):
+            hashed = [shingles(text) for text in texts[begin:begin + chunk]]
+            values = np.concatenate(hashed)
+            starts = np.cumsum([0] + [len(h) for h in hashed[:-1]])
+            # uint64 arithmetic wraps on overflow, which only scrambles the
+            # hashes further; the low 32 bits are kept
+            with np.errstate(over='ignore'):
+                permuted = (self.a[:, None] * values[None, :] + self.b[:, None]) % _MERSENNE_PRIME
+            permuted &= np.uint64(0xFFFFFFFF)
+            result[begin:begin + len(hashed)] = np.minimum.reduceat(permuted, starts, axis=1).T
+        return result
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicates(texts: list, threshold: float = 0.8, bands: int = 16, rows: int = 8,
+                    seed: int = 1) -> np.ndarray:
+    """
+    Cluster near-duplicate texts.
+
+    Returns:
+        For every text, the index of the first text of its cluster
+    """
+    signatures = MinHasher(bands * rows, seed).signatures(texts)
+    parent = np.arange(len(texts))
+    for band in range(bands):
+        buckets = {}
+        columns = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(len(texts)):
+            first = buckets.setdefault(columns[i].tobytes(), i)
+            if first != i and np.mean(signatures[first] == signatures[i]) >= threshold:
+                root_first, root_i = _find(parent, first), _find(parent, i)
+                if root_first != root_i:
+                    # The smaller index becomes the root: clusters keep their first line
+                    parent[max(root_first, root_i)] = min(root_first, root_i)
+    return np.array([_find(parent, i) for i in range(len(texts))])
+
+
+def dedup(texts: list, labels: list, threshold: float = 0.8, bands: int = 16,
+          rows: int = 8) -> tuple:
+    """
+    Deduplicate labelled examples (within each label, keeping the first).
+
+    Returns:
+        (kept indices, representative index of every example,
+         {'exact': removed, 'near': removed})
+    """
+    representative = np.arange(len(texts))
+    first_seen = {}
+    for i, (text, label) in enumerate(zip(texts, labels)):
+        key = (label, hashlib.sha1(normalize(text).encode("utf-8")).digest())
+        representative[i] = first_seen.setdefault(key, i)
+    unique = np.flatnonzero(representative == np.arange(len(texts)))
+    removed = {'exact': len(texts) - len(unique)}
+
+    near_removed = 0
+    for label in sorted(set(labels)):
+        members = [i for i in unique if labels[i] == label]
+        clusters = near_duplicates([normalize(texts[i]) for i in members], threshold, bands, rows)
+        for position, cluster in enumerate(clusters):
+            if cluster != position:
+                representative[members[position]] = members[cluster]
+                near_removed += 1
+    removed['near'] = near_removed
+
+    # Exact duplicates of a near-duplicate follow it to its representative
+    representative = representative[representative]
+    kept = np.flatnonzero(representative == np.arange(len(texts)))
+    return kept, representative, removed
+
+
+def read_examples(path: str) -> tuple:
+    """(texts, labels, number of skipped lines), as train_model.load_data reads them"""
+    texts, labels, skipped = [], [], 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parsed = parse_labelled_line(line)
+            if parsed is None:
+                skipped += 1
+                continue
+            texts.append(parsed[0])
+            labels.append(parsed[1])
+    return texts, labels, skipped
+
+
+def write_examples(path: str, texts: list, labels: list):
+    """Write examples in train.txt format (atomically replaced)"""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for text, label in zip(texts, labels):
+            f.write(f"__label__{'DISCLOSURE' if label else 'NON_DISCLOSURE'} {text}\n")
+    os.replace(path + ".tmp", path)
+
+
+def dedup_file(path: str, output: str, threshold: float = 0.8, bands: int = 16,
+               rows: int = 8) -> tuple:
+    """
+    Deduplicate a train.txt file into output (which may be path itself).
+
+    Returns:
+        (counts for print_counts, texts, labels, kept, representative)
+    """
+    texts, labels, skipped = read_examples(path)
+    start = time.perf_counter()
+    kept, representative, removed = dedup(texts, labels, threshold, bands, rows)
+    seconds = time.perf_counter() - start
+    write_examples(output, [texts[i] for i in kept], [labels[i] for i in kept])
+    counts = {'lines_skipped': skipped, 'examples': len(texts), 'kept': len(kept),
+              'exact': removed['exact'], 'near': removed['near'], 'seconds': seconds}
+    return counts, texts, labels, kept, representative
+
+
+def print_counts(counts: dict):
+    print(f"   Examples:           {counts['examples']} "
+          f"({counts['lines_skipped']} blank/malformed lines skipped)")
+    print(f"   Exact duplicates:   {counts['exact']}")
+    print(f"   Near duplicates:    {counts['near']}")
+    print(f"   Kept:               {counts['kept']} "
+          f"({counts['kept'] / max(counts['examples'], 1):.1%}) in {counts['seconds']:.1f}s")
+
+
+def evaluate(texts: list, labels: list, kept: np.ndarray, representative: np.ndarray):
+    """Fit time and F1 with and without duplicates, on a deduplicated test set"""
+    from sklearn.metrics import f1_score
+    from sklearn.model_selection import train_test_split
+
+    from preprocess import model_inputs
+    from train_model import build_pipeline
+
+    kept_labels = [labels[i] for i in kept]
+    train_kept, test_kept = train_test_split(kept, test_size=0.2, random_state=42,
+                                             stratify=kept_labels)
+    in_train = np.zeros(len(texts), dtype=bool)
+    in_train[train_kept] = True
+    with_duplicates = np.flatnonzero(in_train[representative])
+
+    test_texts = [texts[i] for i in test_kept]
+    test_labels = [labels[i] for i in test_kept]
+
+    print(f"\n{'Training set':<20} {'Examples':>9} {'Fit s':>7} {'F1':>7} {'Prec':>7} {'Recall':>7}")
+    print("-" * 62)
+    for name, indices in (("with duplicates", with_duplicates), ("deduplicated", train_kept)):
+        pipeline = build_pipeline()
+        start = time.perf_counter()
+        pipeline.fit(model_inputs(pipeline, [texts[i] for i in indices]), [labels[i] for i in indices])
+        fit_seconds = time.perf_counter() - start
+        y_pred = pipeline.predict(model_inputs(pipeline, test_texts))
+        tp = sum(1 for y, p in zip(test_labels, y_pred) if y and p)
+        precision = tp / max(sum(y_pred), 1)
+        recall = tp / max(sum(test_labels), 1)
+        print(f"{name:<20} {len(indices):>9} {fit_seconds:>7.1f} "
+              f"{f1_score(test_labels, y_pred):>7.4f} {precision:>7.4f} {recall:>7.4f}")
+    print(f"\nTest set: {len(test_kept)} deduplicated examples, "
+          f"none of them (or their duplicates) in either training set")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Remove exact and near-duplicate examples from train.txt",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--input", default="train.txt", help="Dataset in train.txt format")
+    parser.add_argument("--output", default="train.dedup.txt", help="Deduplicated dataset to write")
+    parser.add_argument("--threshold", type=float, default=0.8,
+                        help="Estimated Jaccard similarity above which lines are near duplicates")
+    parser.add_argument("--bands", type=int, default=16, help="LSH bands")
+    parser.add_argument("--rows", type=int, default=8, help="MinHash values per LSH band")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Compare fit time and F1 with and without the duplicates")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("DATASET DEDUPLICATION")
+    print("=" * 80)
+    print(f"\n{args.input} -> {args.output}")
+    counts, texts, labels, kept, representative = dedup_file(
+        args.input, args.output, args.threshold, args.bands, args.rows
+    )
+    print_counts(counts)
+
+    if args.evaluate:
+        evaluate(texts, labels, kept, representative)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Evaluate cascade mode against the full classification path on train.txt
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from classifier import PIIClassifier
+from train_model import load_data
+
+
+def timed(fn):
+    """Run fn() and return (result, seconds)"""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def evaluate(data_path="train.txt", model_path="pii_intent_lr.joblib", limit=None):
+    """Compare cascade and full-path decisions and timings"""
+    texts, _ = load_data(data_path)
+    if limit:
+        texts = texts[:limit]
+
+    full = PIIClassifier(model_path)
+    cascade = PIIClassifier(model_path, cascade=True)
+
+    print("=" * 80)
+    print("CASCADE EVALUATION")
+    print("=" * 80)
+    print(f"\nPrompts: {len(texts)}")
+
+    # Batch mode
+    full_results, full_batch_time = timed(lambda: full.classify_batch(texts))
+    cascade_results, cascade_batch_time = timed(lambda: cascade.classify_batch(texts))
+
+    # Per-prompt mode
+    _, full_single_time = timed(lambda: [full.classify_prompt(t) for t in texts])
+    _, cascade_single_time = timed(lambda: [cascade.classify_prompt(t) for t in texts])
+
+    tiers = Counter(details['decision_tier'] for _, _, details in cascade_results)
+    print("\nDecision tiers:")
+    for tier, count in tiers.most_common():
+        print(f"  {tier:<10} {count:>8}  ({count / len(texts) * 100:.1f}%)")
+
+    disagreements = Counter()
+    examples = []
+    for text, (full_decision, _, _), (cascade_decision, _, details) in zip(
+        texts, full_results, cascade_results
+    ):
+        if full_decision != cascade_decision:
+            disagreements[(full_decision, cascade_decision, details['decision_tier'])] += 1
+            if len(examples) < 10:
+                examples.append((full_decision, cascade_decision, text))
+
+    total_disagree = sum(disagreements.values())
+    print(f"\nDisagreements with full path: {total_disagree} "
+          f"({total_disagree / len(texts) * 100:.3f}%)")
+    for (full_decision, cascade_decision, tier), count in disagreements.most_common():
+        print(f"  full={full_decision:<5} cascade={cascade_decision:<5} "
+              f"tier={tier:<8} {count}")
+    for full_decision, cascade_decision, text in examples:
+        print(f"  [{full_decision} -> {cascade_decision}] {text[:60]}")
+
+    print(f"\n{'Mode':<12} {'Full (s)':>10} {'Cascade (s)':>12} {'Speedup':>10}")
+    print("-" * 48)
+    print(f"{'per-prompt':<12} {full_single_time:>10.3f} {cascade_single_time:>12.3f} "
+          f"{full_single_time / cascade_single_time:>9.2f}x")
+    print(f"{'batch':<12} {full_batch_time:>10.3f} {cascade_batch_time:>12.3f} "
+          f"{full_batch_time / cascade_batch_time:>9.2f}x")
+
+    return total_disagree, tiers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default="train.txt", help="Labelled data in train.txt format")
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained pipeline")
+    parser.add_argument("--limit", type=int, help="Only use the first N prompts")
+    args = parser.parse_args()
+
+    evaluate(args.data, args.model, args.limit)
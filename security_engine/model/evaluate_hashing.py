@@ -0,0 +1,119 @@
+"""
+Compare hashed-feature models with the vocabulary (TF-IDF) model on train.txt
+
+Every variant is trained on the same split as train_model.py (80/20,
+stratified, seed 42) and reported with:
+
+    F1 / precision / recall on the held-out 20%
+    fit time
+    artifact size (joblib.dump as train_model.py saves it, and compressed)
+    load time (PIIClassifier construction: load, digest check, warm-up)
+    classify_batch throughput and classify_prompt latency on the test set
+
+Usage:
+    python evaluate_hashing.py
+    python evaluate_hashing.py --bits 16 18 20 --idf
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import joblib
+from sklearn.metrics import f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+
+from classifier import PIIClassifier
+from preprocess import model_inputs
+from train_model import build_pipeline, load_data
+
+
+def timed(fn):
+    """Run fn() and return (result, seconds)"""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def variants(bits: list, idf: bool) -> list:
+    """(label, build_pipeline keyword arguments) of every model to compare"""
+    result = [("vocabulary (current)", {})]
+    for hash_bits in bits:
+        result.append((f"hashing 2^{hash_bits}", {'hashing': True, 'hash_bits': hash_bits}))
+        if idf:
+            result.append((f"hashing 2^{hash_bits} + idf",
+                           {'hashing': True, 'hash_bits': hash_bits, 'hash_idf': True}))
+    return result
+
+
+def evaluate_variant(options: dict, X_train, X_test, y_train, y_test, workdir: str,
+                     single_prompts: int = 200) -> dict:
+    """Train one variant, save it, load it with PIIClassifier and time it"""
+    pipeline = build_pipeline(**options)
+    _, fit_seconds = timed(lambda: pipeline.fit(model_inputs(pipeline, X_train), y_train))
+
+    y_pred = pipeline.predict(model_inputs(pipeline, X_test))
+
+    path = os.path.join(workdir, "model.joblib")
+    joblib.dump(pipeline, path)
+    size = os.path.getsize(path)
+    joblib.dump(pipeline, path + ".z", compress=3)
+    compressed_size = os.path.getsize(path + ".z")
+
+    load_seconds = min(timed(lambda: PIIClassifier(path))[1] for _ in range(3))
+    classifier = PIIClassifier(path)
+
+    _, batch_seconds = timed(lambda: classifier.classify_batch(X_test))
+    latencies = [timed(lambda: classifier.classify_prompt(text))[1]
+                 for text in X_test[:single_prompts]]
+
+    return {
+        'f1': f1_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred),
+        'recall': recall_score(y_test, y_pred),
+        'fit_s': fit_seconds,
+        'size_mb': size / 1e6,
+        'compressed_mb': compressed_size / 1e6,
+        'load_ms': load_seconds * 1e3,
+        'batch_per_s': len(X_test) / batch_seconds,
+        'single_ms': statistics.median(latencies) * 1e3,
+    }
+
+
+def evaluate(data_path: str = "train.txt", bits: list = (16, 18, 20), idf: bool = False):
+    texts, labels = load_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+
+    print("=" * 80)
+    print("HASHING VS VOCABULARY FEATURES")
+    print("=" * 80)
+    print(f"\nTrain: {len(X_train)}  Test: {len(X_test)}")
+    print(f"\n{'Model':<22} {'F1':>6} {'Prec':>6} {'Rec':>6} {'Fit s':>6} {'Size MB':>8} "
+          f"{'Gz MB':>6} {'Load ms':>8} {'Batch/s':>8} {'1x ms':>6}")
+    print("-" * 92)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, options in variants(bits, idf):
+            r = evaluate_variant(options, X_train, X_test, y_train, y_test, workdir)
+            print(f"{label:<22} {r['f1']:>6.4f} {r['precision']:>6.4f} {r['recall']:>6.4f} "
+                  f"{r['fit_s']:>6.1f} {r['size_mb']:>8.2f} {r['compressed_mb']:>6.2f} "
+                  f"{r['load_ms']:>8.1f} {r['batch_per_s']:>8.0f} {r['single_ms']:>6.2f}")
+
+    print("\nSize: joblib.dump as saved by train_model.py; Gz: joblib compress=3")
+    print("Load: PIIClassifier construction (includes the digest check and warm-up)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="train.txt", help="Labelled data in train.txt format")
+    parser.add_argument("--bits", type=int, nargs="+", default=[16, 18, 20],
+                        help="Hashed columns per block, as powers of two")
+    parser.add_argument("--idf", action="store_true", help="Also evaluate hashing + IDF")
+    args = parser.parse_args()
+
+    evaluate(args.data, args.bits, args.idf)
@@ -0,0 +1,144 @@
+"""
+Compare online (partial_fit) learning with a full retrain on train.txt
+
+Uses the train_model.py split (80/20, stratified, seed 42). The full
+retrain is build_pipeline().fit on the whole training part. The online
+model (online_learning.OnlineTrainer) sees the same training part as a
+stream of shuffled batches, and is evaluated on the test part after a
+growing number of samples:
+
+    F1, ROC AUC and log loss on the test set
+    agreement: share of test prompts that both models put in the same
+               ALLOW/WARN/BLOCK band (model score only, default thresholds)
+    update s: cumulative partial_fit time so far
+
+Usage:
+    python evaluate_online.py
+    python evaluate_online.py --batch-size 64 --epochs 2 --plot online.png
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics import f1_score, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from online_learning import OnlineTrainer
+from preprocess import model_inputs
+from train_model import build_pipeline, load_data
+
+
+def bands(proba, block_threshold: float = 0.85, warn_threshold: float = 0.50):
+    """ALLOW/WARN/BLOCK band (0/1/2) of each model score"""
+    return (proba >= warn_threshold).astype(int) + (proba >= block_threshold)
+
+
+def scores(y_test, proba) -> dict:
+    return {
+        'f1': f1_score(y_test, proba >= 0.5),
+        'auc': roc_auc_score(y_test, proba),
+        'log_loss': log_loss(y_test, np.clip(proba, 1e-15, 1 - 1e-15)),
+    }
+
+
+def evaluate(data_path: str = "train.txt", batch_size: int = 256, epochs: int = 3,
+             hash_bits: int = 18, plot: str = None, seed: int = 42):
+    texts, labels = load_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+
+    print("=" * 80)
+    print("ONLINE LEARNING VS FULL RETRAIN")
+    print("=" * 80)
+    print(f"\nTrain: {len(X_train)}  Test: {len(X_test)}  Batch: {batch_size}  Epochs: {epochs}")
+
+    full = build_pipeline()
+    start = time.perf_counter()
+    full.fit(model_inputs(full, X_train), y_train)
+    full_seconds = time.perf_counter() - start
+    full_proba = full.predict_proba(model_inputs(full, X_test))[:, 1]
+    full_scores = scores(y_test, full_proba)
+    full_bands = bands(full_proba)
+
+    print(f"\n{'Samples':>9} {'Epoch':>6} {'F1':>7} {'AUC':>7} {'LogLoss':>8} "
+          f"{'Agree':>7} {'Update s':>9}")
+    print("-" * 80)
+
+    rng = np.random.default_rng(seed)
+    curve = []
+    with tempfile.TemporaryDirectory() as workdir:
+        trainer = OnlineTrainer(workdir, hash_bits=hash_bits)
+        pipeline = trainer.pipeline
+        test_inputs = model_inputs(pipeline, X_test)
+        update_seconds = 0.0
+        # Report after 1, 2, 4, 8, ... batches and at the end of every epoch
+        next_report = 1
+        batches = 0
+
+        for epoch in range(1, epochs + 1):
+            order = rng.permutation(len(X_train))
+            for begin in range(0, len(order), batch_size):
+                batch = order[begin:begin + batch_size]
+                start = time.perf_counter()
+                trainer.partial_fit([X_train[i] for i in batch], [y_train[i] for i in batch])
+                update_seconds += time.perf_counter() - start
+                batches += 1
+
+                end_of_epoch = begin + batch_size >= len(order)
+                if batches == next_report or end_of_epoch:
+                    if batches == next_report:
+                        next_report *= 2
+                    proba = pipeline.predict_proba(test_inputs)[:, 1]
+                    result = scores(y_test, proba)
+                    result.update({
+                        'samples': trainer.samples_seen,
+                        'epoch': epoch,
+                        'agreement': float(np.mean(bands(proba) == full_bands)),
+                        'update_s': update_seconds,
+                    })
+                    curve.append(result)
+                    print(f"{result['samples']:>9} {epoch:>6} {result['f1']:>7.4f} "
+                          f"{result['auc']:>7.4f} {result['log_loss']:>8.4f} "
+                          f"{result['agreement']:>7.2%} {update_seconds:>9.2f}")
+
+    print("-" * 80)
+    print(f"{'full':>9} {'':>6} {full_scores['f1']:>7.4f} {full_scores['auc']:>7.4f} "
+          f"{full_scores['log_loss']:>8.4f} {'100.00%':>7} {full_seconds:>9.2f}")
+    print(f"\nFull retrain: {full_seconds:.1f}s; online: {update_seconds / batches * 1e3:.1f} ms "
+          f"per {batch_size}-sample update")
+
+    if plot:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        samples = [point['samples'] for point in curve]
+        fig, axes = plt.subplots(1, 2, figsize=(11, 4))
+        axes[0].semilogx(samples, [point['f1'] for point in curve], marker="o", label="online")
+        axes[0].axhline(full_scores['f1'], color="gray", linestyle="--", label="full retrain")
+        axes[0].set_ylabel("F1")
+        axes[1].semilogx(samples, [point['log_loss'] for point in curve], marker="o", label="online")
+        axes[1].axhline(full_scores['log_loss'], color="gray", linestyle="--", label="full retrain")
+        axes[1].set_ylabel("log loss")
+        for ax in axes:
+            ax.set_xlabel("training samples seen")
+            ax.legend()
+        fig.tight_layout()
+        fig.savefig(plot)
+        print(f"✓ Plot saved to {plot}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="train.txt", help="Labelled data in train.txt format")
+    parser.add_argument("--batch-size", type=int, default=256, help="Samples per partial_fit")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the training part")
+    parser.add_argument("--hash-bits", type=int, default=18, help="2**HASH_BITS columns per block")
+    parser.add_argument("--plot", metavar="PNG", help="Save the convergence curves here")
+    args = parser.parse_args()
+
+    evaluate(args.data, args.batch_size, args.epochs, args.hash_bits, args.plot)
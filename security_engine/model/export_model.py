@@ -0,0 +1,198 @@
+"""
+Export the trained pipeline to a compact NumPy artifact
+
+The artifact (.npz) holds the char/word vocabularies, IDF vectors and
+LogisticRegression weights, and is loaded by numpy_scorer.NumpyScorer
+without scikit-learn. PIIClassifier loads it when given a .npz path.
+
+Usage:
+    python export_model.py                       # pii_intent_lr.joblib -> pii_intent_lr.npz
+    python export_model.py --verify              # also compare against sklearn on train.txt
+"""
+
+import argparse
+import json
+import os
+
+import joblib
+import numpy as np
+
+from numpy_scorer import FORMAT_VERSION, QUANTIZED_FORMAT_VERSION, NumpyScorer, quantize_coef
+
+
+def _vectorizer_meta(name: str, vectorizer) -> dict:
+    """Describe a fitted TfidfVectorizer, rejecting settings the scorer cannot reproduce"""
+    if not hasattr(vectorizer, 'vocabulary_'):
+        raise ValueError(f"{name}: {type(vectorizer).__name__} has no vocabulary "
+                         f"(hashed features cannot be exported)")
+    if vectorizer.analyzer not in ('char', 'word'):
+        raise ValueError(f"{name}: analyzer={vectorizer.analyzer!r} is not supported")
+    if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError(f"{name}: custom preprocessor/tokenizer is not supported")
+    if vectorizer.stop_words is not None:
+        raise ValueError(f"{name}: stop_words is not supported")
+    if vectorizer.strip_accents not in (None, 'unicode', 'ascii'):
+        raise ValueError(f"{name}: strip_accents={vectorizer.strip_accents!r} is not supported")
+
+    return {
+        'name': name,
+        'analyzer': vectorizer.analyzer,
+        'ngram_range': list(vectorizer.ngram_range),
+        'lowercase': bool(vectorizer.lowercase),
+        'strip_accents': vectorizer.strip_accents,
+        'token_pattern': vectorizer.token_pattern,
+        'norm': vectorizer.norm,
+        'use_idf': bool(vectorizer.use_idf),
+        'sublinear_tf': bool(vectorizer.sublinear_tf),
+        'binary': bool(vectorizer.binary),
+    }
+
+
+def _terms_by_index(vocabulary: dict) -> np.ndarray:
+    """Return vocabulary terms ordered by their feature index"""
+    terms = [None] * len(vocabulary)
+    for term, index in vocabulary.items():
+        terms[index] = term
+    return np.array(terms, dtype=str)
+
+
+def _feature_blocks(features) -> list:
+    """
+    (name, meta, vocabulary, idf) of each TF-IDF block, for a FeatureUnion
+    of TfidfVectorizers or a fused_features.FusedFeatures. Both export to
+    the same artifact, which scores preprocess_for_ml output.
+    """
+    if hasattr(features, 'transformer_list'):
+        return [
+            (name, _vectorizer_meta(name, vectorizer), vectorizer.vocabulary_,
+             vectorizer.idf_ if vectorizer.use_idf else None)
+            for name, vectorizer in features.transformer_list
+        ]
+
+    blocks = []
+    for name, analyzer, ngram_range, vocabulary, idf in (
+        ('char_tfidf', 'char', features.char_ngram_range, features.char_vocabulary_, features.char_idf_),
+        ('word_tfidf', 'word', features.word_ngram_range, features.word_vocabulary_, features.word_idf_),
+    ):
+        meta = {
+            'name': name,
+            'analyzer': analyzer,
+            'ngram_range': list(ngram_range),
+            'lowercase': True,
+            'strip_accents': features.strip_accents,
+            'token_pattern': features.token_pattern,
+            'norm': 'l2',
+            'use_idf': True,
+            'sublinear_tf': False,
+            'binary': False,
+        }
+        blocks.append((name, meta, vocabulary, idf))
+    return blocks
+
+
+def extract_arrays(pipeline, quantize: str = None) -> dict:
+    """
+    Pull the arrays needed for inference out of a fitted pipeline.
+
+    Args:
+        quantize: Store the weights as 'float16' or 'int8' (with a
+            'coef_scale'; see numpy_scorer.quantize_coef)
+
+    Returns:
+        Dict of array name -> numpy array, including a JSON 'meta' entry
+    """
+    features = pipeline.named_steps['features']
+    classifier = pipeline.named_steps['classifier']
+
+    if len(classifier.classes_) != 2:
+        raise ValueError("Only binary classifiers can be exported")
+
+    arrays = {}
+    vectorizers = []
+    for name, meta, vocabulary, idf in _feature_blocks(features):
+        vectorizers.append(meta)
+        arrays[f"{name}__terms"] = _terms_by_index(vocabulary)
+        if idf is not None:
+            arrays[f"{name}__idf"] = np.asarray(idf, dtype=np.float64)
+
+    arrays['coef'] = np.asarray(classifier.coef_[0], dtype=np.float64)
+    format_version = FORMAT_VERSION
+    if quantize:
+        arrays['coef'], scale, _ = quantize_coef(arrays['coef'], quantize)
+        if scale is not None:
+            arrays['coef_scale'] = np.asarray(scale, dtype=np.float64)
+            format_version = QUANTIZED_FORMAT_VERSION
+    arrays['intercept'] = np.asarray(classifier.intercept_[0], dtype=np.float64)
+    arrays['classes'] = np.asarray(classifier.classes_)
+    arrays['meta'] = np.array(json.dumps({
+        'format_version': format_version,
+        'vectorizers': vectorizers,
+    }))
+    return arrays
+
+
+def export_pipeline(pipeline, path: str, quantize: str = None):
+    """Write a fitted pipeline to a NumpyScorer artifact (atomically replaced)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **extract_arrays(pipeline, quantize))
+    os.replace(tmp_path, path)
+
+
+def verify_export(pipeline, scorer: NumpyScorer, texts: list, tolerance: float = 1e-9,
+                  pipeline_texts: list = None) -> float:
+    """
+    Compare NumpyScorer against the sklearn pipeline.
+
+    texts are preprocess_for_ml output; pipeline_texts, if given, are the
+    same prompts as the pipeline expects them (raw for fused pipelines).
+
+    Returns:
+        Maximum absolute difference in predict_proba
+
+    Raises:
+        AssertionError: If any probability differs by more than tolerance
+    """
+    expected = pipeline.predict_proba(texts if pipeline_texts is None else pipeline_texts)[:, 1]
+    actual = scorer.predict_proba(texts)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual))) if len(texts) else 0.0
+    if max_diff > tolerance:
+        worst = int(np.argmax(np.abs(expected - actual)))
+        raise AssertionError(
+            f"Exported model differs by {max_diff:.3e} (> {tolerance:.0e}) "
+            f"on: {texts[worst][:80]!r}"
+        )
+    return max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the trained pipeline for NumPy-only inference",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained joblib pipeline")
+    parser.add_argument("--output", default="pii_intent_lr.npz", help="Artifact to write")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check predict_proba against sklearn on train.txt")
+    parser.add_argument("--data", default="train.txt", help="Data used by --verify")
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    export_pipeline(pipeline, args.output)
+    print(f"✓ Exported {args.model} -> {args.output}")
+
+    if args.verify:
+        from preprocess import model_inputs, preprocess_for_ml
+        from train_model import load_data
+
+        texts, _ = load_data(args.data)
+        processed = [preprocess_for_ml(t) for t in texts]
+        scorer = NumpyScorer.load(args.output)
+        max_diff = verify_export(pipeline, scorer, processed,
+                                 pipeline_texts=model_inputs(pipeline, texts))
+        print(f"✓ Verified on {len(processed)} prompts, max |Δp| = {max_diff:.3e}")
+
+
+if __name__ == "__main__":
+    main()
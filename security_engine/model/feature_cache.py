@@ -0,0 +1,305 @@
+"""
+On-disk cache of preprocessed text and fitted feature matrices
+
+train_model.py spends most of its time turning text into sparse
+matrices: preprocess_for_ml on every row, then fitting the FeatureUnion
+for each cross-validation fold and once more for the final model. Those
+results depend only on the data and the feature settings. They are stored
+here and reused by later runs, and by every classifier setting tried in
+a hyperparameter search.
+
+Entries are keyed by:
+
+    the content of the texts (training part and held-out part)
+    the feature step's parameters (get_params(deep=True))
+    the source of the feature code (preprocess.py, keyword_matcher.py,
+    fused_features.py, numpy_scorer.py and the module of every transformer
+    in the feature step) and the scikit-learn version
+
+so editing train.txt, a vectorizer setting, the preprocessing rules or a
+custom transformer automatically misses the cache. Text is stored as JSON, matrices as
+uncompressed scipy .npz (compression halves their size but makes loading
+several times slower) and fitted feature steps with joblib.
+
+Each CV fold caches the features fitted on that fold's training part
+(and its held-out matrix), exactly as Pipeline.fit inside
+cross_val_score would compute them, so cached CV scores equal
+cross_val_score(pipeline) without leaking the held-out fold into the
+vocabulary or IDF.
+
+Usage:
+    cache = FeatureCache()
+    inputs = cache.model_inputs(pipeline, texts)
+    scores = cache.cross_val_score(pipeline, inputs, labels, cv=5, scoring='f1')
+    results = cache.grid_search(pipeline, {'C': [0.1, 1, 10]}, inputs, labels)
+    pipeline = cache.fit_pipeline(pipeline, inputs, labels)
+
+    python feature_cache.py --info
+    python feature_cache.py --clear
+"""
+
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.pipeline import Pipeline
+
+from preprocess import model_inputs, takes_raw_prompts
+
+
+DEFAULT_CACHE_DIR = ".feature_cache"
+
+# Bump to invalidate every entry written by older code
+CACHE_FORMAT = 1
+
+
+def data_hash(texts: list) -> str:
+    """Content hash of a list of texts"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def settings_hash(estimator) -> str:
+    """Hash of an estimator's parameters, including nested ones"""
+    params = sorted((name, repr(value)) for name, value in estimator.get_params(deep=True).items())
+    return hashlib.sha256(repr((type(estimator).__name__, params)).encode()).hexdigest()
+
+
+# Modules whose code shapes model inputs and features, transformer or not
+FEATURE_MODULES = ("preprocess", "keyword_matcher", "fused_features", "numpy_scorer")
+
+
+def _transformer_modules(features) -> set:
+    """Modules defining features and every estimator nested in it, except sklearn's"""
+    estimators = [features] + [value for value in features.get_params(deep=True).values()
+                               if hasattr(value, "get_params")]
+    return {type(estimator).__module__ for estimator in estimators
+            if type(estimator).__module__.split(".")[0] != "sklearn"}
+
+
+def _code_hash(modules=FEATURE_MODULES) -> str:
+    """Anything besides data and settings that changes the features"""
+    import sklearn
+    digest = hashlib.sha256(f"{CACHE_FORMAT}|{sklearn.__version__}".encode())
+    for name in sorted(modules):
+        if name not in sys.modules:
+            __import__(name)
+        digest.update(f"|{name}|{inspect.getsource(sys.modules[name])}".encode())
+    return digest.hexdigest()
+
+
+def _key(*parts) -> str:
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+class FeatureCache:
+    """
+    Cache of model inputs and fitted feature matrices in cache_dir.
+
+    hits and misses count lookups since construction.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._code = _code_hash()
+        # Code hash per set of transformer modules, for fit entries
+        self._fit_code = {}
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _write(self, path: str, write):
+        """Write path atomically with write(file_object)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def model_inputs(self, pipeline, texts: list) -> list:
+        """preprocess.model_inputs(pipeline, texts), cached"""
+        if takes_raw_prompts(pipeline):
+            return list(texts)
+        path = self._path(_key("inputs", self._code, data_hash(texts)), ".json")
+        if os.path.exists(path):
+            self.hits += 1
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        self.misses += 1
+        inputs = model_inputs(pipeline, texts)
+        self._write(path, lambda f: f.write(json.dumps(inputs).encode("ascii")))
+        return inputs
+
+    def entry_key(self, features, texts: list, held_out: list = None) -> str:
+        """Key of the fit_transform(features, texts, held_out) entry"""
+        modules = frozenset(FEATURE_MODULES) | _transformer_modules(features)
+        if modules not in self._fit_code:
+            self._fit_code[modules] = _code_hash(modules)
+        return _key("fit", self._fit_code[modules], settings_hash(features), data_hash(texts),
+                    data_hash(held_out) if held_out is not None else "-")
+
+    def _entry_paths(self, key: str) -> list:
+        return [self._path(key, suffix) for suffix in (".joblib", "-fit.npz", "-held.npz")]
+
+    def has(self, key: str, held_out: bool = False) -> bool:
+        """Whether the entry is complete (with its held-out matrix, if asked)"""
+        paths = self._entry_paths(key)
+        return all(os.path.exists(p) for p in paths[:2 + held_out])
+
+    def load(self, key: str, held_out: bool = False) -> tuple:
+        """
+        Load a stored fit_transform entry.
+
+        Returns:
+            (fitted features, fit matrix, held-out matrix or None)
+        """
+        paths = self._entry_paths(key)
+        fitted = joblib.load(paths[0])
+        matrix = sparse.load_npz(paths[1])
+        held_matrix = sparse.load_npz(paths[2]) if held_out else None
+        return fitted, matrix, held_matrix
+
+    def fit_transform(self, features, texts: list, held_out: list = None) -> tuple:
+        """
+        Fit a clone of the feature step on texts, cached.
+
+        Returns:
+            (fitted features, matrix of texts, matrix of held_out or None)
+        """
+        key = self.entry_key(features, texts, held_out)
+        if self.has(key, held_out is not None):
+            self.hits += 1
+            return self.load(key, held_out is not None)
+
+        self.misses += 1
+        fitted = clone(features)
+        matrix = sparse.csr_matrix(fitted.fit_transform(texts))
+        held_matrix = sparse.csr_matrix(fitted.transform(held_out)) if held_out is not None else None
+
+        paths = self._entry_paths(key)
+        self._write(paths[1], lambda f: sparse.save_npz(f, matrix, compressed=False))
+        if held_matrix is not None:
+            self._write(paths[2], lambda f: sparse.save_npz(f, held_matrix, compressed=False))
+        # Written last: its presence marks a complete entry
+        self._write(paths[0], lambda f: joblib.dump(fitted, f))
+        return fitted, matrix, held_matrix
+
+    def fold_matrices(self, pipeline, inputs: list, labels: list, cv=5) -> list:
+        """
+        (train matrix, train labels, test matrix, test labels) per CV fold,
+        split the way cross_val_score(pipeline, cv=cv) splits.
+        """
+        features = pipeline.named_steps['features']
+        y = np.asarray(labels)
+        folds = []
+        for train, test in check_cv(cv, y, classifier=True).split(inputs, y):
+            _, train_matrix, test_matrix = self.fit_transform(
+                features, [inputs[i] for i in train], [inputs[i] for i in test]
+            )
+            folds.append((train_matrix, y[train], test_matrix, y[test]))
+        return folds
+
+    def cross_val_score(self, pipeline, inputs: list, labels: list, cv=5,
+                        scoring: str = 'f1', folds: list = None) -> np.ndarray:
+        """cross_val_score(pipeline, inputs, labels) with cached fold features"""
+        if folds is None:
+            folds = self.fold_matrices(pipeline, inputs, labels, cv)
+        scorer = get_scorer(scoring)
+        scores = []
+        for train_matrix, train_labels, test_matrix, test_labels in folds:
+            classifier = clone(pipeline.named_steps['classifier'])
+            classifier.fit(train_matrix, train_labels)
+            scores.append(scorer(classifier, test_matrix, test_labels))
+        return np.asarray(scores)
+
+    def grid_search(self, pipeline, param_grid, inputs: list, labels: list, cv=5,
+                    scoring: str = 'f1') -> list:
+        """
+        Cross-validate every classifier setting in param_grid on the same
+        cached fold features.
+
+        Args:
+            param_grid: Classifier parameters (without the "classifier__"
+                prefix), as for sklearn.model_selection.ParameterGrid
+
+        Returns:
+            [(params, mean score, std)] from best to worst
+        """
+        folds = self.fold_matrices(pipeline, inputs, labels, cv)
+        results = []
+        for params in ParameterGrid(param_grid):
+            candidate = clone(pipeline)
+            candidate.named_steps['classifier'].set_params(**params)
+            scores = self.cross_val_score(candidate, inputs, labels, scoring=scoring, folds=folds)
+            results.append((params, float(scores.mean()), float(scores.std())))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results
+
+    def fit_pipeline(self, pipeline, inputs: list, labels: list) -> Pipeline:
+        """
+        pipeline.fit(inputs, labels), with the feature step from the cache.
+
+        Returns:
+            A new fitted Pipeline with the same steps
+        """
+        steps = pipeline.steps
+        if [name for name, _ in steps] != ['features', 'classifier']:
+            raise ValueError("expected a ('features', 'classifier') pipeline")
+        fitted, matrix, _ = self.fit_transform(steps[0][1], inputs)
+        classifier = clone(steps[1][1]).fit(matrix, labels)
+        return Pipeline([('features', fitted), ('classifier', classifier)])
+
+    def info(self) -> dict:
+        """Number of files and total size of the cache"""
+        files = [path for path in glob.glob(os.path.join(self.cache_dir, "*"))
+                 if not path.endswith(".tmp")]
+        return {
+            'cache_dir': self.cache_dir,
+            'files': len(files),
+            'size_mb': sum(os.path.getsize(path) for path in files) / 1e6,
+        }
+
+    def clear(self) -> int:
+        """Delete every cache file; returns how many were removed"""
+        files = glob.glob(os.path.join(self.cache_dir, "*"))
+        for path in files:
+            os.remove(path)
+        return len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect or clear the training feature cache",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="Cache directory")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--info", action="store_true", help="Show the cache size")
+    action.add_argument("--clear", action="store_true", help="Delete all cached entries")
+    args = parser.parse_args()
+
+    cache = FeatureCache(args.dir)
+    if args.clear:
+        print(f"✓ Removed {cache.clear()} files from {args.dir}")
+    else:
+        print(json.dumps(cache.info(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
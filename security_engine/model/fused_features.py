@@ -0,0 +1,321 @@
+"""
+Fused feature extraction: context flags, char and word TF-IDF in one pass
+
+The standard pipeline lowercases each prompt in preprocess_for_ml, joins
+the flags onto it, and then each TfidfVectorizer lowercases, strips
+accents and tokenizes that string again, materializing the full list of
+n-grams before counting them. FusedFeatures takes the raw prompt instead:
+
+    1. lowercase once; compute the context flags from that buffer
+    2. strip accents once; this normalized text feeds both analyzers
+    3. count char and word n-grams straight into the fitted vocabularies,
+       without building the n-gram lists
+
+It produces the same columns (char block, then word block) and the same
+TF-IDF values as the FeatureUnion from train_model.build_pipeline(), so it
+can be trained with build_pipeline(fused=True) or built from an existing
+trained pipeline with fused_pipeline(). Fused pipelines take raw prompts,
+not preprocess_for_ml output.
+
+Usage:
+    python fused_features.py                      # check pii_intent_lr.joblib against its fused form
+    python fused_features.py --output fused.joblib
+"""
+
+import argparse
+import re
+from collections import Counter
+from functools import partial
+from itertools import chain
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.utils.sparsefuncs_fast import inplace_csr_row_normalize_l2
+
+from numpy_scorer import char_ngrams, normalize_text, word_ngrams
+from preprocess import get_context_flags
+
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def _word_analyzer(text: str, token_pattern, min_n: int, max_n: int) -> list:
+    return word_ngrams(token_pattern.findall(text), min_n, max_n)
+
+
+class FusedFeatures(BaseEstimator, TransformerMixin):
+    """
+    Char + word TF-IDF features computed from one normalized buffer.
+
+    Parameters mirror the two TfidfVectorizers of build_pipeline(); only
+    the settings used there are supported (lowercase, l2 norm, smoothed
+    idf, raw term counts).
+
+    Args:
+        context_flags: Input is the raw prompt and the context flags are
+            computed and prepended here. With False the input is expected
+            to be preprocess_for_ml output already.
+    """
+
+    def __init__(self, char_ngram_range=(3, 5), char_min_df=2, char_max_features=5000,
+                 word_ngram_range=(1, 3), word_min_df=2, word_max_features=3000,
+                 strip_accents='unicode', token_pattern=DEFAULT_TOKEN_PATTERN,
+                 context_flags=True):
+        self.char_ngram_range = char_ngram_range
+        self.char_min_df = char_min_df
+        self.char_max_features = char_max_features
+        self.word_ngram_range = word_ngram_range
+        self.word_min_df = word_min_df
+        self.word_max_features = word_max_features
+        self.strip_accents = strip_accents
+        self.token_pattern = token_pattern
+        self.context_flags = context_flags
+
+    @property
+    def takes_raw_prompts(self) -> bool:
+        return self.context_flags
+
+    def normalize(self, text: str) -> str:
+        """
+        The text both analyzers see: flags + prompt, lowercased and with
+        accents stripped (what the vectorizers made of preprocess_for_ml).
+        """
+        text_lower = text.lower()
+        if self.context_flags:
+            flags = get_context_flags(text, text_lower)
+            if flags:
+                text_lower = " ".join([flag.lower() for flag in flags] + [text_lower])
+        return normalize_text(text_lower, lowercase=False, strip_accents=self.strip_accents)
+
+    def fit(self, X, y=None):
+        self._fit(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        return self._transform_normalized(self._fit(X))
+
+    def _fit(self, X) -> list:
+        """Learn vocabularies and idf with sklearn itself; return the normalized texts"""
+        normalized = [self.normalize(text) for text in X]
+        min_n, max_n = self.char_ngram_range
+        self.char_vocabulary_, self.char_idf_ = _fit_block(
+            normalized, partial(char_ngrams, min_n=min_n, max_n=max_n),
+            self.char_min_df, self.char_max_features
+        )
+        min_n, max_n = self.word_ngram_range
+        self.word_vocabulary_, self.word_idf_ = _fit_block(
+            normalized, partial(_word_analyzer, token_pattern=re.compile(self.token_pattern),
+                                min_n=min_n, max_n=max_n),
+            self.word_min_df, self.word_max_features
+        )
+        return normalized
+
+    def transform(self, X):
+        return self._transform_normalized([self.normalize(text) for text in X])
+
+    def _transform_normalized(self, normalized: list):
+        char_counts = []
+        word_counts = []
+        token_pattern = re.compile(self.token_pattern)
+        for text in normalized:
+            char_counts.append(count_char_ngrams(
+                text, self.char_vocabulary_, *self.char_ngram_range
+            ))
+            word_counts.append(count_word_ngrams(
+                token_pattern.findall(text), self.word_vocabulary_, *self.word_ngram_range
+            ))
+        return _hstack(_tfidf(char_counts, self.char_idf_), _tfidf(word_counts, self.word_idf_))
+
+    def get_feature_names_out(self, input_features=None):
+        names = []
+        for prefix, vocabulary in (("char_tfidf", self.char_vocabulary_),
+                                   ("word_tfidf", self.word_vocabulary_)):
+            terms = sorted(vocabulary, key=vocabulary.get)
+            names.extend(f"{prefix}__{term}" for term in terms)
+        return np.asarray(names, dtype=object)
+
+    @classmethod
+    def from_vectorizers(cls, char_vectorizer, word_vectorizer, context_flags: bool = True):
+        """
+        Build fitted FusedFeatures with the vocabularies and idf of two
+        fitted TfidfVectorizers (char, word), keeping their feature indices.
+        """
+        for name, vectorizer, analyzer in (("char", char_vectorizer, 'char'),
+                                           ("word", word_vectorizer, 'word')):
+            _check_supported(name, vectorizer, analyzer)
+        if char_vectorizer.strip_accents != word_vectorizer.strip_accents:
+            raise ValueError("char and word vectorizers strip accents differently")
+
+        features = cls(
+            char_ngram_range=tuple(char_vectorizer.ngram_range),
+            char_min_df=char_vectorizer.min_df,
+            char_max_features=char_vectorizer.max_features,
+            word_ngram_range=tuple(word_vectorizer.ngram_range),
+            word_min_df=word_vectorizer.min_df,
+            word_max_features=word_vectorizer.max_features,
+            strip_accents=char_vectorizer.strip_accents,
+            token_pattern=word_vectorizer.token_pattern,
+            context_flags=context_flags,
+        )
+        features.char_vocabulary_ = dict(char_vectorizer.vocabulary_)
+        features.char_idf_ = np.asarray(char_vectorizer.idf_, dtype=np.float64)
+        features.word_vocabulary_ = dict(word_vectorizer.vocabulary_)
+        features.word_idf_ = np.asarray(word_vectorizer.idf_, dtype=np.float64)
+        return features
+
+
+def count_char_ngrams(text: str, vocabulary: dict, min_n: int, max_n: int) -> Counter:
+    """
+    Counts of in-vocabulary char n-grams, keyed by feature index.
+
+    Each n-gram is sliced, looked up and dropped; only its feature index
+    (or None) is kept, one n at a time, so the list of n-gram strings that
+    the char analyzer builds never exists.
+    """
+    text = _WHITE_SPACES.sub(" ", text)
+    text_len = len(text)
+    get = vocabulary.get
+    counts = Counter()
+    for n in range(min_n, min(max_n + 1, text_len + 1)):
+        counts.update([get(text[i:i + n]) for i in range(text_len - n + 1)])
+    counts.pop(None, None)
+    return counts
+
+
+def count_word_ngrams(tokens: list, vocabulary: dict, min_n: int, max_n: int) -> Counter:
+    """Counts of in-vocabulary word n-grams, keyed by feature index"""
+    get = vocabulary.get
+    counts = Counter()
+    for n in range(min_n, min(max_n + 1, len(tokens) + 1)):
+        if n == 1:
+            counts.update([get(token) for token in tokens])
+        else:
+            counts.update([get(" ".join(tokens[i:i + n])) for i in range(len(tokens) - n + 1)])
+    counts.pop(None, None)
+    return counts
+
+
+def _tfidf(rows: list, idf: np.ndarray):
+    """CSR TF-IDF matrix (l2-normalized rows) from per-row index counts"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, rows), dtype=np.int64, count=len(rows)), out=indptr[1:])
+    indices = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=indptr[-1])
+    data = np.fromiter(chain.from_iterable(map(Counter.values, rows)), dtype=np.float64,
+                       count=indptr[-1])
+    data *= idf[indices]
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(idf)))
+    # Same column order within each row as the vectorizers, so the row
+    # norms are summed in the same order
+    matrix.sort_indices()
+    # The kernel behind sklearn.preprocessing.normalize, minus its input
+    # validation (which costs more than the features of a short prompt)
+    inplace_csr_row_normalize_l2(matrix)
+    return matrix
+
+
+def _hstack(left, right):
+    """[left | right] of two CSR matrices, like sparse.hstack but cheaper per call"""
+    n_rows = left.shape[0]
+    left_lengths = np.diff(left.indptr)
+    right_lengths = np.diff(right.indptr)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(left_lengths + right_lengths, out=indptr[1:])
+    # Stable sort by row keeps each row's left columns before its right ones
+    rows = np.concatenate([np.repeat(np.arange(n_rows), left_lengths),
+                           np.repeat(np.arange(n_rows), right_lengths)])
+    order = np.argsort(rows, kind='stable')
+    data = np.concatenate([left.data, right.data])[order]
+    indices = np.concatenate([left.indices, right.indices + left.shape[1]])[order]
+    return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, left.shape[1] + right.shape[1]))
+
+
+def _fit_block(normalized: list, analyzer, min_df, max_features) -> tuple:
+    """Vocabulary and idf of one block, selected exactly as TfidfVectorizer does"""
+    vectorizer = TfidfVectorizer(
+        analyzer=analyzer, lowercase=False, token_pattern=None,
+        min_df=min_df, max_features=max_features
+    )
+    vectorizer.fit(normalized)
+    return vectorizer.vocabulary_, np.asarray(vectorizer.idf_, dtype=np.float64)
+
+
+def _check_supported(name: str, vectorizer, analyzer: str):
+    """Reject TfidfVectorizer settings FusedFeatures does not reproduce"""
+    if vectorizer.analyzer != analyzer:
+        raise ValueError(f"{name}: analyzer={vectorizer.analyzer!r}, expected {analyzer!r}")
+    if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError(f"{name}: custom preprocessor/tokenizer is not supported")
+    if vectorizer.stop_words is not None:
+        raise ValueError(f"{name}: stop_words is not supported")
+    if vectorizer.strip_accents not in (None, 'unicode', 'ascii'):
+        raise ValueError(f"{name}: strip_accents={vectorizer.strip_accents!r} is not supported")
+    if not vectorizer.lowercase or vectorizer.binary or vectorizer.sublinear_tf:
+        raise ValueError(f"{name}: only lowercase=True, binary=False, sublinear_tf=False are supported")
+    if vectorizer.norm != 'l2' or not vectorizer.use_idf:
+        raise ValueError(f"{name}: only norm='l2' with use_idf=True is supported")
+
+
+def fused_pipeline(pipeline) -> Pipeline:
+    """
+    A trained build_pipeline() pipeline with its FeatureUnion replaced by
+    the equivalent FusedFeatures. The result takes raw prompts.
+    """
+    features = pipeline.named_steps['features']
+    if features.transformer_weights:
+        raise ValueError("FeatureUnion transformer_weights are not supported")
+    vectorizers = dict(features.transformer_list)
+    if set(vectorizers) != {'char_tfidf', 'word_tfidf'}:
+        raise ValueError(f"expected char_tfidf and word_tfidf, got {sorted(vectorizers)}")
+    return Pipeline([
+        ('features', FusedFeatures.from_vectorizers(vectorizers['char_tfidf'],
+                                                    vectorizers['word_tfidf'])),
+        ('classifier', pipeline.named_steps['classifier']),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a trained pipeline to fused feature extraction",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("--data", default="train.txt", help="Prompts to compare on")
+    parser.add_argument("--output", help="Write the fused pipeline here (joblib)")
+    args = parser.parse_args()
+
+    import os
+
+    import joblib
+
+    from preprocess import preprocess_for_ml
+    from train_model import load_data
+
+    pipeline = joblib.load(args.model)
+    fused = fused_pipeline(pipeline)
+
+    texts, _ = load_data(args.data)
+    expected = pipeline.predict_proba([preprocess_for_ml(t) for t in texts])[:, 1]
+    actual = fused.predict_proba(texts)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    print(f"{len(texts)} prompts, max |p_fused - p_pipeline| = {max_diff:.2e}")
+    if max_diff > 1e-9:
+        raise SystemExit("✗ Fused pipeline does not match")
+    print("✓ Fused pipeline matches")
+
+    if args.output:
+        joblib.dump(fused, args.output + ".tmp")
+        os.replace(args.output + ".tmp", args.output)
+        print(f"✓ Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    # Go through the importable module, so a saved pipeline refers to
+    # fused_features.FusedFeatures and not __main__.FusedFeatures
+    import fused_features
+    fused_features.main()
@@ -0,0 +1,228 @@
+"""
+Per-stage latency instrumentation for PIIClassifier
+
+Each classification stage (preprocessing, regex checks, char TF-IDF,
+word TF-IDF, LogisticRegression, decision) is timed with a monotonic
+clock. Timings go into per-stage histograms and, optionally, to
+user-supplied hooks. The histograms are available as a dict and in the
+Prometheus text exposition format.
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+
+STAGES = ("cache", "preprocess", "regex", "cascade", "features", "char_tfidf", "word_tfidf",
+          "char_hash", "word_hash", "lr", "model", "decision", "total")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Running count and sum plus a window of recent samples for percentiles.
+
+    Percentiles are computed over the last `window` observations, so memory
+    stays bounded and old traffic does not mask a recent regression.
+    """
+
+    def __init__(self, window: int = 4096):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank percentile of the recent samples (0.0 if empty)"""
+        return _nearest_rank(sorted(self._samples), q)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self._samples)
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': _nearest_rank(ordered, 0.5),
+            'p95': _nearest_rank(ordered, 0.95),
+            'p99': _nearest_rank(ordered, 0.99),
+        }
+
+
+def _nearest_rank(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class Instrumentation:
+    """
+    Thread-safe collection of per-stage histograms with pluggable hooks.
+
+    Histograms are keyed by (mode, stage), where mode is "single" for
+    classify_prompt and "batch" for classify_batch (batch timings are per
+    call, not per prompt).
+
+    A hook is any callable hook(stage, seconds, mode); exceptions raised by
+    hooks propagate to the caller.
+    """
+
+    def __init__(self, window: int = 4096, hooks: list = None):
+        self.window = window
+        self.hooks = list(hooks or [])
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def observe(self, stage: str, seconds: float, mode: str = "single"):
+        """Record one stage timing and pass it to the hooks"""
+        key = (mode, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.window)
+            histogram.observe(seconds)
+        for hook in self.hooks:
+            hook(stage, seconds, mode)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def stats(self) -> dict:
+        """
+        Return {mode: {stage: {count, sum, max, p50, p95, p99}}} in seconds.
+        """
+        with self._lock:
+            items = [(key, histogram.snapshot()) for key, histogram in self._histograms.items()]
+
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        result = {}
+        for (mode, stage), snapshot in sorted(
+            items, key=lambda item: (item[0][0], order.get(item[0][1], len(order)), item[0][1])
+        ):
+            result.setdefault(mode, {})[stage] = snapshot
+        return result
+
+    def prometheus_text(self, prefix: str = "pii_classifier") -> str:
+        """
+        Render the histograms in the Prometheus text exposition format
+        (as a summary with p50/p95/p99 quantiles).
+        """
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Latency of each classification stage in seconds.",
+            f"# TYPE {name} summary",
+        ]
+        for mode, stages in self.stats().items():
+            for stage, snapshot in stages.items():
+                labels = f'mode="{mode}",stage="{stage}"'
+                for q in QUANTILES:
+                    value = snapshot[f"p{round(q * 100)}"]
+                    lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.9g}')
+                lines.append(f"{name}_sum{{{labels}}} {snapshot['sum']:.9g}")
+                lines.append(f"{name}_count{{{labels}}} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+    def print_report(self):
+        """Print a per-stage latency table (milliseconds)"""
+        print("=" * 80)
+        print("STAGE LATENCY (ms)")
+        print("=" * 80)
+        for mode, stages in self.stats().items():
+            print(f"\n[{mode}]")
+            print(f"{'Stage':<12} {'Count':>8} {'Mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'Max':>9}")
+            print("-" * 80)
+            for stage, s in stages.items():
+                mean = s['sum'] / s['count'] if s['count'] else 0.0
+                print(f"{stage:<12} {s['count']:>8} {mean * 1e3:>9.3f} {s['p50'] * 1e3:>9.3f} "
+                      f"{s['p95'] * 1e3:>9.3f} {s['p99'] * 1e3:>9.3f} {s['max'] * 1e3:>9.3f}")
+
+
+def staged_predict_proba(pipeline, texts: list, observe, clock) -> np.ndarray:
+    """
+    Positive-class probabilities with each model stage timed separately.
+
+    Supports the sklearn Pipeline from train_model.build_pipeline() and the
+    NumPy scorers (.npz/.mmap); for those the per-block TF-IDF timings
+    include the dot product with the block's weights. Fused feature
+    pipelines (fused_features.py) build both blocks in one "features"
+    stage. Anything else is timed as a single "model" stage. Results are identical to
+    pipeline.predict_proba(texts)[:, 1].
+
+    Args:
+        observe: Callable observe(stage, seconds)
+        clock: Monotonic clock, e.g. time.perf_counter
+    """
+    named_steps = getattr(pipeline, 'named_steps', None)
+    if named_steps is not None and 'features' in named_steps and 'classifier' in named_steps:
+        return _staged_sklearn(named_steps['features'], named_steps['classifier'],
+                               texts, observe, clock)
+    if hasattr(pipeline, 'vectorizers') and hasattr(pipeline, 'intercept'):
+        return _staged_numpy(pipeline, texts, observe, clock)
+
+    start = clock()
+    proba = pipeline.predict_proba(texts)[:, 1]
+    observe("model", clock() - start)
+    return proba
+
+
+def _staged_sklearn(features, classifier, texts, observe, clock):
+    from scipy import sparse
+
+    if not hasattr(features, 'transformer_list'):
+        start = clock()
+        matrix = features.transform(texts)
+        observe("features", clock() - start)
+        start = clock()
+        proba = classifier.predict_proba(matrix)[:, 1]
+        observe("lr", clock() - start)
+        return proba
+
+    blocks = []
+    for name, transformer in features.transformer_list:
+        if isinstance(transformer, str):  # "drop"
+            continue
+        start = clock()
+        block = transformer.transform(texts)
+        weight = (features.transformer_weights or {}).get(name)
+        if weight is not None:
+            block = block * weight
+        blocks.append(block)
+        observe(name, clock() - start)
+
+    start = clock()
+    matrix = sparse.hstack(blocks).tocsr()
+    proba = classifier.predict_proba(matrix)[:, 1]
+    observe("lr", clock() - start)
+    return proba
+
+
+def _staged_numpy(scorer, texts, observe, clock):
+    scores = np.full(len(texts), scorer.intercept, dtype=np.float64)
+    for vectorizer in scorer.vectorizers:
+        start = clock()
+        for row, text in enumerate(texts):
+            indices, values = vectorizer.weights(text)
+            scores[row] += np.dot(values, vectorizer.coef[indices])
+        observe(vectorizer.name, clock() - start)
+
+    start = clock()
+    with np.errstate(over='ignore'):
+        proba = 1.0 / (1.0 + np.exp(-scores))
+    observe("lr", clock() - start)
+    return proba
@@ -0,0 +1,125 @@
+"""
+Multi-set keyword matching in a single pass (Aho-Corasick)
+
+All keywords of all marker sets are compiled once into one automaton;
+matching walks the text once, whatever the number of keywords, and
+reports which sets had at least one hit. Overlapping keywords are all
+found ("me" inside "demo" counts for both sets that contain them).
+
+Each set is matched either as plain substrings (like `w in text`) or as
+whole words, with the same word-character rule as the regex `\\b`.
+
+Usage:
+    matcher = KeywordMatcher({
+        'EXAMPLE': (["example", "dummy"], False),
+        'PII_REF': (["email", "phone"], True),   # whole words only
+    })
+    matcher.find_sets("my email is ...")   # -> {'PII_REF'}
+"""
+
+from collections import deque
+
+
+def is_word_char(ch: str) -> bool:
+    """Same definition of a word character as re's \\w for str patterns"""
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over named keyword sets.
+
+    The failure links are folded into a complete transition table (one dict
+    per state), so matching costs one dict lookup per character. Characters
+    that appear in no keyword lead back to the root state.
+
+    Args:
+        keyword_sets: {name: (keywords, whole_words)}. Keywords are matched
+            as given (callers lowercase both sides for case-insensitive
+            matching); whole_words requires a non-word character or the
+            text edge on both sides of a match.
+    """
+
+    def __init__(self, keyword_sets: dict):
+        self.names = frozenset(keyword_sets)
+        self.whole_word_sets = frozenset(
+            name for name, (_, whole_words) in keyword_sets.items() if whole_words
+        )
+
+        goto = [{}]
+        # Per state: names of substring sets with a keyword ending here, and
+        # (name, length) of whole-word keywords ending here
+        substring_hits = [set()]
+        word_hits = [set()]
+
+        for name, (keywords, whole_words) in keyword_sets.items():
+            for keyword in keywords:
+                if not keyword:
+                    raise ValueError(f"empty keyword in set {name!r}")
+                state = 0
+                for ch in keyword:
+                    following = goto[state].get(ch)
+                    if following is None:
+                        following = len(goto)
+                        goto[state][ch] = following
+                        goto.append({})
+                        substring_hits.append(set())
+                        word_hits.append(set())
+                    state = following
+                if whole_words:
+                    word_hits[state].add((name, len(keyword)))
+                else:
+                    substring_hits[state].add(name)
+
+        # Breadth-first: a state's failure target is always finished first,
+        # so its outputs and transitions can be inherited directly
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            substring_hits[state] |= substring_hits[fail[state]]
+            word_hits[state] |= word_hits[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            for ch, following in goto[state].items():
+                fail[following] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(following)
+
+        self._delta = delta
+        self._substring_hits = [frozenset(hits) for hits in substring_hits]
+        self._word_hits = [tuple(hits) for hits in word_hits]
+        self._accepting = [bool(s or w) for s, w in zip(substring_hits, word_hits)]
+
+    @property
+    def state_count(self) -> int:
+        return len(self._delta)
+
+    def find_sets(self, text: str) -> set:
+        """
+        Names of the sets with at least one keyword in text.
+
+        Stops reading as soon as every set has been found.
+        """
+        delta = self._delta
+        accepting = self._accepting
+        remaining = len(self.names)
+        found = set()
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = delta[state].get(ch, 0)
+            if not accepting[state]:
+                continue
+            before = len(found)
+            found |= self._substring_hits[state]
+            for name, length in self._word_hits[state]:
+                if name not in found and _is_whole_word(text, end - length, end):
+                    found.add(name)
+            if len(found) != before and len(found) == remaining:
+                break
+        return found
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    return ((start == 0 or not is_word_char(text[start - 1]))
+            and (end == len(text) or not is_word_char(text[end])))
@@ -0,0 +1,133 @@
+"""
+Load test for the local classifier service (server.py)
+
+Opens several keep-alive connections, sends prompts from train.txt as
+fast as each connection allows and reports latency percentiles and
+throughput.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+from train_model import load_data
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def send_request(reader, writer, host: str, path: str, payload: dict) -> int:
+    """Send one POST request on an open connection and return the status code"""
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(host, port, path, payloads, latencies, statuses):
+    """Send payloads one after another over a single keep-alive connection"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        statuses['connect_error'] += len(payloads)
+        return
+    try:
+        for sent, payload in enumerate(payloads):
+            start = time.perf_counter()
+            try:
+                status = await send_request(reader, writer, host, path, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed the connection (e.g. graceful shutdown)
+                statuses['connection_closed'] += len(payloads) - sent
+                return
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, requests, concurrency, batch_size, prompts):
+    """Run the load test and return (latencies, statuses, elapsed seconds)"""
+    source = itertools.cycle(prompts)
+    if batch_size > 1:
+        path = "/classify_batch"
+        payloads = [
+            {'prompts': list(itertools.islice(source, batch_size))}
+            for _ in range(requests)
+        ]
+    else:
+        path = "/classify"
+        payloads = [{'prompt': next(source)} for _ in range(requests)]
+
+    # Spread requests evenly over the connections
+    shares = [payloads[i::concurrency] for i in range(concurrency)]
+    latencies = []
+    statuses = Counter()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(host, port, path, share, latencies, statuses)
+        for share in shares if share
+    ))
+    elapsed = time.perf_counter() - start
+
+    return latencies, statuses, elapsed
+
+
+def report(latencies, statuses, elapsed, batch_size):
+    """Print latency percentiles and throughput"""
+    latencies = sorted(latencies)
+    ok = statuses.get(200, 0)
+
+    print("=" * 80)
+    print("LOAD TEST RESULTS")
+    print("=" * 80)
+    print(f"\nRequests:    {len(latencies)} in {elapsed:.2f}s")
+    print(f"Status:      {dict(statuses)}")
+    print(f"Throughput:  {len(latencies) / elapsed:.1f} req/s, "
+          f"{ok * batch_size / elapsed:.1f} prompts/s (successful)")
+    print("\nLatency (ms):")
+    for pct in (50, 90, 99):
+        print(f"  p{pct:<3} {percentile(latencies, pct) * 1000:8.2f}")
+    print(f"  max  {latencies[-1] * 1000 if latencies else 0.0:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="Parallel connections")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Prompts per request (>1 uses /classify_batch)")
+    parser.add_argument("--data", default="train.txt", help="Prompt source in train.txt format")
+    args = parser.parse_args()
+
+    texts, _ = load_data(args.data)
+    latencies, statuses, elapsed = asyncio.run(run_load_test(
+        args.host, args.port, args.requests, args.concurrency, args.batch_size, texts
+    ))
+    report(latencies, statuses, elapsed, args.batch_size)
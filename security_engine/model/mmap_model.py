@@ -0,0 +1,230 @@
+"""
+Memory-mapped, array-backed model artifact
+
+All model data lives in flat arrays inside one file that is opened with
+mmap, so every worker process that loads it shares the same physical
+pages instead of building its own Python dicts:
+
+    [8-byte magic][8-byte header length][JSON header][64-byte aligned arrays]
+
+Per TF-IDF block the file stores the vocabulary as a sorted fixed-width
+string array, with IDF and LogisticRegression weights in the same order.
+Terms are looked up with a vectorized binary search (np.searchsorted).
+
+Usage:
+    python mmap_model.py                                   # pii_intent_lr.npz -> pii_intent_lr.mmap
+    python mmap_model.py pii_intent_lr.joblib pii_intent_lr.mmap
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections import Counter
+
+import numpy as np
+
+from numpy_scorer import (
+    FORMAT_VERSION, QUANTIZED_FORMAT_VERSION, NumpyScorer, VectorizerSpec, load_coef
+)
+
+
+MAGIC = b"PIIMMAP1"
+ALIGNMENT = 64
+
+
+def _load_source_arrays(path: str) -> dict:
+    """Read the arrays of an exported .npz or a joblib pipeline"""
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    import joblib
+    from export_model import extract_arrays
+    return extract_arrays(joblib.load(path))
+
+
+def write_mmap_model(arrays: dict, path: str):
+    """
+    Write model arrays (as produced by export_model.extract_arrays) to an
+    mmap-able artifact.
+    """
+    meta = json.loads(str(arrays['meta']))
+    if meta.get('format_version') not in (FORMAT_VERSION, QUANTIZED_FORMAT_VERSION):
+        raise ValueError(f"Unsupported model format {meta.get('format_version')}")
+
+    coef = load_coef(arrays)
+    blocks = {}
+    offset = 0
+    for spec in meta['vectorizers']:
+        name = spec['name']
+        terms = np.asarray(arrays[f"{name}__terms"], dtype=str)
+        if any('\x00' in term for term in terms.tolist()):
+            raise ValueError(f"{name}: vocabulary terms containing NUL are not supported")
+
+        # Store everything in sorted-term order so lookups are binary searches
+        order = np.argsort(terms, kind="stable")
+        blocks[f"{name}__terms"] = terms[order]
+        blocks[f"{name}__coef"] = coef[offset:offset + len(terms)][order]
+        if spec['use_idf']:
+            idf = np.asarray(arrays[f"{name}__idf"], dtype=np.float64)
+            blocks[f"{name}__idf"] = idf[order]
+        offset += len(terms)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'vectorizers': meta['vectorizers'],
+        'intercept': float(arrays['intercept']),
+        'classes': np.asarray(arrays['classes']).tolist(),
+        'arrays': {},
+    }
+
+    # Lay out arrays after the header, each aligned to ALIGNMENT bytes
+    def layout(header_size):
+        position = _align(16 + header_size)
+        entries = {}
+        for name, array in blocks.items():
+            entries[name] = {
+                'offset': position,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+            }
+            position = _align(position + array.nbytes)
+        return entries
+
+    # Offsets depend on the header size and vice versa; iterate to a fixed point
+    header_bytes = b""
+    while True:
+        header['arrays'] = layout(len(header_bytes))
+        encoded = json.dumps(header).encode("utf-8")
+        done = len(encoded) == len(header_bytes)
+        header_bytes = encoded
+        if done:
+            break
+
+    # Never rewrite a mapped file in place (readers would see it change
+    # underneath them); write a new file and rename it over the old one
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in blocks.items():
+            f.write(b"\0" * (header['arrays'][name]['offset'] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def _align(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class MmapVectorizer(VectorizerSpec):
+    """TF-IDF block whose vocabulary is a sorted, memory-mapped string array"""
+
+    def __init__(self, meta: dict, terms, idf, coef):
+        super().__init__(meta, [], idf, coef)
+        self.terms = terms
+        self.vocabulary = None
+        self._width = terms.dtype.itemsize // np.dtype('U1').itemsize
+
+    def lookup(self, grams: list) -> tuple:
+        """Map n-grams to (sorted positions, counts) with one vectorized search"""
+        counts = Counter(grams)
+        # Longer keys cannot be in the vocabulary and would be truncated;
+        # NUL would be confused with fixed-width padding
+        keys = [k for k in counts if len(k) <= self._width and '\x00' not in k]
+        if not keys or not len(self.terms):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+        queries = np.array(keys, dtype=self.terms.dtype)
+        positions = np.searchsorted(self.terms, queries)
+        positions[positions == len(self.terms)] = 0
+        found = self.terms[positions] == queries
+
+        return (
+            positions[found],
+            np.fromiter((counts[k] for k in keys), dtype=np.float64, count=len(keys))[found],
+        )
+
+
+def _read_header(path: str, buffer) -> dict:
+    """
+    Parse and check the header of a mapped artifact.
+
+    Raises:
+        ValueError: If the file is not an artifact of this format, or any
+            array it lists lies beyond the end of the file
+    """
+    if buffer[:8] != MAGIC:
+        raise ValueError(f"{path} is not an mmap model artifact")
+    (header_size,) = struct.unpack("<Q", buffer[8:16])
+    header = json.loads(buffer[16:16 + header_size].decode("utf-8"))
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format {header.get('format_version')} in {path}")
+
+    for spec in header['vectorizers']:
+        names = ["terms", "coef"] + (["idf"] if spec['use_idf'] else [])
+        for name in (f"{spec['name']}__{suffix}" for suffix in names):
+            entry = header['arrays'][name]
+            size = int(np.prod(entry['shape'])) * np.dtype(entry['dtype']).itemsize
+            if entry['offset'] + size > len(buffer):
+                raise ValueError(f"{path} is truncated ({name} out of bounds)")
+    return header
+
+
+class MmapScorer(NumpyScorer):
+    """NumpyScorer backed by a memory-mapped artifact shared across processes"""
+
+    def __init__(self, vectorizers, intercept, classes, meta=None, buffer=None):
+        super().__init__(vectorizers, intercept, classes, meta)
+        self._buffer = buffer
+
+    @classmethod
+    def load(cls, path: str) -> "MmapScorer":
+        """Map an artifact written by write_mmap_model() read-only"""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            header = _read_header(path, buffer)
+        except Exception:
+            # No array views exist yet, so the buffer can still be closed
+            buffer.close()
+            raise
+
+        def view(name):
+            entry = header['arrays'][name]
+            count = int(np.prod(entry['shape']))
+            return np.frombuffer(buffer, dtype=entry['dtype'], count=count, offset=entry['offset'])
+
+        vectorizers = [
+            MmapVectorizer(
+                spec,
+                view(f"{spec['name']}__terms"),
+                view(f"{spec['name']}__idf") if spec['use_idf'] else None,
+                view(f"{spec['name']}__coef")
+            )
+            for spec in header['vectorizers']
+        ]
+        return cls(vectorizers, header['intercept'], np.array(header['classes']), header, buffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert a model to the mmap-able array format",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("source", nargs="?", default="pii_intent_lr.npz",
+                        help="Exported .npz or joblib pipeline")
+    parser.add_argument("output", nargs="?", default="pii_intent_lr.mmap", help="Artifact to write")
+    args = parser.parse_args()
+
+    write_mmap_model(_load_source_arrays(args.source), args.output)
+    print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
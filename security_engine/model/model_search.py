@@ -0,0 +1,280 @@
+"""
+Parallel search over n-gram ranges, feature caps and classifier settings
+
+Every configuration of the grid is cross-validated on the training part
+of the train_model.py split (80/20, stratified, seed 42), with the folds
+cross_val_score would use, and timed for per-prompt inference:
+
+    1. Each distinct char and word TF-IDF block is fitted once per fold,
+       in parallel, through feature_cache.FeatureCache. Configurations
+       that share a block reuse it, and so do later searches.
+    2. Each combination of blocks is stacked like FeatureUnion does and
+       every classifier setting is fitted on it, in parallel across
+       combinations and folds.
+    3. Latency is measured afterwards, one process at a time: the model
+       time of predict_proba on single prompts (preprocessing excluded,
+       it is the same for every configuration). C and class_weight do
+       not change the cost, so configurations that differ only in those
+       share one measurement.
+
+The Pareto front holds the configurations that no other configuration
+beats on both F1 and latency. --min-recall picks the fastest
+configuration whose recall is high enough.
+
+Usage:
+    python train_model.py --search
+    python train_model.py --search --folds 3 --jobs 4 --min-recall 0.995
+    python train_model.py --search --grid grid.json     # {"C": [0.1, 1], ...}
+"""
+
+import inspect
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.metrics import f1_score, precision_score, recall_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from feature_cache import DEFAULT_CACHE_DIR, FeatureCache
+from train_model import _tfidf_block, build_classifier, build_pipeline, load_data
+
+
+DEFAULT_GRID = {
+    'char_ngram_range': [(3, 5), (3, 4), (2, 4)],
+    'char_max_features': [2000, 5000],
+    'word_ngram_range': [(1, 2), (1, 3)],
+    'word_max_features': [1000, 3000],
+    'C': [0.3, 1.0, 3.0],
+    'class_weight': ['balanced', None],
+}
+
+CHAR_PARAMS = ('char_ngram_range', 'char_max_features')
+WORD_PARAMS = ('word_ngram_range', 'word_max_features')
+CLASSIFIER_PARAMS = ('C', 'class_weight')
+
+
+def _combinations(grid: dict, names: tuple) -> list:
+    """Every assignment of the grid values of names, as dicts"""
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def _char_block(params: dict):
+    return _tfidf_block('char', params['char_ngram_range'], params['char_max_features'])
+
+
+def _word_block(params: dict):
+    return _tfidf_block('word', params['word_ngram_range'], params['word_max_features'])
+
+
+def _fit_block(cache_dir: str, block, train_texts: list, test_texts: list):
+    FeatureCache(cache_dir).fit_transform(block, train_texts, test_texts)
+
+
+def _score_fold(cache_dir: str, char_key: str, word_key: str, y_train, y_test,
+                classifier_grid: list) -> list:
+    """F1/precision/recall of every classifier setting on one fold"""
+    cache = FeatureCache(cache_dir)
+    _, char_train, char_test = cache.load(char_key, held_out=True)
+    _, word_train, word_test = cache.load(word_key, held_out=True)
+    X_train = sparse.hstack([char_train, word_train]).tocsr()
+    X_test = sparse.hstack([char_test, word_test]).tocsr()
+
+    scores = []
+    for params in classifier_grid:
+        y_pred = build_classifier(**params).fit(X_train, y_train).predict(X_test)
+        scores.append((
+            f1_score(y_test, y_pred),
+            precision_score(y_test, y_pred, zero_division=0),
+            recall_score(y_test, y_pred),
+        ))
+    return scores
+
+
+def _latency_ms(pipelines: list, prompts: list, rounds: int = 3) -> list:
+    """
+    Model milliseconds per single-prompt predict_proba for each pipeline.
+
+    Pipelines are timed in interleaved rounds and the fastest round is
+    kept, so background noise does not favour whichever ran first.
+    """
+    best = [float('inf')] * len(pipelines)
+    for _ in range(rounds):
+        for i, pipeline in enumerate(pipelines):
+            start = time.perf_counter()
+            for prompt in prompts:
+                pipeline.predict_proba([prompt])
+            best[i] = min(best[i], time.perf_counter() - start)
+    return [seconds / len(prompts) * 1e3 for seconds in best]
+
+
+def pareto_front(results: list) -> list:
+    """Results not dominated on (higher F1, lower latency), fastest first"""
+    front = []
+    for result in results:
+        dominated = any(
+            other['f1'] >= result['f1'] and other['latency_ms'] <= result['latency_ms']
+            and (other['f1'] > result['f1'] or other['latency_ms'] < result['latency_ms'])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda result: (result['latency_ms'], -result['f1']))
+
+
+def train_command(params: dict) -> str:
+    """train_model.py command line that trains the configuration params"""
+    class_weight = params['class_weight'] or 'none'
+    return (f"python train_model.py --char-ngrams {params['char_ngram_range'][0]} "
+            f"{params['char_ngram_range'][1]} --char-max-features {params['char_max_features']} "
+            f"--word-ngrams {params['word_ngram_range'][0]} {params['word_ngram_range'][1]} "
+            f"--word-max-features {params['word_max_features']} -C {params['C']} "
+            f"--class-weight {class_weight}")
+
+
+def load_grid(path: str = None) -> dict:
+    """DEFAULT_GRID, with the entries of a JSON file (if given) replacing its own"""
+    grid = dict(DEFAULT_GRID)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            grid.update(json.load(f))
+    for name in ('char_ngram_range', 'word_ngram_range'):
+        grid[name] = [tuple(ngram_range) for ngram_range in grid[name]]
+    return grid
+
+
+def search(data_path: str = "train.txt", grid: dict = None, folds: int = 5, jobs: int = -1,
+           cache_dir: str = DEFAULT_CACHE_DIR, latency_prompts: int = 200) -> list:
+    """
+    Cross-validate and time every configuration of grid.
+
+    Returns:
+        One dict per configuration: params, f1, f1_std, precision, recall,
+        latency_ms, n_features and pareto (on the front or not)
+    """
+    grid = grid or DEFAULT_GRID
+    texts, labels = load_data(data_path)
+    X_train, _, y_train, _ = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    cache = FeatureCache(cache_dir)
+    inputs = cache.model_inputs(build_pipeline(), X_train)
+    y = np.asarray(y_train)
+    splits = list(StratifiedKFold(n_splits=folds).split(inputs, y))
+    fold_texts = [([inputs[i] for i in train], [inputs[i] for i in test]) for train, test in splits]
+
+    char_grid = _combinations(grid, CHAR_PARAMS)
+    word_grid = _combinations(grid, WORD_PARAMS)
+    classifier_grid = _combinations(grid, CLASSIFIER_PARAMS)
+    feature_grid = list(itertools.product(range(len(char_grid)), range(len(word_grid))))
+    n_configs = len(feature_grid) * len(classifier_grid)
+
+    # 1. Fit every block once per fold
+    blocks = [_char_block(p) for p in char_grid] + [_word_block(p) for p in word_grid]
+    keys = [[cache.entry_key(block, train, test) for block in blocks] for train, test in fold_texts]
+    todo = [(block, fold) for fold in range(folds) for b, block in enumerate(blocks)
+            if not cache.has(keys[fold][b], held_out=True)]
+    print(f"\n{n_configs} configurations, {folds} folds: fitting {len(todo)} of "
+          f"{len(blocks) * folds} feature blocks ({len(blocks) * folds - len(todo)} cached)")
+    start = time.perf_counter()
+    Parallel(n_jobs=jobs)(
+        delayed(_fit_block)(cache_dir, block, *fold_texts[fold]) for block, fold in todo
+    )
+    print(f"   ✓ Feature blocks ready in {time.perf_counter() - start:.1f}s")
+
+    # 2. Every classifier setting on every block combination and fold
+    start = time.perf_counter()
+    word_offset = len(char_grid)
+    fold_scores = Parallel(n_jobs=jobs)(
+        delayed(_score_fold)(cache_dir, keys[fold][c], keys[fold][word_offset + w],
+                             y[train], y[test], classifier_grid)
+        for c, w in feature_grid for fold, (train, test) in enumerate(splits)
+    )
+    print(f"   ✓ {n_configs * folds} classifier fits in {time.perf_counter() - start:.1f}s")
+
+    # 3. Latency of each block combination, fitted on the first fold
+    rng = np.random.default_rng(42)
+    sample = [fold_texts[0][1][i] for i in rng.choice(len(fold_texts[0][1]),
+                                                       min(latency_prompts, len(fold_texts[0][1])),
+                                                       replace=False)]
+    fitted_blocks = [cache.load(key)[0] for key in keys[0]]
+    pipelines, n_features = [], []
+    for c, w in feature_grid:
+        features = FeatureUnion([('char_tfidf', fitted_blocks[c]),
+                                 ('word_tfidf', fitted_blocks[word_offset + w])])
+        classifier = build_classifier().fit(features.transform(fold_texts[0][0]), y[splits[0][0]])
+        pipelines.append(Pipeline([('features', features), ('classifier', classifier)]))
+        n_features.append(len(fitted_blocks[c].vocabulary_) +
+                          len(fitted_blocks[word_offset + w].vocabulary_))
+    latencies = _latency_ms(pipelines, sample)
+
+    results = []
+    for f, (c, w) in enumerate(feature_grid):
+        per_fold = fold_scores[f * folds:(f + 1) * folds]
+        for k, classifier_params in enumerate(classifier_grid):
+            f1, precision, recall = np.array([scores[k] for scores in per_fold]).T
+            results.append({
+                'params': {**char_grid[c], **word_grid[w], **classifier_params},
+                'f1': float(f1.mean()),
+                'f1_std': float(f1.std()),
+                'precision': float(precision.mean()),
+                'recall': float(recall.mean()),
+                'latency_ms': latencies[f],
+                'n_features': n_features[f],
+            })
+
+    front = pareto_front(results)
+    for result in results:
+        result['pareto'] = any(result is point for point in front)
+    return results
+
+
+def _describe(params: dict) -> str:
+    class_weight = params['class_weight'] or 'none'
+    return (f"char {params['char_ngram_range'][0]}-{params['char_ngram_range'][1]}/"
+            f"{params['char_max_features']} word {params['word_ngram_range'][0]}-"
+            f"{params['word_ngram_range'][1]}/{params['word_max_features']} "
+            f"C={params['C']:g} {class_weight}")
+
+
+def report(results: list, min_recall: float = None, output: str = None):
+    """Print the Pareto front (and the --min-recall pick), optionally save all results"""
+    front = sorted((r for r in results if r['pareto']),
+                   key=lambda result: (result['latency_ms'], -result['f1']))
+
+    print("\n" + "=" * 80)
+    print("PARETO FRONT (F1 vs per-prompt latency)")
+    print("=" * 80)
+    print(f"\n{'Configuration':<44} {'F1':>7} {'Prec':>7} {'Recall':>7} {'ms':>6} {'Feats':>6}")
+    print("-" * 80)
+    for r in front:
+        print(f"{_describe(r['params']):<44} {r['f1']:>7.4f} {r['precision']:>7.4f} "
+              f"{r['recall']:>7.4f} {r['latency_ms']:>6.3f} {r['n_features']:>6}")
+
+    signature = inspect.signature(build_pipeline).parameters
+    defaults = {name: signature[name].default for name in CHAR_PARAMS + WORD_PARAMS + CLASSIFIER_PARAMS}
+    for r in results:
+        if r['params'] == defaults:
+            print(f"\nCurrent model: {_describe(r['params'])}  F1 {r['f1']:.4f}  "
+                  f"recall {r['recall']:.4f}  {r['latency_ms']:.3f} ms"
+                  f"{'' if r['pareto'] else '  (not on the front)'}")
+
+    if min_recall is not None:
+        eligible = [r for r in results if r['recall'] >= min_recall]
+        if eligible:
+            pick = min(eligible, key=lambda result: (result['latency_ms'], -result['f1']))
+            print(f"\nFastest with recall >= {min_recall}: {_describe(pick['params'])}  "
+                  f"F1 {pick['f1']:.4f}  recall {pick['recall']:.4f}  {pick['latency_ms']:.3f} ms")
+            print(f"  {train_command(pick['params'])}")
+        else:
+            print(f"\nNo configuration reaches recall >= {min_recall}")
+
+    if output:
+        with open(output + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        os.replace(output + ".tmp", output)
+        print(f"\n✓ All {len(results)} configurations saved to {output}")
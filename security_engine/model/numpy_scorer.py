@@ -0,0 +1,226 @@
+"""
+NumPy-only inference for the exported PII intent model
+
+Reproduces Pipeline.predict_proba of the trained TF-IDF + LogisticRegression
+pipeline without importing scikit-learn or joblib. The artifact is written
+by export_model.py.
+"""
+
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+# int8 weights with a 'coef_scale' (compress_model.py --quantize int8 --export)
+QUANTIZED_FORMAT_VERSION = 2
+
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def quantize_coef(coef: np.ndarray, dtype: str) -> tuple:
+    """
+    Round weights to float16 or symmetric int8.
+
+    Returns:
+        (stored array, scale or None, float64 weights the stored form decodes to)
+    """
+    if dtype == 'float16':
+        stored = coef.astype(np.float16)
+        return stored, None, stored.astype(np.float64)
+    if dtype == 'int8':
+        scale = float(np.max(np.abs(coef))) / 127 or 1.0
+        stored = np.round(coef / scale).astype(np.int8)
+        return stored, scale, stored.astype(np.float64) * scale
+    raise ValueError(f"unsupported quantization {dtype!r}")
+
+
+def load_coef(arrays) -> np.ndarray:
+    """LogisticRegression weights of an artifact as float64, undoing quantization"""
+    coef = np.asarray(arrays['coef'], dtype=np.float64)
+    if 'coef_scale' in arrays:
+        coef = coef * float(arrays['coef_scale'])
+    return coef
+
+
+def strip_accents_unicode(text: str) -> str:
+    """Remove accents the same way as sklearn's strip_accents='unicode'"""
+    try:
+        text.encode("ASCII", errors="strict")
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", text)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def strip_accents_ascii(text: str) -> str:
+    """Remove accents the same way as sklearn's strip_accents='ascii'"""
+    normalized = unicodedata.normalize("NFKD", text)
+    return normalized.encode("ASCII", "ignore").decode("ASCII")
+
+
+_ACCENT_FUNCTIONS = {
+    None: None,
+    'unicode': strip_accents_unicode,
+    'ascii': strip_accents_ascii,
+}
+
+
+def normalize_text(text: str, lowercase: bool = True, strip_accents: str = 'unicode') -> str:
+    """Lowercase, then strip accents (sklearn's preprocessing order)"""
+    if lowercase:
+        text = text.lower()
+    accent_function = _ACCENT_FUNCTIONS[strip_accents]
+    if accent_function is not None:
+        text = accent_function(text)
+    return text
+
+
+def char_ngrams(text: str, min_n: int, max_n: int) -> list:
+    """Character n-grams of normalized text (analyzer='char')"""
+    text = _WHITE_SPACES.sub(" ", text)
+    text_len = len(text)
+    grams = []
+    for n in range(min_n, min(max_n + 1, text_len + 1)):
+        grams.extend(text[i:i + n] for i in range(text_len - n + 1))
+    return grams
+
+
+def word_ngrams(tokens: list, min_n: int, max_n: int) -> list:
+    """Word n-grams of a token list (analyzer='word')"""
+    n_tokens = len(tokens)
+    if max_n == 1:
+        return list(tokens)
+    grams = list(tokens) if min_n == 1 else []
+    for n in range(max(min_n, 2), min(max_n + 1, n_tokens + 1)):
+        grams.extend(" ".join(tokens[i:i + n]) for i in range(n_tokens - n + 1))
+    return grams
+
+
+class VectorizerSpec:
+    """
+    Vocabulary, weights and analyzer settings of one TF-IDF block.
+
+    idf and coef are indexed by the block's own feature indices; coef holds
+    the LogisticRegression weights of this block's columns.
+    """
+
+    def __init__(self, meta: dict, terms, idf, coef):
+        self.name = meta['name']
+        self.analyzer = meta['analyzer']
+        self.min_n, self.max_n = meta['ngram_range']
+        self.lowercase = meta['lowercase']
+        self.strip_accents = meta['strip_accents']
+        self.token_pattern = re.compile(meta['token_pattern'])
+        self.norm = meta['norm']
+        self.sublinear_tf = meta['sublinear_tf']
+        self.binary = meta['binary']
+        self.idf = idf
+        self.coef = coef
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+
+    def __len__(self):
+        return len(self.coef)
+
+    def analyze(self, text: str) -> list:
+        """Return the n-grams sklearn's analyzer would produce for text"""
+        text = normalize_text(text, self.lowercase, self.strip_accents)
+        if self.analyzer == 'char':
+            return char_ngrams(text, self.min_n, self.max_n)
+        return word_ngrams(self.token_pattern.findall(text), self.min_n, self.max_n)
+
+    def lookup(self, grams: list) -> tuple:
+        """Map n-grams to (feature indices, counts) for in-vocabulary terms"""
+        get = self.vocabulary.get
+        counts = {}
+        for gram in grams:
+            j = get(gram)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        return (
+            np.fromiter(counts.keys(), dtype=np.intp, count=len(counts)),
+            np.fromiter(counts.values(), dtype=np.float64, count=len(counts)),
+        )
+
+    def weights(self, text: str) -> tuple:
+        """Return (feature indices, normalized TF-IDF values) for one text"""
+        indices, values = self.lookup(self.analyze(text))
+        if self.binary:
+            values = np.ones_like(values)
+        elif self.sublinear_tf:
+            values = np.log(values) + 1.0
+        if self.idf is not None:
+            values = values * self.idf[indices]
+        if self.norm == 'l2':
+            norm = np.sqrt(np.dot(values, values))
+            if norm > 0:
+                values = values / norm
+        elif self.norm == 'l1':
+            norm = np.abs(values).sum()
+            if norm > 0:
+                values = values / norm
+        return indices, values
+
+
+class NumpyScorer:
+    """
+    Drop-in replacement for the trained Pipeline's predict_proba.
+
+    Supports the FeatureUnion of TfidfVectorizers + binary
+    LogisticRegression produced by train_model.build_pipeline().
+    """
+
+    def __init__(self, vectorizers: list, intercept: float, classes, meta: dict = None):
+        self.vectorizers = vectorizers
+        self.intercept = float(intercept)
+        self.classes_ = classes
+        self.meta = meta or {}
+        self.n_features = sum(len(vectorizer) for vectorizer in vectorizers)
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyScorer":
+        """Load an artifact written by export_model.export_pipeline()"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format_version') not in (FORMAT_VERSION, QUANTIZED_FORMAT_VERSION):
+                raise ValueError(
+                    f"Unsupported model format {meta.get('format_version')} in {path}"
+                )
+            coef = load_coef(data)
+            vectorizers = []
+            offset = 0
+            for spec in meta['vectorizers']:
+                terms = data[f"{spec['name']}__terms"].tolist()
+                vectorizers.append(VectorizerSpec(
+                    spec,
+                    terms,
+                    data[f"{spec['name']}__idf"] if spec['use_idf'] else None,
+                    coef[offset:offset + len(terms)]
+                ))
+                offset += len(terms)
+            intercept = float(data['intercept'])
+            classes = data['classes']
+        return cls(vectorizers, intercept, classes, meta)
+
+    def decision_function(self, texts: list):
+        """Linear model scores for a list of (preprocessed) texts"""
+        scores = np.empty(len(texts), dtype=np.float64)
+        for row, text in enumerate(texts):
+            score = self.intercept
+            for vectorizer in self.vectorizers:
+                indices, values = vectorizer.weights(text)
+                score += np.dot(values, vectorizer.coef[indices])
+            scores[row] = score
+        return scores
+
+    def predict_proba(self, texts: list):
+        """Return an (n, 2) array of class probabilities, like sklearn"""
+        with np.errstate(over='ignore'):
+            proba = 1.0 / (1.0 + np.exp(-self.decision_function(texts)))
+        return np.column_stack([1.0 - proba, proba])
+
+    def predict(self, texts: list):
+        """Return predicted class labels"""
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
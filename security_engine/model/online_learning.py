@@ -0,0 +1,318 @@
+"""
+Online learning from reviewer feedback
+
+A logistic model trained by SGD over hashed char and word n-grams (the
+build_pipeline(hashing=True) features, without IDF). The features are
+stateless, so the model is updated batch by batch with partial_fit
+instead of being retrained from scratch.
+
+Feedback files use the train.txt format, one "__label__DISCLOSURE text"
+or "__label__NON_DISCLOSURE text" per line. Updates are saved as
+numbered checkpoints. latest.joblib always holds the newest one;
+PIIClassifier loads it like any other model and hot-reloads it with
+watch_model().
+
+Checkpoint directory:
+    v0001.joblib, v0001.json      model and metadata of each version
+    latest.joblib, latest.json    newest version (atomically replaced)
+
+The metadata records how far each feedback file was read, so a restarted
+--feedback run continues where the last one stopped.
+
+Usage:
+    python online_learning.py --init train.txt                  # start from labelled data
+    python online_learning.py --feedback feedback.txt           # apply new feedback lines
+    python online_learning.py --feedback feedback.txt --follow  # keep applying appended lines
+    python server.py --model online_model/latest.joblib --watch 5
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from preprocess import model_inputs
+from train_model import _hashed_features, load_data, parse_labelled_line
+
+
+DEFAULT_DIR = "online_model"
+CLASSES = np.array([0, 1])
+
+_VERSION_FILE = re.compile(r"v(\d+)\.joblib$")
+
+
+def build_online_pipeline(hash_bits: int = 18, alpha: float = 1e-5) -> Pipeline:
+    """Hashed features + logistic regression trained by SGD"""
+    return Pipeline([
+        ('features', _hashed_features(hash_bits, use_idf=False)),
+        ('classifier', SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)),
+    ])
+
+
+def _atomic_dump(obj, path: str):
+    joblib.dump(obj, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def _atomic_json(data: dict, path: str):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class OnlineTrainer:
+    """
+    Incrementally trained model with versioned checkpoints.
+
+    Resumes from checkpoint_dir/latest.joblib if it exists, otherwise
+    starts an untrained model with the given hash_bits and alpha.
+    """
+
+    def __init__(self, checkpoint_dir: str = DEFAULT_DIR, hash_bits: int = 18,
+                 alpha: float = 1e-5, keep: int = 10):
+        self.checkpoint_dir = checkpoint_dir
+        self.keep = keep
+        latest = os.path.join(checkpoint_dir, "latest.joblib")
+        if os.path.exists(latest):
+            self.pipeline = joblib.load(latest)
+            with open(os.path.join(checkpoint_dir, "latest.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            self.pipeline = build_online_pipeline(hash_bits, alpha)
+            self.meta = {
+                'version': 0,
+                'samples_seen': 0,
+                'batches': 0,
+                'hash_bits': hash_bits,
+                'alpha': alpha,
+                'feedback': {},
+            }
+
+    @property
+    def version(self) -> int:
+        return self.meta['version']
+
+    @property
+    def samples_seen(self) -> int:
+        return self.meta['samples_seen']
+
+    @property
+    def is_trained(self) -> bool:
+        return hasattr(self.pipeline.named_steps['classifier'], 'coef_')
+
+    def partial_fit(self, texts: list, labels: list):
+        """Update the model with one batch of labelled prompts"""
+        if not texts:
+            return
+        features = self.pipeline.named_steps['features'].transform(
+            model_inputs(self.pipeline, texts)
+        )
+        self.pipeline.named_steps['classifier'].partial_fit(
+            features, np.asarray(labels), classes=CLASSES
+        )
+        self.meta['samples_seen'] += len(texts)
+        self.meta['batches'] += 1
+
+    def fit_epochs(self, texts: list, labels: list, epochs: int = 3,
+                   batch_size: int = 256, seed: int = 42):
+        """
+        Train on a whole labelled set in shuffled batches.
+
+        Shuffling matters: train.txt is sorted by label, and SGD fed one
+        class at a time forgets the other.
+        """
+        order = list(range(len(texts)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                self.partial_fit([texts[i] for i in batch], [labels[i] for i in batch])
+
+    def feedback_offset(self, path: str) -> int:
+        """Offset up to which feedback file path has been applied"""
+        return self.meta['feedback'].get(os.path.abspath(path), 0)
+
+    def save_checkpoint(self, feedback_path: str = None, feedback_offset: int = None) -> str:
+        """
+        Write the next version and point latest.joblib at it.
+
+        Returns:
+            Path of the new versioned checkpoint
+        """
+        if not self.is_trained:
+            raise ValueError("cannot checkpoint a model that has not seen any data")
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        meta = dict(self.meta)
+        meta['feedback'] = dict(self.meta['feedback'])
+        if feedback_path is not None:
+            meta['feedback'][os.path.abspath(feedback_path)] = feedback_offset
+        meta['parent'] = self.meta['version'] or None
+        meta['version'] = self.meta['version'] + 1
+        meta['created'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+        path = os.path.join(self.checkpoint_dir, f"v{meta['version']:04d}.joblib")
+        _atomic_dump(self.pipeline, path)
+        _atomic_json(meta, path[:-len(".joblib")] + ".json")
+        # Model before metadata: a reader that sees the new latest.json
+        # always finds the matching latest.joblib
+        _atomic_dump(self.pipeline, os.path.join(self.checkpoint_dir, "latest.joblib"))
+        _atomic_json(meta, os.path.join(self.checkpoint_dir, "latest.json"))
+
+        self.meta = meta
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Delete versioned checkpoints older than the newest `keep`"""
+        if not self.keep:
+            return
+        for path in glob.glob(os.path.join(self.checkpoint_dir, "v*.joblib")):
+            match = _VERSION_FILE.search(path)
+            if match and int(match.group(1)) <= self.version - self.keep:
+                os.remove(path)
+                json_path = path[:-len(".joblib")] + ".json"
+                if os.path.exists(json_path):
+                    os.remove(json_path)
+
+
+def iter_feedback(f, batch_size: int = 256, follow: bool = False, poll: float = 1.0):
+    """
+    Read labelled lines from an open text file in batches.
+
+    In follow mode the file is polled for appended lines forever; a line
+    is only consumed once its newline has been written.
+
+    Yields:
+        (texts, labels, offset, idle): offset is the file position after
+        the batch (for f.seek when resuming); idle is True when no more
+        lines were available yet. Every run of full batches ends with an
+        idle batch, which is empty if the lines filled the last full one
+    """
+    texts, labels = [], []
+    # Whether the reader has signalled idle since the last full batch
+    flushed = True
+    while True:
+        position = f.tell()
+        line = f.readline()
+        if line.endswith("\n") or (line and not follow):
+            parsed = parse_labelled_line(line)
+            if parsed is not None:
+                texts.append(parsed[0])
+                labels.append(parsed[1])
+            if len(texts) >= batch_size:
+                yield texts, labels, f.tell(), False
+                texts, labels = [], []
+                flushed = False
+            continue
+
+        # End of the data written so far (or a partly written line)
+        if line:
+            f.seek(position)
+        if texts or not flushed:
+            yield texts, labels, f.tell(), True
+            texts, labels = [], []
+            flushed = True
+        if not follow:
+            return
+        time.sleep(poll)
+
+
+def apply_feedback(trainer: OnlineTrainer, path: str, batch_size: int = 256,
+                   follow: bool = False, poll: float = 1.0, checkpoint_every: int = 10,
+                   from_start: bool = False):
+    """
+    Stream a feedback file into the model, checkpointing as it goes.
+
+    A checkpoint is written every checkpoint_every batches, whenever the
+    input runs dry, and on the way out (end of input, Ctrl-C or an error)
+    if any applied batch has not been saved yet.
+    """
+    with open(path, encoding="utf-8") as f:
+        if not from_start:
+            f.seek(trainer.feedback_offset(path))
+        pending = samples = 0
+        elapsed = 0.0
+        # File position after the last batch applied to the model
+        applied = None
+
+        def checkpoint():
+            nonlocal pending, samples, elapsed
+            start = time.perf_counter()
+            saved = trainer.save_checkpoint(path, applied)
+            elapsed += time.perf_counter() - start
+            print(f"✓ {saved}: +{samples} samples ({trainer.samples_seen} total), "
+                  f"updated in {elapsed:.2f}s")
+            pending = samples = 0
+            elapsed = 0.0
+
+        try:
+            for texts, labels, offset, idle in iter_feedback(f, batch_size, follow, poll):
+                if texts:
+                    start = time.perf_counter()
+                    trainer.partial_fit(texts, labels)
+                    elapsed += time.perf_counter() - start
+                    pending += 1
+                    samples += len(texts)
+                applied = offset
+                if samples and (pending >= checkpoint_every or idle):
+                    checkpoint()
+        finally:
+            if samples:
+                checkpoint()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the PII model online from labelled feedback",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--init", metavar="DATA", help="Train from scratch on a labelled file")
+    source.add_argument("--feedback", metavar="FILE", help="Apply new lines of a feedback file")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="Checkpoint directory")
+    parser.add_argument("--follow", action="store_true", help="Keep polling --feedback for new lines")
+    parser.add_argument("--from-start", action="store_true",
+                        help="Re-read --feedback from the beginning")
+    parser.add_argument("--batch-size", type=int, default=256, help="Samples per partial_fit")
+    parser.add_argument("--checkpoint-every", type=int, default=10,
+                        help="Batches between checkpoints (also written whenever input runs dry)")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over --init data")
+    parser.add_argument("--hash-bits", type=int, default=18, help="New models: 2**HASH_BITS columns per block")
+    parser.add_argument("--alpha", type=float, default=1e-5, help="New models: SGD regularization")
+    parser.add_argument("--keep", type=int, default=10, help="Versioned checkpoints to keep (0 = all)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between polls with --follow")
+    args = parser.parse_args()
+
+    if args.init:
+        if os.path.exists(os.path.join(args.dir, "latest.joblib")):
+            raise SystemExit(f"{args.dir} already holds a model; use --feedback or another --dir")
+        trainer = OnlineTrainer(args.dir, args.hash_bits, args.alpha, args.keep)
+        texts, labels = load_data(args.init)
+        start = time.perf_counter()
+        trainer.fit_epochs(texts, labels, args.epochs, args.batch_size)
+        checkpoint = trainer.save_checkpoint()
+        print(f"✓ {checkpoint}: {len(texts)} samples x {args.epochs} epochs "
+              f"in {time.perf_counter() - start:.1f}s")
+        return
+
+    trainer = OnlineTrainer(args.dir, args.hash_bits, args.alpha, args.keep)
+    try:
+        apply_feedback(trainer, args.feedback, args.batch_size, args.follow, args.poll,
+                       args.checkpoint_every, args.from_start)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
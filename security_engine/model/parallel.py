@@ -0,0 +1,300 @@
+"""
+Classify many prompts on a pool of threads or processes
+
+classify_batch vectorizes a batch into one predict_proba call, but that
+call runs on one core. classify_many splits the prompts into chunks and
+runs the batch path on each chunk in parallel:
+
+    serial   one classify_batch-style call, no pool
+    thread   a ThreadPoolExecutor sharing the classifier's model. Scales
+             only as far as the GIL is released: the sparse products in
+             SciPy/NumPy release it, the TF-IDF analyzers (pure Python
+             n-gram extraction) and the regex rules do not.
+    process  a ProcessPoolExecutor whose workers each load the model file
+             once. No GIL contention, but prompts and results are pickled
+             and every worker holds its own copy of the model.
+    auto     whichever of these measure_scaling found fastest for this
+             classifier on this machine (measured once, on a sample of
+             the first call with at least MIN_PARALLEL_PROMPTS prompts;
+             smaller calls always run serially). A pool uses the measured
+             best number of workers unless the call passes workers
+
+Every mode returns exactly what classify_batch(prompts) returns. All
+chunks are scored by one model snapshot; process workers that loaded a
+different version of the model file have their chunks redone in the
+calling process. classify_many does not use the result cache (the
+repeated runs of measure_scaling would time cache hits); serial and
+thread chunks are timed by the stage instrumentation, if enabled.
+
+benchmark_concurrency.py reports throughput at 1..N threads and processes.
+
+Usage:
+    classifier = PIIClassifier()
+    results = classifier.classify_many(prompts)                   # auto
+    results = classifier.classify_many(prompts, workers=4, executor="process")
+    classifier.shutdown_pools()
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from classifier import PIIClassifier
+
+
+EXECUTOR_KINDS = ("serial", "thread", "process")
+
+# Smaller calls run serially: a pool costs more than it saves
+MIN_PARALLEL_PROMPTS = 256
+
+# Prompts measure_scaling times each executor on in "auto" mode
+SCALING_SAMPLE = 1024
+
+# A pool must be this much faster than the next cheaper option to be chosen
+SCALING_MARGIN = 0.10
+
+
+# The model of a process-pool worker, loaded once by _init_worker
+_worker = None
+
+
+def _init_worker(model_path: str, cascade: bool):
+    global _worker
+    _worker = PIIClassifier(model_path, cascade=cascade)
+
+
+def _classify_chunk(prompts, block_threshold, warn_threshold, require_pii_pattern):
+    """Process-pool task: (worker model version, results)"""
+    model = _worker.snapshot()
+    return model.version, _worker.classify_batch(
+        prompts, block_threshold, warn_threshold, require_pii_pattern, model=model
+    )
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def chunk_prompts(prompts: list, workers: int, chunk_size: int = None) -> list:
+    """
+    Split prompts into chunks for workers.
+
+    By default about four chunks per worker (so uneven chunks even out),
+    each between 64 and 1024 prompts: large enough to keep the vectorized
+    path efficient.
+    """
+    if chunk_size is None:
+        chunk_size = min(1024, max(64, math.ceil(len(prompts) / (workers * 4))))
+    return [prompts[i:i + chunk_size] for i in range(0, len(prompts), chunk_size)]
+
+
+class ParallelExecutors:
+    """
+    The thread and process pools of one PIIClassifier, created on first use
+    (see PIIClassifier.parallel_executors).
+
+    A pool is replaced when a call asks for a different number of workers;
+    the process pool also when the classifier switches to another model.
+    The scaling measured for "auto" is kept in scaling and choice.
+    """
+
+    def __init__(self, classifier: PIIClassifier):
+        self.classifier = classifier
+        self.scaling = None
+        self.choice = None
+        self._lock = threading.Lock()
+        # Held while measuring for "auto": concurrent first calls wait for
+        # the one measurement instead of timing each other's load
+        self._measure_lock = threading.Lock()
+        self._pools = {}
+
+    def pool(self, kind: str, workers: int, model=None):
+        """The (kind, workers) pool, started if needed"""
+        key = (workers, None if kind == "thread" else (model.path, model.version))
+        with self._lock:
+            current = self._pools.get(kind)
+            if current is not None and current[0] == key:
+                return current[1]
+            if current is not None:
+                # Calls still using the old pool finish their chunks on it
+                current[1].shutdown(wait=False)
+            if kind == "thread":
+                pool = ThreadPoolExecutor(workers, thread_name_prefix="classify-many")
+            else:
+                pool = ProcessPoolExecutor(
+                    workers, initializer=_init_worker,
+                    initargs=(model.path, self.classifier.cascade)
+                )
+            self._pools[kind] = (key, pool)
+            return pool
+
+    def discard(self, kind: str, pool=None):
+        """
+        Stop the kind of pool (only if it is still pool, when given: e.g.
+        one that broke because a worker process was killed)
+        """
+        with self._lock:
+            current = self._pools.get(kind)
+            if current is not None and (pool is None or current[1] is pool):
+                del self._pools[kind]
+                pool = current[1]
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for _, pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+def run_chunks(classifier: PIIClassifier, prompts: list, kind: str, workers: int,
+               chunk_size: int = None, block_threshold: float = None,
+               warn_threshold: float = None, require_pii_pattern: bool = True) -> list:
+    """classify_batch(prompts) on a kind ("serial", "thread" or "process") of pool"""
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"executor must be one of {EXECUTOR_KINDS} or 'auto', not {kind!r}")
+    prompts = list(prompts)
+    # One model snapshot and one pair of thresholds for every chunk
+    model = classifier.snapshot()
+    settings = (*model.thresholds(block_threshold, warn_threshold), require_pii_pattern)
+
+    def local(chunk):
+        return classifier.classify_batch(chunk, *settings, model=model, use_cache=False)
+
+    if kind == "serial" or (kind == "thread" and workers <= 1):
+        return local(prompts)
+
+    chunks = chunk_prompts(prompts, workers, chunk_size)
+    executors = classifier.parallel_executors()
+    if kind == "thread":
+        pool = executors.pool("thread", workers)
+        try:
+            futures = [pool.submit(local, chunk) for chunk in chunks]
+        except RuntimeError:
+            # Replaced by a concurrent call with another number of workers
+            return local(prompts)
+        return [result for future in futures for result in future.result()]
+
+    pool = executors.pool("process", workers, model)
+    try:
+        futures = [pool.submit(_classify_chunk, chunk, *settings) for chunk in chunks]
+    except (BrokenExecutor, RuntimeError):
+        # Broken or shut down by a concurrent model switch
+        executors.discard("process", pool)
+        return local(prompts)
+
+    results = []
+    for chunk, future in zip(chunks, futures):
+        try:
+            version, chunk_results = future.result()
+        except BrokenExecutor:
+            executors.discard("process", pool)
+            version, chunk_results = None, None
+        if version != model.version:
+            # The file changed on disk since this classifier loaded it
+            chunk_results = local(chunk)
+        results.extend(chunk_results)
+    return results
+
+
+def measure_scaling(classifier: PIIClassifier, prompts: list, workers: list = None,
+                    kinds=("thread", "process"), chunk_size: int = None,
+                    rounds: int = 3) -> dict:
+    """
+    Throughput of run_chunks per executor kind and number of workers.
+
+    Pools are started and warmed up before they are timed, since
+    classify_many keeps them running between calls.
+
+    Args:
+        workers: Worker counts to try (default: 1 and all CPUs)
+
+    Returns:
+        {(kind, workers): prompts per second (best of rounds)}, including
+        ("serial", 1)
+    """
+    prompts = list(prompts)
+    if workers is None:
+        workers = sorted({1, default_workers()})
+
+    def rate(kind, n):
+        run_chunks(classifier, prompts[:n * 64], kind, n, chunk_size=64)
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run_chunks(classifier, prompts, kind, n, chunk_size)
+            best = min(best, time.perf_counter() - start)
+        return len(prompts) / best
+
+    scaling = {("serial", 1): rate("serial", 1)}
+    for kind in kinds:
+        for n in workers:
+            scaling[(kind, n)] = rate(kind, n)
+    return scaling
+
+
+def choose_executor(scaling: dict, margin: float = SCALING_MARGIN) -> tuple:
+    """
+    (kind, workers) to use, given measure_scaling results.
+
+    Threads must beat serial, and processes the better of the two, by
+    margin: a pool that is barely faster is not worth its overhead.
+    """
+    choice = ("serial", 1)
+    for kind in ("thread", "process"):
+        # One thread runs the serial code path; any difference is noise
+        entries = [(rate, key) for key, rate in scaling.items()
+                   if key[0] == kind and key != ("thread", 1)]
+        if entries:
+            rate, key = max(entries)
+            if rate > scaling[choice] * (1 + margin):
+                choice = key
+    return choice
+
+
+def classify_many(classifier: PIIClassifier, prompts: list, workers: int = None,
+                  executor: str = "auto", chunk_size: int = None,
+                  block_threshold: float = None, warn_threshold: float = None,
+                  require_pii_pattern: bool = True) -> list:
+    """
+    classify_batch(prompts) spread over a pool of threads or processes.
+
+    Args:
+        workers: Pool size (default: all CPUs, or the measured best for
+            "auto"; with "auto" only the kind of executor is chosen for an
+            explicit workers)
+        executor: "auto", "serial", "thread" or "process"
+        chunk_size: Prompts per task (default: see chunk_prompts)
+        block_threshold, warn_threshold, require_pii_pattern:
+            Same as PIIClassifier.classify_prompt
+
+    Returns:
+        List of (decision, confidence, details), as from classify_batch
+    """
+    prompts = list(prompts)
+    if executor == "auto":
+        if len(prompts) < MIN_PARALLEL_PROMPTS:
+            executor, workers = "serial", 1
+        else:
+            executors = classifier.parallel_executors()
+            if executors.choice is None:
+                with executors._measure_lock:
+                    if executors.choice is None:
+                        counts = None if workers is None else sorted({1, workers})
+                        executors.scaling = measure_scaling(
+                            classifier, prompts[:SCALING_SAMPLE], counts, rounds=2
+                        )
+                        choice = choose_executor(executors.scaling)
+                        # Pools that lost stay stopped
+                        for kind in ("thread", "process"):
+                            if kind != choice[0]:
+                                executors.discard(kind)
+                        executors.choice = choice
+            executor, best_workers = executors.choice
+            if workers is None or executor == "serial":
+                workers = best_workers
+    return run_chunks(classifier, prompts, executor, workers or default_workers(), chunk_size,
+                      block_threshold, warn_threshold, require_pii_pattern)
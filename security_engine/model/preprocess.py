@@ -1,5 +1,7 @@
 import re
 
+from keyword_matcher import KeywordMatcher
+
 EXAMPLE_WORDS = {
     "example", "sample", "dummy", "test", "placeholder", "documentation",
     "demo", "mock", "fake", "tutorial", "template", "illustration"
@@ -18,10 +20,29 @@ CODE_MARKERS = {
     "regex", "pattern", "format", "validate", "return"
 }
 
+# Matched as whole words (the other sets match anywhere, e.g. "me" in "name")
+PII_REFERENCE_WORDS = {
+    "email", "phone", "pan", "aadhaar", "passport", "license", "number",
+    "address", "contact", "name"
+}
 
-def preprocess_for_ml(text: str) -> str:
+QUESTION_STARTS = ('what', 'how', 'why', 'when', 'where', 'who', 'explain', 'tell', 'describe')
+
+# Every marker set above, found in one pass over the lowercased text
+CONTEXT_MATCHER = KeywordMatcher({
+    'example': (EXAMPLE_WORDS, False),
+    'disclosure': (DISCLOSURE_WORDS, False),
+    'contact': (CONTACT_VERBS, False),
+    'code': (CODE_MARKERS, False),
+    'pii_reference': (PII_REFERENCE_WORDS, True),
+})
+
+
+def get_context_flags(text: str, text_lower: str = None) -> list:
     """
-    Enhanced preprocessing with context flags.
+    Compute the context flags for text.
+    
+    text_lower (text.lower()) can be passed in when the caller already has it.
     
     Flags:
     - CTX_EXAMPLE: Contains example/dummy markers
@@ -30,46 +51,68 @@ def preprocess_for_ml(text: str) -> str:
     - CTX_CODE: Contains code/technical markers
     - CTX_QUESTION: Is asking a question
     """
-    text_lower = text.lower()
+    if text_lower is None:
+        text_lower = text.lower()
+    markers = CONTEXT_MATCHER.find_sets(text_lower)
     flags = []
     
     # Check for example/dummy context
-    if any(w in text_lower for w in EXAMPLE_WORDS):
+    if 'example' in markers:
         flags.append("CTX_EXAMPLE")
     
     # Check for first-person disclosure
     # More sophisticated: look for "my [pii_type]" patterns
-    has_first_person = any(w in text_lower for w in DISCLOSURE_WORDS)
-    has_pii_reference = bool(re.search(
-        r'\b(?:email|phone|pan|aadhaar|passport|license|number|address|contact|name)\b',
-        text_lower
-    ))
-    
-    if has_first_person and has_pii_reference:
+    if 'disclosure' in markers and 'pii_reference' in markers:
         flags.append("CTX_DISCLOSURE")
     
     # Check for contact request
-    if any(verb in text_lower for verb in CONTACT_VERBS):
+    if 'contact' in markers:
         # But distinguish "call me at X" from "call me maybe"
         if re.search(r'\b(?:call|contact|reach|email|text)\s+me\s+(?:at|on)\b', text_lower):
             flags.append("CTX_CONTACT")
     
-    if any(marker in text_lower for marker in CODE_MARKERS):
+    if 'code' in markers:
         flags.append("CTX_CODE")
     
-    if '?' in text or any(text_lower.startswith(q) for q in ['what', 'how', 'why', 'when', 'where', 'who', 'explain', 'tell', 'describe']):
+    if '?' in text or text_lower.startswith(QUESTION_STARTS):
         flags.append("CTX_QUESTION")
     
-    return " ".join(flags + [text])
+    return flags
+
+
+def preprocess_for_ml(text: str) -> str:
+    """
+    Enhanced preprocessing with context flags.
+    
+    Prepends the flags from get_context_flags() to the text.
+    """
+    return " ".join(get_context_flags(text) + [text])
+
+
+def takes_raw_prompts(pipeline) -> bool:
+    """
+    Whether pipeline.predict_proba expects raw prompts (fused feature
+    pipelines, see fused_features.py) rather than preprocess_for_ml output.
+    """
+    features = getattr(pipeline, 'named_steps', {}).get('features')
+    return bool(getattr(features, 'takes_raw_prompts', False))
+
+
+def model_inputs(pipeline, texts: list) -> list:
+    """The texts as pipeline.predict_proba expects them"""
+    if takes_raw_prompts(pipeline):
+        return list(texts)
+    return [preprocess_for_ml(text) for text in texts]
 
 
 def extract_features_dict(text: str) -> dict:
     text_lower = text.lower()
+    markers = CONTEXT_MATCHER.find_sets(text_lower)
     features = {
-        'has_example_marker': any(w in text_lower for w in EXAMPLE_WORDS),
+        'has_example_marker': 'example' in markers,
         'has_disclosure_pattern': bool(re.search(r'\bmy\s+(?:email|phone|pan|number)', text_lower)),
         'has_contact_request': bool(re.search(r'\b(?:call|contact|reach)\s+me\s+(?:at|on)', text_lower)),
-        'has_code_marker': any(m in text_lower for m in CODE_MARKERS),
+        'has_code_marker': 'code' in markers,
         'is_question': '?' in text or text_lower.startswith(('what', 'how', 'why', 'explain')),
         'has_email_pattern': bool(re.search(r'\b[\w.+-]+@[\w.-]+\.\w+\b', text)),
         'has_phone_pattern': bool(re.search(r'\b\d{10}\b', text)),
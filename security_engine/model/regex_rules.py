@@ -43,12 +43,265 @@ EXAMPLE_PATTERNS = [
 ]
 
 
+# Well-known fake values that mark PII as not real
+FAKE_VALUE_PATTERNS = [
+    re.compile(r'test@|dummy@|sample@|fake@|example@', re.IGNORECASE),  # Common fake emails
+    re.compile(r'\b(?:1234567890|9999999999|0000000000)\b'),  # Obviously fake phones
+]
+
+
+# Characters a rule cannot match without. Rules whose required
+# character is missing from a text are skipped instead of scanned.
+_DIGIT = re.compile(r'\d')
+_REQUIRES = {
+    "EMAIL": "@",
+    "PHONE": _DIGIT,
+    "PAN": _DIGIT,
+    "AADHAAR": _DIGIT,
+    "PASSPORT": _DIGIT,
+    "DRIVING_LICENSE": _DIGIT,
+}
+_FAKE_REQUIRES = ["@", _DIGIT]
+
+
+def _inline(pattern) -> str:
+    """Return a compiled pattern's source with its IGNORECASE flag inlined"""
+    if pattern.flags & re.IGNORECASE:
+        return f"(?i:{pattern.pattern})"
+    return f"(?:{pattern.pattern})"
+
+
+# All example markers fused into one alternation, scanned once
+_EXAMPLE_SCANNER = re.compile("|".join(_inline(p) for p in EXAMPLE_PATTERNS))
+
+
+class ScanResult:
+    """
+    All regex findings for one text, produced by a single scan.
+    
+    Attributes:
+        matches: Dict of PII type -> list of (start, end, value), using the
+            same non-overlapping semantics as pattern.finditer()
+        example_spans: List of (start, end) of example/dummy markers
+        fake_spans: List of (start, end) of well-known fake values
+    """
+    
+    __slots__ = ('matches', 'example_spans', 'fake_spans')
+    
+    def __init__(self, matches, example_spans, fake_spans):
+        self.matches = matches
+        self.example_spans = example_spans
+        self.fake_spans = fake_spans
+    
+    @property
+    def has_pii(self) -> bool:
+        return bool(self.matches)
+    
+    @property
+    def has_example(self) -> bool:
+        return bool(self.example_spans)
+    
+    @property
+    def has_fake_value(self) -> bool:
+        return bool(self.fake_spans)
+    
+    @property
+    def is_real(self) -> bool:
+        return self.has_pii and not self.has_example and not self.has_fake_value
+    
+    @property
+    def signals(self) -> tuple:
+        """(has_pii, has_example, is_real), as used by the classifier"""
+        return self.has_pii, self.has_example, self.is_real
+    
+    @property
+    def pii_types(self) -> list:
+        return list(self.matches)
+    
+    @property
+    def pii_values(self) -> dict:
+        return {
+            pii_type: [value for _, _, value in found]
+            for pii_type, found in self.matches.items()
+        }
+    
+    @property
+    def spans(self) -> list:
+        """All PII matches as (start, end, type), sorted by position"""
+        return sorted(
+            (start, end, pii_type)
+            for pii_type, found in self.matches.items()
+            for start, end, _ in found
+        )
+
+
+def _scan(text: str) -> ScanResult:
+    """
+    Scan text once for every rule and collect all findings.
+    
+    Each rule runs at most once per text, and rules that need a character
+    the text does not contain ('@' or a digit) are skipped entirely.
+    """
+    present = {"@": "@" in text, _DIGIT: _DIGIT.search(text) is not None}
+    
+    matches = {}
+    for pii_type, pattern in STRONG_REGEX.items():
+        required = _REQUIRES.get(pii_type)
+        if required is not None and not present[required]:
+            continue
+        found = [(m.start(), m.end(), m.group()) for m in pattern.finditer(text)]
+        if found:
+            matches[pii_type] = found
+    
+    example_spans = [m.span() for m in _EXAMPLE_SCANNER.finditer(text)]
+    
+    fake_spans = []
+    for pattern, required in zip(FAKE_VALUE_PATTERNS, _FAKE_REQUIRES):
+        if present[required]:
+            fake_spans.extend(m.span() for m in pattern.finditer(text))
+    
+    return ScanResult(matches, example_spans, fake_spans)
+
+
+def _build_redact_scanner(order) -> re.Pattern:
+    """
+    Fuse the STRONG_REGEX types into one alternation of named groups.
+    
+    At each position the first alternative that matches wins. When every
+    pattern starts with \\b the boundary is tested once, outside the
+    alternation, so most positions are rejected without trying each type.
+    """
+    types = order + [t for t in STRONG_REGEX if t not in order]
+    patterns = [STRONG_REGEX[t] for t in types]
+    
+    if all(p.pattern.startswith(r'\b') for p in patterns):
+        alternatives = []
+        for pii_type, pattern in zip(types, patterns):
+            flags = "(?i:" if pattern.flags & re.IGNORECASE else "(?:"
+            alternatives.append(f"(?P<{pii_type}>{flags}{pattern.pattern[2:]}))")
+        return re.compile(r'\b(?:' + "|".join(alternatives) + ")")
+    
+    return re.compile("|".join(f"(?P<{t}>{_inline(p)})" for t, p in zip(types, patterns)))
+
+
+# Redaction scanner; more specific types come before the looser PHONE pattern
+_REDACT_ORDER = ["EMAIL", "AADHAAR", "DRIVING_LICENSE", "PAN", "PASSPORT", "PHONE"]
+_REDACT_SCANNER = _build_redact_scanner(_REDACT_ORDER)
+
+
+class Redaction:
+    """
+    A redacted text and the span map needed to restore it.
+    
+    Attributes:
+        text: Text with each PII value replaced by a typed placeholder
+        spans: List of (start, end, pii_type, value, original_start,
+            original_end); start/end locate the placeholder in text,
+            original_start/original_end the value in the original
+    """
+    
+    __slots__ = ('text', 'spans')
+    
+    def __init__(self, text, spans):
+        self.text = text
+        self.spans = spans
+    
+    @property
+    def redacted(self) -> bool:
+        return bool(self.spans)
+    
+    @property
+    def placeholders(self) -> dict:
+        """Placeholder -> original value (unique with an {index} placeholder format)"""
+        return {self.text[start:end]: value for start, end, _, value, _, _ in self.spans}
+    
+    def restore(self) -> str:
+        """Rebuild the original text"""
+        pieces = []
+        position = 0
+        for start, end, _, value, _, _ in self.spans:
+            pieces.append(self.text[position:start])
+            pieces.append(value)
+            position = end
+        pieces.append(self.text[position:])
+        return "".join(pieces)
+
+
+def redact_text(text: str, placeholder: str = "[{type}]") -> Redaction:
+    """
+    Replace every STRONG_REGEX match with a typed placeholder.
+    
+    The text is scanned once with all PII types fused into one pattern and
+    the output is built in the same pass. Where matches of different types
+    overlap, the leftmost wins (ties go to the more specific type).
+    
+    Args:
+        text: Text to redact
+        placeholder: Format string with {type} and optionally {index}
+            (1-based count per type), e.g. "[{type}_{index}]"
+    
+    Returns:
+        Redaction with the redacted text and the span map
+    """
+    # Every type needs an '@' or a digit; skip the scan when neither occurs
+    if "@" not in text and _DIGIT.search(text) is None:
+        return Redaction(text, [])
+    
+    pieces = []
+    spans = []
+    counts = {}
+    position = 0
+    length = 0
+    for match in _REDACT_SCANNER.finditer(text):
+        pii_type = match.lastgroup
+        start, end = match.span()
+        counts[pii_type] = counts.get(pii_type, 0) + 1
+        replacement = placeholder.format(type=pii_type, index=counts[pii_type])
+        
+        pieces.append(text[position:start])
+        length += start - position
+        pieces.append(replacement)
+        spans.append((length, length + len(replacement), pii_type, match.group(), start, end))
+        length += len(replacement)
+        position = end
+    
+    if not spans:
+        return Redaction(text, [])
+    pieces.append(text[position:])
+    return Redaction("".join(pieces), spans)
+
+
+def redact_batch(texts: list, placeholder: str = "[{type}]") -> list:
+    """
+    Redact many texts.
+    
+    Returns:
+        List of Redaction, one per text
+    """
+    return [redact_text(text, placeholder) for text in texts]
+
+
+def scan_text(text: str) -> ScanResult:
+    """
+    Scan text for PII, example markers and fake values in one pass.
+    
+    Nothing is memoized: prompts hold PII and must not outlive the call.
+    To ask several questions about one text, scan it once and read them
+    from the returned ScanResult (as analyze_text does) instead of calling
+    the single-signal helpers below one after another.
+    
+    Returns:
+        A new ScanResult with all findings
+    """
+    return _scan(text)
+
+
 def has_pii_pattern(text: str) -> bool:
     """
     Check if text contains any PII pattern.
     Returns True if PII-like pattern is found.
     """
-    return any(pattern.search(text) for pattern in STRONG_REGEX.values())
+    return scan_text(text).has_pii
 
 
 def weak_regex_hit(text: str) -> bool:
@@ -64,7 +317,7 @@ def has_example_marker(text: str) -> bool:
     Check if text contains markers indicating it's example/dummy data.
     Returns True if example markers are found.
     """
-    return any(pattern.search(text) for pattern in EXAMPLE_PATTERNS)
+    return scan_text(text).has_example
 
 
 def get_pii_types(text: str) -> list:
@@ -74,11 +327,7 @@ def get_pii_types(text: str) -> list:
     Returns:
         List of strings like ['EMAIL', 'PHONE']
     """
-    found = []
-    for pii_type, pattern in STRONG_REGEX.items():
-        if pattern.search(text):
-            found.append(pii_type)
-    return found
+    return scan_text(text).pii_types
 
 
 def extract_pii_values(text: str) -> dict:
@@ -88,42 +337,40 @@ def extract_pii_values(text: str) -> dict:
     Returns:
         Dict like {'EMAIL': ['user@domain.com'], 'PHONE': ['9876543210']}
     """
-    results = {}
-    for pii_type, pattern in STRONG_REGEX.items():
-        matches = pattern.findall(text)
-        if matches:
-            results[pii_type] = matches
-    return results
+    return scan_text(text).pii_values
 
 
 def is_real_pii(text: str) -> bool:
     """
     Determine if PII in text is likely real vs example/dummy.
     
+    PII is considered real when a PII pattern is present and there are
+    neither example markers nor well-known fake values (test@, 1234567890).
+    
     Returns:
         True if PII appears to be real (not example data)
     """
-    # Has PII pattern
-    if not has_pii_pattern(text):
-        return False
-    
-    # But has example markers
-    if has_example_marker(text):
-        return False
-    
-    # Check for specific fake patterns
-    text_lower = text.lower()
-    
-    # Common fake emails
-    if re.search(r'test@|dummy@|sample@|fake@|example@', text_lower):
-        return False
+    return scan_text(text).is_real
+
+
+def get_regex_signals(text: str) -> tuple:
+    """
+    Compute the regex signals used by the classifier from one scan.
     
-    # Obviously fake phone numbers
-    if re.search(r'\b(?:1234567890|9999999999|0000000000)\b', text):
-        return False
+    Returns:
+        Tuple of (has_pii, has_example, is_real)
+    """
+    return scan_text(text).signals
+
+
+def get_regex_signals_batch(texts: list) -> list:
+    """
+    Compute regex signals for many texts.
     
-    # Otherwise, assume it's real
-    return True
+    Returns:
+        List of (has_pii, has_example, is_real) tuples, one per text
+    """
+    return [get_regex_signals(text) for text in texts]
 
 
 # For debugging/analysis
@@ -133,12 +380,13 @@ def analyze_text(text: str) -> dict:
     
     Returns detailed dict with all findings.
     """
+    result = scan_text(text)
     return {
-        'has_pii': has_pii_pattern(text),
-        'has_example_marker': has_example_marker(text),
-        'is_real_pii': is_real_pii(text),
-        'pii_types': get_pii_types(text),
-        'pii_values': extract_pii_values(text),
+        'has_pii': result.has_pii,
+        'has_example_marker': result.has_example,
+        'is_real_pii': result.is_real,
+        'pii_types': result.pii_types,
+        'pii_values': result.pii_values,
     }
 
 
@@ -0,0 +1,244 @@
+"""
+Bulk scanner for prompt logs (JSONL or one prompt per line)
+
+Streams the input file in chunks, classifies the chunks across a process
+pool (the model is loaded once per worker) and writes one JSON result per
+input line, in input order. Only a bounded number of chunks is in flight
+at any time, so memory stays flat regardless of the input size.
+
+Each result carries the byte offset of the line after it, so an
+interrupted scan can be resumed with --start-offset.
+
+Usage:
+    python scan_logs.py gateway.jsonl --field prompt -o results.jsonl
+    python scan_logs.py prompts.txt --format text --workers 8
+    python scan_logs.py gateway.jsonl -o results.jsonl --start-offset 123456 --append
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from classifier import PIIClassifier
+from regex_rules import scan_text
+
+
+_worker_classifier = None
+
+
+def _init_worker(model_path: str, cascade: bool):
+    """Load the model once per worker process"""
+    global _worker_classifier
+    _worker_classifier = PIIClassifier(model_path, cascade=cascade)
+
+
+def _parse_line(raw: bytes, fmt: str, field: str):
+    """Return (prompt, error) for one raw input line"""
+    text = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+    if fmt == "text":
+        return text, None
+
+    try:
+        record = json.loads(text)
+    except ValueError:
+        return None, "invalid JSON"
+    prompt = record.get(field) if isinstance(record, dict) else None
+    if not isinstance(prompt, str):
+        return None, f"missing string field '{field}'"
+    return prompt, None
+
+
+def _scan_chunk(chunk: list, fmt: str, field: str) -> list:
+    """
+    Classify one chunk of (offset, next_offset, raw_line) in a worker.
+
+    Returns one result dict per line, in order.
+    """
+    parsed = [_parse_line(raw, fmt, field) for _, _, raw in chunk]
+    prompts = [prompt for prompt, error in parsed if error is None]
+    # One regex scan per prompt gives both the classifier's signals and
+    # the reported PII types
+    scans = [scan_text(prompt) for prompt in prompts]
+    results = iter(_worker_classifier.classify_batch(
+        prompts, signals=[scan.signals for scan in scans]
+    ))
+    scans = iter(scans)
+
+    records = []
+    for (offset, next_offset, _), (prompt, error) in zip(chunk, parsed):
+        record = {'offset': offset, 'next_offset': next_offset}
+        if error is not None:
+            record['error'] = error
+        else:
+            decision, confidence, _ = next(results)
+            record['decision'] = decision
+            record['confidence'] = round(float(confidence), 6)
+            record['pii_types'] = next(scans).pii_types
+        records.append(record)
+    return records
+
+
+def read_chunks(path: str, start_offset: int, chunk_size: int):
+    """
+    Yield chunks of (offset, next_offset, raw_line) from a file.
+
+    Blank lines are skipped. Reading is lazy, so only one chunk is held
+    by this generator at a time.
+    """
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        chunk = []
+        for raw in f:
+            next_offset = offset + len(raw)
+            if raw.strip():
+                chunk.append((offset, next_offset, raw))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            offset = next_offset
+        if chunk:
+            yield chunk
+
+
+def _detect_format(path: str, start_offset: int) -> str:
+    """Guess 'jsonl' or 'text' from the first non-blank line"""
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        for raw in f:
+            if raw.strip():
+                return "jsonl" if raw.lstrip().startswith(b"{") else "text"
+    return "text"
+
+
+def scan_file(
+    path: str,
+    out,
+    fmt: str = "auto",
+    field: str = "prompt",
+    workers: int = None,
+    chunk_size: int = 512,
+    start_offset: int = 0,
+    model_path: str = "pii_intent_lr.joblib",
+    cascade: bool = False,
+    progress_every: float = 2.0
+) -> dict:
+    """
+    Scan a prompt log and write results to the out file object.
+
+    Returns:
+        Dict with line counts, decision counts and the last offset written
+    """
+    if fmt == "auto":
+        fmt = _detect_format(path, start_offset)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    total_bytes = os.path.getsize(path)
+
+    stats = {'lines': 0, 'errors': 0, 'decisions': {}, 'last_offset': start_offset}
+    started = time.perf_counter()
+    last_report = started
+
+    def report(final=False):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        done = stats['last_offset'] - start_offset
+        pct = stats['last_offset'] / total_bytes * 100 if total_bytes else 100.0
+        print(f"{'Done' if final else 'Progress'}: {stats['lines']} lines "
+              f"({stats['lines'] / elapsed:.0f} lines/s, {done / elapsed / 1e6:.2f} MB/s), "
+              f"offset {stats['last_offset']} ({pct:.1f}%)",
+              file=sys.stderr)
+
+    def write(records):
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+            stats['lines'] += 1
+            if 'error' in record:
+                stats['errors'] += 1
+            else:
+                counts = stats['decisions']
+                counts[record['decision']] = counts.get(record['decision'], 0) + 1
+            stats['last_offset'] = record['next_offset']
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_path, cascade)
+    ) as pool:
+        in_flight = deque()
+        for chunk in read_chunks(path, start_offset, chunk_size):
+            in_flight.append(pool.submit(_scan_chunk, chunk, fmt, field))
+
+            # Keep a bounded window of chunks and write results in order
+            while len(in_flight) >= max_in_flight:
+                write(in_flight.popleft().result())
+
+            if progress_every and time.perf_counter() - last_report >= progress_every:
+                out.flush()
+                report()
+                last_report = time.perf_counter()
+
+        while in_flight:
+            write(in_flight.popleft().result())
+
+    out.flush()
+    if progress_every:
+        report(final=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Classify every prompt in a JSONL or text log",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("input", help="Input file (JSONL or one prompt per line)")
+    parser.add_argument("-o", "--output", help="Output JSONL file (default: stdout)")
+    parser.add_argument("--append", action="store_true",
+                        help="Append to the output file (use when resuming)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto")
+    parser.add_argument("--field", default="prompt", help="JSON field holding the prompt")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=512, help="Lines per worker task")
+    parser.add_argument("--start-offset", type=int, default=0,
+                        help="Byte offset to resume from (next_offset of the last result)")
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("--cascade", action="store_true", help="Enable cascade mode")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    args = parser.parse_args()
+
+    if args.output:
+        out = open(args.output, "a" if args.append else "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+
+    try:
+        stats = scan_file(
+            args.input, out,
+            fmt=args.format,
+            field=args.field,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            start_offset=args.start_offset,
+            model_path=args.model,
+            cascade=args.cascade,
+            progress_every=0 if args.quiet else 2.0
+        )
+    except KeyboardInterrupt:
+        print("\nInterrupted; resume with --start-offset from the last "
+              "written result's next_offset", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if not args.quiet:
+        print(f"Decisions: {stats['decisions']}, errors: {stats['errors']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
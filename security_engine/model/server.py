@@ -0,0 +1,341 @@
+"""
+Local HTTP inference service for the PII classifier
+
+Endpoints:
+    GET  /health          -> service and model status
+    GET  /metrics         -> per-stage latencies in Prometheus text format (--instrument)
+    POST /classify        -> {"prompt": "..."}
+    POST /classify_batch  -> {"prompts": ["...", ...]}
+    POST /reload          -> {}; re-read the configured model file, warm up and swap it in
+                             (Content-Type: application/json, no Origin header)
+
+Concurrent requests are grouped by a MicroBatcher into single vectorized
+classify_batch calls. When too many prompts are pending the service
+answers 429 instead of queueing without bound.
+
+/reload only re-reads the model file the service was started with (a
+different model is switched to by replacing that file, or with --watch).
+Loading a model unpickles it, so the path never comes from a request,
+and browser-originated requests (an Origin header, or a non-JSON
+Content-Type a cross-site form can send) are rejected.
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+
+from batching import MicroBatcher, QueueFullError, BatcherClosedError
+from classifier import ModelLoadError, PIIClassifier
+
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    422: "Unprocessable Entity",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """An error that maps directly to an HTTP status code"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def result_to_json(result: tuple) -> dict:
+    """Convert a (decision, confidence, details) tuple to a JSON-safe dict"""
+    decision, confidence, details = result
+    return {
+        'decision': decision,
+        'confidence': float(confidence),
+        'details': details,
+    }
+
+
+class ClassifierService:
+    """
+    asyncio HTTP/1.1 server around one shared PIIClassifier.
+
+    The model is loaded once at startup; all requests go through a
+    MicroBatcher so concurrent callers share vectorized model calls.
+    """
+
+    def __init__(
+        self,
+        classifier: PIIClassifier,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        window: float = 0.005,
+        max_batch: int = 256,
+        max_pending: int = 4096
+    ):
+        self.classifier = classifier
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(
+            classifier.classify_batch,
+            window=window,
+            max_batch=max_batch,
+            max_pending=max_pending
+        )
+        self._server = None
+        self._connections = set()
+        self._busy = set()
+        self._shutting_down = False
+
+    async def start(self):
+        """Start listening and batching"""
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+
+    async def serve_until_stopped(self):
+        """Serve until SIGINT/SIGTERM, then shut down gracefully"""
+        await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass  # Signal handlers are not available on this platform
+
+        print(f"Serving on http://{self.host}:{self.port} "
+              f"(window={self.batcher.window * 1000:.1f}ms, "
+              f"max_batch={self.batcher.max_batch}, "
+              f"max_pending={self.batcher.max_pending})")
+        await stop.wait()
+        print("Shutting down...")
+        await self.shutdown()
+
+    async def shutdown(self, timeout: float = 10.0):
+        """
+        Stop accepting connections, finish in-flight requests, then stop.
+
+        Requests already queued are classified and answered; idle
+        keep-alive connections are closed.
+        """
+        self._shutting_down = True
+        if self._server is not None:
+            self._server.close()
+        await self.batcher.close()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._busy and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        for task in list(self._connections):
+            task.cancel()
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            keep_alive = True
+            while keep_alive and not self._shutting_down:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {'error': e.message}, False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._busy.add(task)
+                try:
+                    status, payload = await self._dispatch(method, path, headers, body)
+                    await self._respond(writer, status, payload, keep_alive)
+                finally:
+                    self._busy.discard(task)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Read one request; returns None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None
+            raise HTTPError(400, "incomplete request")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        return method, path, headers, body
+
+    async def _dispatch(self, method: str, path: str, headers: dict, body: bytes) -> tuple:
+        """Route a request and return (status, JSON payload or plain-text body)"""
+        path = path.split("?", 1)[0]
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                return self._health()
+
+            if path == "/metrics":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                return 200, self.classifier.prometheus_metrics()
+
+            if path == "/classify":
+                prompt = self._parse_body(method, body, 'prompt', str)
+                [result] = await self.batcher.submit([prompt])
+                return 200, result_to_json(result)
+
+            if path == "/classify_batch":
+                prompts = self._parse_body(method, body, 'prompts', list)
+                if not all(isinstance(p, str) for p in prompts):
+                    raise HTTPError(400, "'prompts' must be a list of strings")
+                results = await self.batcher.submit(prompts)
+                return 200, {'results': [result_to_json(r) for r in results]}
+
+            if path == "/reload":
+                return await self._reload(method, headers, body)
+
+            raise HTTPError(404, f"no route for {path}")
+
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except QueueFullError as e:
+            return 429, {'error': f"overloaded: {e}"}
+        except BatcherClosedError:
+            return 503, {'error': "shutting down"}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def _reload(self, method: str, headers: dict, body: bytes) -> tuple:
+        """
+        Re-read the configured model file in the background; requests keep
+        being served meanwhile.
+        """
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        if 'origin' in headers:
+            raise HTTPError(403, "cross-origin requests are not allowed")
+        content_type = headers.get('content-type', '').split(";", 1)[0].strip().lower()
+        if content_type != "application/json":
+            raise HTTPError(415, "Content-Type must be application/json")
+        try:
+            data = json.loads(body) if body else {}
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPError(400, "body must be JSON")
+        if data != {}:
+            raise HTTPError(400, "body must be {} (the configured model file is reloaded)")
+
+        previous = self.classifier.model_version
+        try:
+            version = await asyncio.wrap_future(
+                self.classifier.reload_model(background=True)
+            )
+        except ModelLoadError as e:
+            return 422, {'error': str(e), 'model_version': previous}
+        return 200, {'model_version': version, 'previous_version': previous}
+
+    def _parse_body(self, method: str, body: bytes, field: str, expected_type):
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(data, dict) or not isinstance(data.get(field), expected_type):
+            raise HTTPError(400, f"body must contain '{field}' ({expected_type.__name__})")
+        return data[field]
+
+    def _health(self) -> tuple:
+        status = "shutting_down" if self._shutting_down else "ok"
+        return (503 if self._shutting_down else 200), {
+            'status': status,
+            'model_version': self.classifier.model_version,
+            'batching': self.batcher.stats(),
+        }
+
+    async def _respond(self, writer, status: int, payload, keep_alive: bool):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PII classifier HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    parser.add_argument("--window-ms", type=float, default=5.0,
+                        help="Batching window after the first queued request")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Prompts that close the batching window early")
+    parser.add_argument("--max-pending", type=int, default=4096,
+                        help="Pending prompts beyond which requests get 429")
+    parser.add_argument("--cascade", action="store_true", help="Enable cascade mode")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Reload the model when its file changes (polling interval)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time each classification stage (exported at /metrics)")
+    args = parser.parse_args()
+
+    classifier = PIIClassifier(args.model, cascade=args.cascade, instrument=args.instrument)
+    if args.watch:
+        classifier.watch_model(args.watch)
+    service = ClassifierService(
+        classifier,
+        host=args.host,
+        port=args.port,
+        window=args.window_ms / 1000.0,
+        max_batch=args.max_batch,
+        max_pending=args.max_pending
+    )
+    asyncio.run(service.serve_until_stopped())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Streaming scan of very large prompts (pasted documents, log dumps)
+
+The text is read incrementally from a string, a file object or any
+iterator of strings and cut into fixed-size overlapping windows. Each
+window is run through the regex rules and the ML model, as is the line
+around every PII match (a lone disclosure would otherwise be diluted by
+the rest of the window). Findings are reported with character offsets
+into the whole document. Only the current
+window (plus one read buffer) is held in memory.
+
+Boundary handling: consecutive windows overlap by `overlap` characters and
+the boundary between them is placed in the middle of the overlap. A match
+is reported by the window whose owned range contains its start, so each
+match is reported once, and any match of up to overlap // 2 characters
+that crosses a window edge is still seen whole by its owning window.
+
+Usage:
+    python streaming.py dump.log
+    python streaming.py dump.log --window 16384 --overlap 1024 --no-stop
+"""
+
+import argparse
+import json
+
+from regex_rules import scan_text
+
+
+DEFAULT_WINDOW = 8192
+DEFAULT_OVERLAP = 512
+READ_SIZE = 65536
+
+# Characters of context on each side of a match that are scored with it
+SPAN_CONTEXT = 200
+
+DECISION_RANK = {"ALLOW": 0, "WARN": 1, "BLOCK": 2}
+
+
+class Window:
+    """
+    One window of the document.
+
+    Attributes:
+        start: Offset of text[0] in the document
+        text: Window contents
+        owned_start, owned_end: Document range whose matches this window reports
+    """
+
+    __slots__ = ('start', 'text', 'owned_start', 'owned_end')
+
+    def __init__(self, start, text, owned_start, owned_end):
+        self.start = start
+        self.text = text
+        self.owned_start = owned_start
+        self.owned_end = owned_end
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+def iter_chunks(source, read_size: int = READ_SIZE):
+    """Yield text chunks from a string, a text file object or an iterable of strings"""
+    if isinstance(source, str):
+        yield source
+        return
+
+    read = getattr(source, "read", None)
+    if read is not None:
+        yield from iter(lambda: read(read_size), "")
+        return
+
+    for chunk in source:
+        if not isinstance(chunk, str):
+            raise TypeError(f"expected str chunks, got {type(chunk).__name__}")
+        yield chunk
+
+
+def iter_windows(source, window: int = DEFAULT_WINDOW, overlap: int = DEFAULT_OVERLAP):
+    """
+    Yield overlapping Windows covering the whole source.
+
+    A window is only emitted once more text is known to follow it (or the
+    source is exhausted), so the last window always knows it is last.
+    """
+    if window <= 0:
+        raise ValueError("window must be positive")
+    if not 0 <= overlap < window:
+        raise ValueError("overlap must be at least 0 and smaller than window")
+
+    step = window - overlap
+    half = overlap // 2
+    buffer = ""
+    base = 0   # document offset of buffer[0]
+    pos = 0    # buffer index where the next window starts
+
+    for chunk in iter_chunks(source):
+        # Drop the consumed prefix once per chunk, not once per window
+        buffer = buffer[pos:] + chunk
+        base += pos
+        pos = 0
+        while len(buffer) - pos > window:
+            start = base + pos
+            owned_start = start if start == 0 else start + half
+            yield Window(start, buffer[pos:pos + window], owned_start, start + step + half)
+            pos += step
+
+    rest = buffer[pos:]
+    if rest:
+        start = base + pos
+        owned_start = start if start == 0 else start + half
+        yield Window(start, rest, owned_start, start + len(rest))
+
+
+def scan_stream(
+    classifier,
+    source,
+    window: int = DEFAULT_WINDOW,
+    overlap: int = DEFAULT_OVERLAP,
+    batch_windows: int = 4,
+    block_threshold: float = None,
+    warn_threshold: float = None,
+    require_pii_pattern: bool = True
+):
+    """
+    Classify a document window by window.
+
+    Windows are scored batch_windows at a time with one vectorized model
+    call. Stop iterating at any point to stop reading the source.
+
+    Besides the window itself, the line around each PII match is scored
+    (see span_context), and the window takes the most severe of these
+    decisions.
+
+    Yields:
+        Dict per window with start, end, decision, confidence and spans
+        (list of {start, end, type, decision, confidence} in document
+        offsets, owned matches only)
+    """
+    # One model for the whole document, even if it is reloaded meanwhile
+    model = classifier.snapshot()
+    batch = []
+    for current in iter_windows(source, window, overlap):
+        batch.append(current)
+        if len(batch) >= batch_windows:
+            yield from _score_windows(
+                classifier, model, batch, block_threshold, warn_threshold, require_pii_pattern
+            )
+            batch = []
+    if batch:
+        yield from _score_windows(
+            classifier, model, batch, block_threshold, warn_threshold, require_pii_pattern
+        )
+
+
+def span_context(text: str, start: int, end: int, radius: int = SPAN_CONTEXT) -> str:
+    """
+    The line around a match, clipped to radius characters on each side.
+
+    A whole window is mostly unrelated text, which dilutes the model's
+    view of a single disclosure; the match's own line is scored instead.
+    """
+    left = text.rfind("\n", max(0, start - radius), start)
+    left = max(0, start - radius) if left < 0 else left + 1
+    right = text.find("\n", end, end + radius)
+    right = min(len(text), end + radius) if right < 0 else right
+    return text[left:right]
+
+
+def _score_windows(classifier, model, windows, block_threshold, warn_threshold, require_pii_pattern):
+    """Score windows plus the context line of every owned match in one model call"""
+    texts = [w.text for w in windows]
+    scans = [scan_text(text) for text in texts]
+
+    owned = []
+    contexts = {}
+    for w, scan in zip(windows, scans):
+        spans = []
+        for start, end, pii_type in scan.spans:
+            if w.owned_start <= start + w.start < w.owned_end:
+                context = span_context(w.text, start, end)
+                contexts.setdefault(context, len(contexts))
+                spans.append((start + w.start, end + w.start, pii_type, context))
+        owned.append(spans)
+
+    context_texts = list(contexts)
+    results = classifier.classify_batch(
+        texts + context_texts, block_threshold, warn_threshold, require_pii_pattern,
+        signals=[scan.signals for scan in scans] + [scan_text(c).signals for c in context_texts],
+        model=model
+    )
+    context_results = results[len(texts):]
+
+    for w, spans, (decision, confidence, _) in zip(windows, owned, results):
+        confidence = float(confidence)
+        findings = []
+        for start, end, pii_type, context in spans:
+            span_decision, span_confidence, _ = context_results[contexts[context]]
+            span_confidence = float(span_confidence)
+            findings.append({
+                'start': start,
+                'end': end,
+                'type': pii_type,
+                'decision': span_decision,
+                'confidence': span_confidence,
+            })
+            # A window is as severe as its most severe finding
+            if DECISION_RANK[span_decision] > DECISION_RANK[decision]:
+                decision = span_decision
+            confidence = max(confidence, span_confidence)
+        yield {
+            'start': w.start,
+            'end': w.end,
+            'decision': decision,
+            'confidence': confidence,
+            'spans': findings,
+        }
+
+
+def classify_stream(
+    classifier,
+    source,
+    window: int = DEFAULT_WINDOW,
+    overlap: int = DEFAULT_OVERLAP,
+    stop_on_block: bool = True,
+    max_findings: int = 1000,
+    block_threshold: float = None,
+    warn_threshold: float = None,
+    require_pii_pattern: bool = True
+) -> tuple:
+    """
+    Classify a whole document from a stream.
+
+    Args:
+        source: String, text file object or iterable of strings
+        window, overlap: Window size and overlap in characters
+        stop_on_block: Stop reading at the first BLOCK window
+        max_findings: Maximum number of span findings to keep
+        block_threshold, warn_threshold, require_pii_pattern:
+            Same as PIIClassifier.classify_prompt
+
+    Returns:
+        Tuple of (decision, confidence, details), where decision is the
+        most severe window decision and confidence the highest window
+        confidence. details holds:
+        - findings: PII spans {start, end, type, decision, confidence} in
+          document offsets
+        - flagged_windows: {start, end, decision, confidence} of WARN/BLOCK windows
+        - windows_scanned, chars_scanned, stopped_early, findings_truncated
+    """
+    decision, confidence = "ALLOW", 0.0
+    findings = []
+    flagged = []
+    windows_scanned = chars_scanned = 0
+    truncated = stopped_early = False
+
+    for result in scan_stream(
+        classifier, source, window, overlap,
+        block_threshold=block_threshold,
+        warn_threshold=warn_threshold,
+        require_pii_pattern=require_pii_pattern
+    ):
+        windows_scanned += 1
+        chars_scanned = result['end']
+        confidence = max(confidence, result['confidence'])
+        if DECISION_RANK[result['decision']] > DECISION_RANK[decision]:
+            decision = result['decision']
+        if result['decision'] != "ALLOW":
+            flagged.append({key: result[key] for key in ('start', 'end', 'decision', 'confidence')})
+
+        for span in result['spans']:
+            if len(findings) >= max_findings:
+                truncated = True
+                break
+            findings.append(span)
+
+        if stop_on_block and result['decision'] == "BLOCK":
+            stopped_early = True
+            break
+
+    details = {
+        'findings': findings,
+        'flagged_windows': flagged,
+        'windows_scanned': windows_scanned,
+        'chars_scanned': chars_scanned,
+        'stopped_early': stopped_early,
+        'findings_truncated': truncated,
+        'model_version': classifier.model_version,
+    }
+    return decision, confidence, details
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scan a large document for PII disclosure in overlapping windows",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("input", help="Text file to scan")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Window size in characters")
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP, help="Window overlap in characters")
+    parser.add_argument("--no-stop", action="store_true", help="Keep scanning after a BLOCK window")
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained model path")
+    args = parser.parse_args()
+
+    from classifier import PIIClassifier
+
+    classifier = PIIClassifier(args.model)
+    with open(args.input, encoding="utf-8", errors="replace") as f:
+        decision, confidence, details = classify_stream(
+            classifier, f, args.window, args.overlap, stop_on_block=not args.no_stop
+        )
+
+    print(f"[{decision}] {confidence:.3f} | {details['windows_scanned']} windows, "
+          f"{details['chars_scanned']} chars"
+          f"{' (stopped early)' if details['stopped_early'] else ''}")
+    for finding in details['findings']:
+        print(json.dumps(finding))
+
+
+if __name__ == "__main__":
+    main()
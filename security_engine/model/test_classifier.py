@@ -1,71 +1,73 @@
 from classifier import PIIClassifier
 
+TEST_CATEGORIES = {
+    "Real Disclosures (Should BLOCK)": [
+        "my email is john.doe@gmail.com",
+        "call me at 9876543210",
+        "you can reach me on my phone number 6528854427",
+        "my PAN number is VYYUY5561L",
+        "contact me at user@realdomain.com",
+        "reach me at rahul@company.com",
+        "text me at 7777777777",
+        "my passport is W6371987",
+    ],
+    
+    "Example/Dummy Data (Should ALLOW)": [
+        "use example@email.com in the documentation",
+        "dummy phone number 1234567890",
+        "sample PAN is ABCDE1234F for testing",
+        "test with fake@example.org",
+        "const email = 'test@example.com';",
+        "let phone = '1234567890';",
+        "EMAIL_REGEX = r'[A-Z0-9._%+-]+@[A-Z0-9.-]+'",
+        "the user's email is user@example.com",
+    ],
+    
+    "Educational Queries (Should ALLOW)": [
+        "explain what a PAN number is",
+        "what does an aadhaar number look like",
+        "how do I format phone numbers",
+        "what is an email address",
+        "tell me about passport numbers",
+        "describe PII",
+    ],
+    
+    "False Positives (Should ALLOW)": [
+        "my phone is not working",
+        "my phone battery is dead",
+        "call me maybe",
+        "call me by my name",
+        "email format validation",
+        "phone number format",
+        "contact page on website",
+    ],
+    
+    "Non-PII Content (Should ALLOW)": [
+        "I love Jaipur, it is very pretty",
+        "write an essay about privacy",
+        "I am learning numbers and I read 2345 in it",
+        "order id is 9876543210",
+        "what is machine learning",
+        "hello how are you",
+    ],
+    
+    "Edge Cases (May WARN)": [
+        "my name is John Smith",
+        "I am Rahul from Delhi",
+        "my username is john123",
+        "contact me through the website",
+        "email me for more info",
+    ],
+}
+
+
 def run_tests():
     classifier = PIIClassifier()
-    test_categories = {
-        "Real Disclosures (Should BLOCK)": [
-            "my email is john.doe@gmail.com",
-            "call me at 9876543210",
-            "you can reach me on my phone number 6528854427",
-            "my PAN number is VYYUY5561L",
-            "contact me at user@realdomain.com",
-            "reach me at rahul@company.com",
-            "text me at 7777777777",
-            "my passport is W6371987",
-        ],
-        
-        "Example/Dummy Data (Should ALLOW)": [
-            "use example@email.com in the documentation",
-            "dummy phone number 1234567890",
-            "sample PAN is ABCDE1234F for testing",
-            "test with fake@example.org",
-            "const email = 'test@example.com';",
-            "let phone = '1234567890';",
-            "EMAIL_REGEX = r'[A-Z0-9._%+-]+@[A-Z0-9.-]+'",
-            "the user's email is user@example.com",
-        ],
-        
-        "Educational Queries (Should ALLOW)": [
-            "explain what a PAN number is",
-            "what does an aadhaar number look like",
-            "how do I format phone numbers",
-            "what is an email address",
-            "tell me about passport numbers",
-            "describe PII",
-        ],
-        
-        "False Positives (Should ALLOW)": [
-            "my phone is not working",
-            "my phone battery is dead",
-            "call me maybe",
-            "call me by my name",
-            "email format validation",
-            "phone number format",
-            "contact page on website",
-        ],
-        
-        "Non-PII Content (Should ALLOW)": [
-            "I love Jaipur, it is very pretty",
-            "write an essay about privacy",
-            "I am learning numbers and I read 2345 in it",
-            "order id is 9876543210",
-            "what is machine learning",
-            "hello how are you",
-        ],
-        
-        "Edge Cases (May WARN)": [
-            "my name is John Smith",
-            "I am Rahul from Delhi",
-            "my username is john123",
-            "contact me through the website",
-            "email me for more info",
-        ],
-    }
     
     total = 0
     passed = 0
     
-    for category, test_cases in test_categories.items():
+    for category, test_cases in TEST_CATEGORIES.items():
         print(f"\n{'='*80}")
         print(f"{category}")
         print(f"{'='*80}\n")
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+
+from classifier import PIIClassifier
+from compress_model import main
+from thresholds import load_thresholds, write_thresholds
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_sample(path: str, per_label: int = 100):
+    """The first per_label lines of each label in train.txt"""
+    counts = {}
+    with open(os.path.join(HERE, "train.txt"), encoding="utf-8") as source, \
+            open(path, "w", encoding="utf-8") as f:
+        for line in source:
+            label = line.split(" ", 1)[0]
+            if counts.get(label, 0) < per_label:
+                counts[label] = counts.get(label, 0) + 1
+                f.write(line)
+
+
+def test_compressed_output_keeps_the_original_thresholds(tmp_path):
+    model = str(tmp_path / "model.joblib")
+    shutil.copyfile(os.path.join(HERE, "pii_intent_lr.joblib"), model)
+    write_thresholds(model, 0.7, 0.3)
+    data = str(tmp_path / "sample.txt")
+    write_sample(data)
+    output = str(tmp_path / "small.joblib")
+    export = str(tmp_path / "small.npz")
+
+    main(["--model", model, "--data", data, "--output", output, "--export", export,
+          "--min-weight", "0", "--no-refit", "--max-flips", "1"])
+
+    assert load_thresholds(output) == (0.7, 0.3)
+    assert load_thresholds(export) == (0.7, 0.3)
+    assert PIIClassifier(output).thresholds == (0.7, 0.3)
+
+
+if __name__ == "__main__":
+    import pathlib
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_compressed_output_keeps_the_original_thresholds(pathlib.Path(tmp))
+        print("✓ test_compressed_output_keeps_the_original_thresholds")
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+
+from online_learning import OnlineTrainer, apply_feedback, iter_feedback
+
+
+def write_feedback(path: str, n: int):
+    """n labelled lines, alternating classes"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            if i % 2:
+                f.write(f"__label__DISCLOSURE my phone number is 98765{i:05d}\n")
+            else:
+                f.write(f"__label__NON_DISCLOSURE how do I format phone number {i}\n")
+
+
+def test_exact_multiple_of_batch_size_is_checkpointed(tmp_path):
+    feedback = str(tmp_path / "feedback.txt")
+    write_feedback(feedback, 256)
+    trainer = OnlineTrainer(str(tmp_path / "model"))
+
+    apply_feedback(trainer, feedback, batch_size=128, checkpoint_every=10)
+
+    with open(tmp_path / "model" / "latest.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta['samples_seen'] == 256
+    assert meta['feedback'] == {os.path.abspath(feedback): os.path.getsize(feedback)}
+
+    # A second run finds nothing new to apply
+    resumed = OnlineTrainer(str(tmp_path / "model"))
+    apply_feedback(resumed, feedback, batch_size=128, checkpoint_every=10)
+    assert resumed.version == meta['version']
+    assert resumed.samples_seen == 256
+
+
+def test_full_batches_end_with_an_idle_batch(tmp_path):
+    feedback = str(tmp_path / "feedback.txt")
+    write_feedback(feedback, 8)
+
+    with open(feedback, encoding="utf-8") as f:
+        batches = [(len(texts), idle) for texts, _, _, idle in iter_feedback(f, batch_size=4)]
+    assert batches == [(4, False), (4, False), (0, True)]
+
+
+if __name__ == "__main__":
+    import pathlib
+
+    for test in (test_exact_multiple_of_batch_size_is_checkpointed,
+                 test_full_batches_end_with_an_idle_batch):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+            print(f"✓ {test.__name__}")
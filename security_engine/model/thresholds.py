@@ -0,0 +1,302 @@
+"""
+Decision thresholds: sweep, selection, calibration and the sidecar file
+
+PIIClassifier turns the model's DISCLOSURE probability into BLOCK (proba
+>= block threshold) and WARN (proba >= warn threshold). This module picks
+those two numbers from held-out predictions:
+
+    threshold_sweep     precision, recall, FPR and F1 at every distinct
+                        score, from one sort and two cumulative sums
+                        (O(n log n); about 0.2s for a million rows)
+    pick_thresholds     BLOCK = lowest threshold whose FPR <= target_fpr,
+                        WARN  = highest threshold whose recall >= target_recall
+    calibration_table   reliability table (predicted vs observed rate per
+                        probability bin), expected calibration error and
+                        Brier score
+
+The chosen thresholds are written to a sidecar next to the model
+(pii_intent_lr.joblib -> pii_intent_lr.thresholds.json), which
+PIIClassifier reads whenever it loads the model. The .npz/.mmap exports
+of a model share its sidecar. Without one, 0.85/0.50 are used.
+
+train_model.py writes the sidecar after training; this script recomputes
+it for an existing model on train_model.py's held-out split.
+
+Usage:
+    python thresholds.py                                  # pii_intent_lr.joblib
+    python thresholds.py --target-fpr 0.005 --target-recall 0.995
+    python thresholds.py --dry-run                        # report only
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+
+DEFAULT_BLOCK_THRESHOLD = 0.85
+DEFAULT_WARN_THRESHOLD = 0.50
+
+DEFAULT_TARGET_FPR = 0.001
+DEFAULT_TARGET_RECALL = 0.99
+
+# Thresholds train_model.py has always reported
+CLASSIC_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+def threshold_sweep(y_true, y_score) -> dict:
+    """
+    Metrics of the rule "score >= threshold" at every distinct score.
+
+    Returns:
+        Dict of equal-length arrays ordered from the highest threshold
+        down: threshold, tp, fp, precision, recall, fpr, f1; plus the
+        totals positives and negatives
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    if y_true.shape != y_score.shape or y_true.ndim != 1:
+        raise ValueError("y_true and y_score must be 1-D arrays of the same length")
+    if not len(y_score):
+        raise ValueError("cannot sweep thresholds over an empty set")
+
+    order = np.argsort(-y_score, kind='stable')
+    score = y_score[order]
+    # Last position of each run of equal scores: everything up to it is
+    # predicted positive at that threshold
+    last = np.r_[np.flatnonzero(np.diff(score)), len(score) - 1]
+    tp = np.cumsum(y_true[order], dtype=np.int64)[last]
+    fp = last + 1 - tp
+
+    positives = int(tp[-1])
+    negatives = len(score) - positives
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = tp / positives if positives else np.zeros(len(tp))
+        fpr = fp / negatives if negatives else np.zeros(len(fp))
+        return {
+            'threshold': score[last],
+            'tp': tp,
+            'fp': fp,
+            'precision': tp / (tp + fp),
+            'recall': recall,
+            'fpr': fpr,
+            # 2PR / (P + R) = 2tp / (2tp + fp + fn)
+            'f1': np.where(tp > 0, 2 * tp / (tp + fp + positives), 0.0),
+            'positives': positives,
+            'negatives': negatives,
+        }
+
+
+def metrics_at(sweep: dict, threshold: float) -> dict:
+    """Precision, recall, FPR and F1 of "score >= threshold" (from a sweep)"""
+    # Thresholds are descending; count those >= threshold
+    i = np.searchsorted(-sweep['threshold'], -threshold, side='right') - 1
+    if i < 0:
+        return {'threshold': threshold, 'precision': 0.0, 'recall': 0.0, 'fpr': 0.0, 'f1': 0.0}
+    return {
+        'threshold': threshold,
+        **{name: float(sweep[name][i]) for name in ('precision', 'recall', 'fpr', 'f1')},
+    }
+
+
+def pick_thresholds(sweep: dict, target_fpr: float = DEFAULT_TARGET_FPR,
+                    target_recall: float = DEFAULT_TARGET_RECALL) -> tuple:
+    """
+    BLOCK and WARN thresholds for the given targets.
+
+    BLOCK is the lowest threshold whose false positive rate stays within
+    target_fpr (the most recall that FPR allows); WARN the highest one
+    that still reaches target_recall. WARN is never above BLOCK.
+
+    Returns:
+        (block_threshold, warn_threshold)
+    """
+    thresholds = sweep['threshold']
+    # FPR only grows as the threshold falls
+    within = np.flatnonzero(sweep['fpr'] <= target_fpr)
+    if len(within):
+        block = float(thresholds[within[-1]])
+    else:
+        # Even the top score has too many false positives: block nothing
+        block = float(min(np.nextafter(thresholds[0], np.inf), 1.0))
+
+    reaching = np.flatnonzero(sweep['recall'] >= target_recall)
+    warn = float(thresholds[reaching[0]]) if len(reaching) else float(thresholds[-1])
+    return block, min(warn, block)
+
+
+def calibration_table(y_true, y_proba, bins: int = 10) -> dict:
+    """
+    Reliability of predicted probabilities in equal-width bins.
+
+    Returns:
+        Dict with 'bins' (list of {low, high, count, mean_predicted,
+        observed} for non-empty bins), 'ece' (expected calibration error:
+        count-weighted |mean_predicted - observed|) and 'brier'
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    index = np.minimum((y_proba * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    predicted = np.bincount(index, weights=y_proba, minlength=bins)
+    observed = np.bincount(index, weights=y_true, minlength=bins)
+
+    rows = []
+    ece = 0.0
+    for b in np.flatnonzero(counts):
+        mean_predicted = predicted[b] / counts[b]
+        rate = observed[b] / counts[b]
+        ece += counts[b] * abs(mean_predicted - rate)
+        rows.append({'low': b / bins, 'high': (b + 1) / bins, 'count': int(counts[b]),
+                     'mean_predicted': float(mean_predicted), 'observed': float(rate)})
+    return {
+        'bins': rows,
+        'ece': float(ece / len(y_proba)),
+        'brier': float(np.mean((y_proba - y_true) ** 2)),
+    }
+
+
+def print_sweep(sweep: dict, thresholds=CLASSIC_THRESHOLDS, chosen: tuple = None):
+    """Metric table at the given thresholds, and at the chosen (block, warn)"""
+    print(f"\n{'Threshold':<12} {'Precision':<12} {'Recall':<12} {'F1':<12} {'FP Rate':<12}")
+    print("-" * 60)
+    rows = [(f"{t:.2f}", t) for t in thresholds]
+    if chosen is not None:
+        rows += [(f"{chosen[0]:.4f} B", chosen[0]), (f"{chosen[1]:.4f} W", chosen[1])]
+    for label, threshold in rows:
+        m = metrics_at(sweep, threshold)
+        print(f"{label:<12} {m['precision']:<12.3f} {m['recall']:<12.3f} "
+              f"{m['f1']:<12.3f} {m['fpr']:<12.4f}")
+    best = int(np.argmax(sweep['f1']))
+    print(f"\n   {len(sweep['threshold'])} distinct thresholds; best F1 "
+          f"{sweep['f1'][best]:.4f} at {sweep['threshold'][best]:.4f}")
+
+
+def print_calibration(table: dict):
+    print(f"\n{'Bin':<12} {'Count':>8} {'Predicted':>10} {'Observed':>10} {'Gap':>8}")
+    print("-" * 52)
+    for row in table['bins']:
+        gap = row['observed'] - row['mean_predicted']
+        print(f"{row['low']:.1f}-{row['high']:.1f}{'':<4} {row['count']:>8} "
+              f"{row['mean_predicted']:>10.3f} {row['observed']:>10.3f} {gap:>+8.3f}")
+    print(f"\n   Expected calibration error: {table['ece']:.4f}   Brier score: {table['brier']:.4f}")
+
+
+def sidecar_path(model_path: str) -> str:
+    """pii_intent_lr.joblib (or .npz/.mmap) -> pii_intent_lr.thresholds.json"""
+    return os.path.splitext(model_path)[0] + ".thresholds.json"
+
+
+def write_thresholds(model_path: str, block_threshold: float, warn_threshold: float,
+                     sweep: dict = None, target_fpr: float = None,
+                     target_recall: float = None) -> str:
+    """
+    Write the sidecar of model_path (atomically replaced).
+
+    The held-out metrics at both thresholds are recorded alongside them
+    when a sweep is given.
+
+    Returns:
+        The sidecar path
+    """
+    if not 0.0 <= warn_threshold <= block_threshold <= 1.0:
+        raise ValueError(f"need 0 <= warn ({warn_threshold}) <= block ({block_threshold}) <= 1")
+    data = {
+        'block_threshold': block_threshold,
+        'warn_threshold': warn_threshold,
+        'model': os.path.basename(model_path),
+    }
+    if target_fpr is not None or target_recall is not None:
+        data['targets'] = {'fpr': target_fpr, 'recall': target_recall}
+    if sweep is not None:
+        data['held_out'] = {
+            'positives': sweep['positives'],
+            'negatives': sweep['negatives'],
+            'at_block': metrics_at(sweep, block_threshold),
+            'at_warn': metrics_at(sweep, warn_threshold),
+        }
+
+    path = sidecar_path(model_path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_thresholds(model_path: str) -> tuple:
+    """
+    (block_threshold, warn_threshold) from the sidecar of model_path,
+    or the defaults when there is none.
+
+    Raises:
+        ValueError: If the sidecar is unreadable or its thresholds are invalid
+    """
+    path = sidecar_path(model_path)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return DEFAULT_BLOCK_THRESHOLD, DEFAULT_WARN_THRESHOLD
+    except (OSError, ValueError) as e:
+        raise ValueError(f"cannot read {path}: {e}") from e
+
+    try:
+        block, warn = float(data['block_threshold']), float(data['warn_threshold'])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{path}: missing or invalid thresholds") from e
+    if not 0.0 <= warn <= block <= 1.0:
+        raise ValueError(f"{path}: need 0 <= warn ({warn}) <= block ({block}) <= 1")
+    return block, warn
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Choose BLOCK/WARN thresholds for a trained model",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--model", default="pii_intent_lr.joblib", help="Trained joblib pipeline")
+    parser.add_argument("--data", default="train.txt", help="Labelled data (its 20%% held-out split is used)")
+    parser.add_argument("--target-fpr", type=float, default=DEFAULT_TARGET_FPR,
+                        help="Largest false positive rate allowed at the BLOCK threshold")
+    parser.add_argument("--target-recall", type=float, default=DEFAULT_TARGET_RECALL,
+                        help="Recall the WARN threshold must reach")
+    parser.add_argument("--bins", type=int, default=10, help="Calibration table bins")
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing the sidecar")
+    args = parser.parse_args()
+
+    import joblib
+    from sklearn.model_selection import train_test_split
+
+    from preprocess import model_inputs
+    from train_model import load_data
+
+    print("=" * 80)
+    print("THRESHOLD SELECTION")
+    print("=" * 80)
+
+    pipeline = joblib.load(args.model)
+    texts, labels = load_data(args.data)
+    _, X_test, _, y_test = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    y_proba = pipeline.predict_proba(model_inputs(pipeline, X_test))[:, 1]
+
+    sweep = threshold_sweep(y_test, y_proba)
+    chosen = pick_thresholds(sweep, args.target_fpr, args.target_recall)
+    print(f"\nHeld-out: {sweep['positives']} DISCLOSURE, {sweep['negatives']} NON_DISCLOSURE")
+    print_sweep(sweep, chosen=chosen)
+    print_calibration(calibration_table(y_test, y_proba, args.bins))
+
+    print(f"\nBLOCK {chosen[0]:.4f} (FPR <= {args.target_fpr:g}), "
+          f"WARN {chosen[1]:.4f} (recall >= {args.target_recall:g})")
+    if not args.dry_run:
+        path = write_thresholds(args.model, *chosen, sweep=sweep,
+                                target_fpr=args.target_fpr, target_recall=args.target_recall)
+        print(f"✓ Thresholds saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import argparse
+import os
 import joblib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, cross_val_score
@@ -9,6 +11,31 @@ from sklearn.pipeline import Pipeline, FeatureUnion
 from sklearn.preprocessing import StandardScaler
 import matplotlib.pyplot as plt
 
+from thresholds import (
+    DEFAULT_BLOCK_THRESHOLD, DEFAULT_TARGET_FPR, DEFAULT_TARGET_RECALL, DEFAULT_WARN_THRESHOLD,
+    calibration_table, pick_thresholds, print_calibration, print_sweep, threshold_sweep,
+    write_thresholds
+)
+
+
+def parse_labelled_line(line):
+    """
+    Parse one "__label__<LABEL> text" line.
+    
+    Returns:
+        (text, label) with label 1 for DISCLOSURE and 0 otherwise, or None
+        for empty or malformed lines
+    """
+    line = line.strip()
+    
+    # Skip empty or malformed lines
+    if not line or " " not in line:
+        return None
+    
+    label_part, text = line.split(" ", 1)
+    label = 1 if label_part == "__label__DISCLOSURE" else 0
+    return text, label
+
 
 def load_data(filepath="train.txt"):
     """Load training data"""
@@ -17,60 +44,113 @@ def load_data(filepath="train.txt"):
     
     with open(filepath, encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
-            
-            # Skip empty or malformed lines
-            if not line or " " not in line:
+            parsed = parse_labelled_line(line)
+            if parsed is None:
                 continue
             
-            label_part, text = line.split(" ", 1)
-            label = 1 if label_part == "__label__DISCLOSURE" else 0
-            
-            texts.append(text)
-            labels.append(label)
+            texts.append(parsed[0])
+            labels.append(parsed[1])
     
     return texts, labels
 
 
-def build_pipeline():
+def build_pipeline(fused=False, hashing=False, hash_bits=18, hash_idf=False,
+                   char_ngram_range=(3, 5), char_max_features=5000,
+                   word_ngram_range=(1, 3), word_max_features=3000,
+                   C=1.0, class_weight='balanced'):
     """
     Build improved feature extraction pipeline.
     
     Combines:
     1. Character n-grams (good for PII patterns like emails, phones)
     2. Word n-grams (good for semantic context)
+    
+    The defaults are the shipped model; train_model.py --search compares
+    other n-gram ranges, feature caps and classifier settings.
+    
+    With fused=True the same features are computed by
+    fused_features.FusedFeatures, which normalizes each prompt once; that
+    pipeline is trained on and applied to raw prompts, not
+    preprocess_for_ml output.
+    
+    With hashing=True the n-grams are hashed into 2**hash_bits columns per
+    block instead of being looked up in a fitted vocabulary: nothing is
+    learned or stored for the features (unless hash_idf adds IDF weights)
+    and no n-gram is dropped by a max_features cap, at the cost of
+    occasional collisions.
     """
     
-    features = FeatureUnion([
-        ('char_tfidf', TfidfVectorizer(
-            analyzer='char',
-            ngram_range=(3, 5),
-            min_df=2,
-            max_features=5000,
+    if fused and hashing:
+        raise ValueError("fused and hashing cannot be combined")
+    if hashing:
+        features = _hashed_features(hash_bits, hash_idf, char_ngram_range, word_ngram_range)
+    elif fused:
+        from fused_features import FusedFeatures
+        features = FusedFeatures(
+            char_ngram_range=char_ngram_range, char_min_df=2, char_max_features=char_max_features,
+            word_ngram_range=word_ngram_range, word_min_df=2, word_max_features=word_max_features,
             strip_accents='unicode'
-        )),
-        ('word_tfidf', TfidfVectorizer(
-            analyzer='word',
-            ngram_range=(1, 3),
-            min_df=2,
-            max_features=3000,
-            strip_accents='unicode'
-        ))
-    ])
+        )
+    else:
+        features = _feature_union(char_ngram_range, char_max_features,
+                                  word_ngram_range, word_max_features)
     
     pipeline = Pipeline([
         ('features', features),
-        ('classifier', LogisticRegression(
-            max_iter=1000,
-            class_weight='balanced',
-            C=1.0,
-            random_state=42
-        ))
+        ('classifier', build_classifier(C, class_weight))
     ])
     
     return pipeline
 
 
+def build_classifier(C=1.0, class_weight='balanced'):
+    return LogisticRegression(
+        max_iter=1000,
+        class_weight=class_weight,
+        C=C,
+        random_state=42
+    )
+
+
+def _hashed_features(hash_bits, use_idf, char_ngram_range=(3, 5), word_ngram_range=(1, 3)):
+    """Char and word n-grams of _feature_union(), hashed instead of counted per term"""
+    blocks = []
+    for name, analyzer, ngram_range in (('char_hash', 'char', char_ngram_range),
+                                        ('word_hash', 'word', word_ngram_range)):
+        vectorizer = HashingVectorizer(
+            analyzer=analyzer,
+            ngram_range=ngram_range,
+            n_features=2 ** hash_bits,
+            alternate_sign=False,
+            norm=None if use_idf else 'l2',
+            strip_accents='unicode'
+        )
+        if use_idf:
+            vectorizer = Pipeline([('hash', vectorizer), ('idf', TfidfTransformer())])
+        blocks.append((name, vectorizer))
+    return FeatureUnion(blocks)
+
+
+def _feature_union(char_ngram_range=(3, 5), char_max_features=5000,
+                   word_ngram_range=(1, 3), word_max_features=3000):
+    features = FeatureUnion([
+        ('char_tfidf', _tfidf_block('char', char_ngram_range, char_max_features)),
+        ('word_tfidf', _tfidf_block('word', word_ngram_range, word_max_features))
+    ])
+    
+    return features
+
+
+def _tfidf_block(analyzer, ngram_range, max_features):
+    return TfidfVectorizer(
+        analyzer=analyzer,
+        ngram_range=tuple(ngram_range),
+        min_df=2,
+        max_features=max_features,
+        strip_accents='unicode'
+    )
+
+
 def evaluate_model(pipeline, X_test, y_test):
     """Comprehensive model evaluation"""
     
@@ -121,39 +201,40 @@ def evaluate_model(pipeline, X_test, y_test):
     return y_proba
 
 
-def analyze_threshold(y_test, y_proba):
+def analyze_threshold(y_test, y_proba, target_fpr=DEFAULT_TARGET_FPR,
+                      target_recall=DEFAULT_TARGET_RECALL):
     """
-    Analyze different probability thresholds for decision making.
-    Helps choose optimal BLOCK and WARN thresholds.
+    Analyze every probability threshold for decision making.
+    
+    One sort of the held-out scores gives precision, recall, FPR and F1 at
+    every distinct threshold (thresholds.threshold_sweep). BLOCK is set to
+    the lowest threshold with FPR <= target_fpr and WARN to the highest
+    with recall >= target_recall.
+    
+    Returns:
+        (sweep, (block_threshold, warn_threshold))
     """
     
     print("\n" + "="*80)
     print("THRESHOLD ANALYSIS")
     print("="*80)
     
-    thresholds = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95]
+    sweep = threshold_sweep(y_test, y_proba)
+    chosen = pick_thresholds(sweep, target_fpr, target_recall)
+    print_sweep(sweep, chosen=chosen)
     
-    print(f"\n{'Threshold':<12} {'Precision':<12} {'Recall':<12} {'F1':<12} {'FP Rate':<12}")
-    print("-" * 60)
+    print("\nCalibration:")
+    print_calibration(calibration_table(y_test, y_proba))
     
-    for threshold in thresholds:
-        y_pred_thresh = (y_proba >= threshold).astype(int)
-        cm = confusion_matrix(y_test, y_pred_thresh)
-        
-        tn, fp, fn, tp = cm.ravel()
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
-        fpr = fp / (fp + tn) if (fp + tn) > 0 else 0
-        
-        print(f"{threshold:<12.2f} {precision:<12.3f} {recall:<12.3f} {f1:<12.3f} {fpr:<12.3f}")
+    print("\nChosen thresholds:")
+    print(f"  - BLOCK {chosen[0]:.4f}: lowest threshold with FP rate <= {target_fpr:g}")
+    print(f"  - WARN  {chosen[1]:.4f}: highest threshold with recall >= {target_recall:g}")
     
-    print("\nRecommendations:")
-    print("  - BLOCK threshold (0.85-0.90): High precision, catches most real disclosures")
-    print("  - WARN threshold (0.50-0.70): Lower threshold for ambiguous cases")
+    return sweep, chosen
 
 
-def test_examples(pipeline):
+def test_examples(pipeline, block_threshold=DEFAULT_BLOCK_THRESHOLD,
+                  warn_threshold=DEFAULT_WARN_THRESHOLD):
     """Test model on example cases"""
     
     print("\n" + "="*80)
@@ -190,15 +271,14 @@ def test_examples(pipeline):
     correct = 0
     total = 0
     
+    from preprocess import model_inputs
     for text, expected in test_cases:
-        from preprocess import preprocess_for_ml
-        processed = preprocess_for_ml(text)
-        proba = pipeline.predict_proba([processed])[0][1]
+        proba = pipeline.predict_proba(model_inputs(pipeline, [text]))[0][1]
         
         # Decision logic (matching classifier.py)
-        if proba >= 0.85:
+        if proba >= block_threshold:
             decision = "BLOCK"
-        elif proba >= 0.50:
+        elif proba >= warn_threshold:
             decision = "WARN"
         else:
             decision = "ALLOW"
@@ -216,8 +296,16 @@ def test_examples(pipeline):
         print(f"\nAccuracy on clear cases: {correct}/{total} = {correct/total*100:.1f}%")
 
 
-def main():
-    """Main training function"""
+def main(cache_dir=".feature_cache", target_fpr=DEFAULT_TARGET_FPR,
+         target_recall=DEFAULT_TARGET_RECALL, **pipeline_options):
+    """
+    Main training function (other keyword arguments go to build_pipeline).
+    
+    Preprocessed text and fitted feature matrices are reused from
+    cache_dir (see feature_cache.py); cache_dir=None always recomputes.
+    The BLOCK/WARN thresholds meeting target_fpr and target_recall on the
+    test set are saved next to the model (thresholds.py).
+    """
     
     print("="*80)
     print("PII DISCLOSURE DETECTOR - MODEL TRAINING")
@@ -244,19 +332,29 @@ def main():
     
     # Build and train model
     print("\n3. Training model...")
-    pipeline = build_pipeline()
-    
-    # Preprocess training data
-    from preprocess import preprocess_for_ml
-    X_train_processed = [preprocess_for_ml(x) for x in X_train]
-    X_test_processed = [preprocess_for_ml(x) for x in X_test]
-    
-    pipeline.fit(X_train_processed, y_train)
+    pipeline = build_pipeline(**pipeline_options)
+    
+    # Preprocess training data (fused pipelines take the raw prompts)
+    if cache_dir:
+        from feature_cache import FeatureCache
+        cache = FeatureCache(cache_dir)
+        X_train_processed = cache.model_inputs(pipeline, X_train)
+        X_test_processed = cache.model_inputs(pipeline, X_test)
+        pipeline = cache.fit_pipeline(pipeline, X_train_processed, y_train)
+    else:
+        from preprocess import model_inputs
+        X_train_processed = model_inputs(pipeline, X_train)
+        X_test_processed = model_inputs(pipeline, X_test)
+        pipeline.fit(X_train_processed, y_train)
     print("   ✓ Training complete")
     
     # Cross-validation
     print("\n4. Cross-validation...")
-    cv_scores = cross_val_score(pipeline, X_train_processed, y_train, cv=5, scoring='f1')
+    if cache_dir:
+        cv_scores = cache.cross_val_score(pipeline, X_train_processed, y_train, cv=5, scoring='f1')
+        print(f"   Feature cache: {cache.hits} hits, {cache.misses} misses ({cache_dir})")
+    else:
+        cv_scores = cross_val_score(pipeline, X_train_processed, y_train, cv=5, scoring='f1')
     print(f"   CV F1 Scores: {cv_scores}")
     print(f"   Mean: {cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
     
@@ -265,28 +363,99 @@ def main():
     y_proba = evaluate_model(pipeline, X_test_processed, y_test)
     
     # Threshold analysis
-    analyze_threshold(y_test, y_proba)
+    sweep, (block_threshold, warn_threshold) = analyze_threshold(
+        y_test, y_proba, target_fpr, target_recall
+    )
     
     # Test examples
-    test_examples(pipeline)
+    test_examples(pipeline, block_threshold, warn_threshold)
     
     # Save model
     print("\n6. Saving model...")
     # We need to save just the vectorizer and model components
     # since preprocessing is done separately
-    joblib.dump(pipeline, "pii_intent_lr.joblib")
+    # Write to a temporary file and rename it into place, so a classifier
+    # watching the model file never sees a half-written artifact
+    joblib.dump(pipeline, "pii_intent_lr.joblib.tmp")
+    os.replace("pii_intent_lr.joblib.tmp", "pii_intent_lr.joblib")
+    # The thresholds go last, right after the model. A watching classifier
+    # reloads only once both files have stopped changing for a polling
+    # interval, so it picks up the new model with its new thresholds
+    thresholds_path = write_thresholds(
+        "pii_intent_lr.joblib", block_threshold, warn_threshold, sweep,
+        target_fpr, target_recall
+    )
     print("   ✓ Model saved to pii_intent_lr.joblib")
+    print(f"   ✓ Thresholds (BLOCK {block_threshold:.4f}, WARN {warn_threshold:.4f}) "
+          f"saved to {thresholds_path}")
     
     print("\n" + "="*80)
     print("TRAINING COMPLETE!")
     print("="*80)
     print("\nNext steps:")
     print("  1. Review the metrics above")
-    print("  2. Adjust thresholds in classifier.py if needed")
+    print("  2. Adjust thresholds if needed (python thresholds.py --target-fpr ...)")
     print("  3. Run test_classifier.py to test on examples")
     print("  4. Collect misclassified examples and add to training data")
+    print("     (or apply them right away: python online_learning.py --feedback FILE)")
     print("  5. Retrain periodically")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the PII disclosure model")
+    parser.add_argument("--fused", action="store_true",
+                        help="Use fused feature extraction (fused_features.py)")
+    parser.add_argument("--hashing", action="store_true",
+                        help="Use hashed n-gram features instead of fitted vocabularies")
+    parser.add_argument("--hash-bits", type=int, default=18,
+                        help="Hashed columns per block are 2**HASH_BITS (with --hashing)")
+    parser.add_argument("--hash-idf", action="store_true",
+                        help="Weight hashed features by IDF (with --hashing)")
+    parser.add_argument("--char-ngrams", type=int, nargs=2, default=(3, 5), metavar=("MIN", "MAX"),
+                        help="Character n-gram range")
+    parser.add_argument("--char-max-features", type=int, default=5000,
+                        help="Character n-grams kept (most frequent first)")
+    parser.add_argument("--word-ngrams", type=int, nargs=2, default=(1, 3), metavar=("MIN", "MAX"),
+                        help="Word n-gram range")
+    parser.add_argument("--word-max-features", type=int, default=3000,
+                        help="Word n-grams kept (most frequent first)")
+    parser.add_argument("-C", type=float, default=1.0, help="Inverse regularization strength")
+    parser.add_argument("--class-weight", choices=("balanced", "none"), default="balanced",
+                        help="LogisticRegression class weights")
+    parser.add_argument("--search", action="store_true",
+                        help="Search n-gram ranges, feature caps and classifier settings "
+                             "instead of training (model_search.py)")
+    parser.add_argument("--grid", metavar="JSON", help="Search grid entries replacing the defaults")
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds in --search")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel --search workers (-1 = all cores)")
+    parser.add_argument("--min-recall", type=float,
+                        help="Also report the fastest --search configuration with this recall")
+    parser.add_argument("--search-output", default="search_results.json",
+                        help="Where --search saves every configuration's scores")
+    parser.add_argument("--target-fpr", type=float, default=DEFAULT_TARGET_FPR,
+                        help="Largest false positive rate allowed at the BLOCK threshold")
+    parser.add_argument("--target-recall", type=float, default=DEFAULT_TARGET_RECALL,
+                        help="Recall the WARN threshold must reach")
+    parser.add_argument("--cache-dir", default=".feature_cache",
+                        help="Reuse preprocessed text and feature matrices from here")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute all features and leave the cache untouched")
+    args = parser.parse_args()
+    
+    if args.search:
+        import tempfile
+        import model_search
+        
+        with tempfile.TemporaryDirectory() as scratch:
+            results = model_search.search(
+                grid=model_search.load_grid(args.grid), folds=args.folds, jobs=args.jobs,
+                cache_dir=scratch if args.no_cache else args.cache_dir
+            )
+        model_search.report(results, args.min_recall, args.search_output)
+    else:
+        main(cache_dir=None if args.no_cache else args.cache_dir,
+             target_fpr=args.target_fpr, target_recall=args.target_recall,
+             fused=args.fused, hashing=args.hashing, hash_bits=args.hash_bits, hash_idf=args.hash_idf,
+             char_ngram_range=tuple(args.char_ngrams), char_max_features=args.char_max_features,
+             word_ngram_range=tuple(args.word_ngrams), word_max_features=args.word_max_features,
+             C=args.C, class_weight=None if args.class_weight == "none" else args.class_weight)
\ No newline at end of file